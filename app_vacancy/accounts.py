@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from app_vacancy.cache import bump_versions, get_version
+from app_vacancy.models import Company, Resume
+from app_vacancy.routers import PRIMARY
+
+USER_TIMEOUT = 5 * 60
+OWNER_FIELDS = {Company: 'owner_id', Resume: 'user_id'}
+# What the cache keeps of a user. Not the password hash: the restored user loads it like any deferred field,
+# in the rare request that checks a password.
+USER_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'email', 'is_active', 'is_staff', 'is_superuser', 'last_login',
+    'date_joined',
+)
+
+
+def _namespace(user_id):
+    return f'user:{user_id}'
+
+
+def load_user(user_id):
+    # The user with the ids of their company and resume, both reverse one-to-ones: one joined query.
+    return (
+        get_user_model().objects
+        .annotate(company_id=F('company__id'), resume_id=F('resumes__id'))
+        .filter(pk=user_id)
+        .first()
+    )
+
+
+def _cached_fields(user):
+    return {
+        'fields': {name: getattr(user, name) for name in USER_FIELDS},
+        'company_id': user.company_id,
+        'resume_id': user.resume_id,
+        # Checked against the session on every request; computing it would load the password.
+        'session_auth_hash': user.get_session_auth_hash(),
+    }
+
+
+def _restore(data):
+    model = get_user_model()
+    fields = data['fields']
+    # from_db() takes the values in the order of the model's fields.
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in fields]
+    user = model.from_db(PRIMARY, names, [fields[name] for name in names])
+    user.company_id = data['company_id']
+    user.resume_id = data['resume_id']
+    user.get_session_auth_hash = lambda: data['session_auth_hash']
+    return user
+
+
+def cached_user(user_id):
+    namespace = _namespace(user_id)
+    key = f'{namespace}:{get_version(namespace)}'
+    data = cache.get(key)
+    if data is None:
+        user = load_user(user_id)
+        if user is None:
+            return None
+        data = _cached_fields(user)
+        cache.set(key, data, USER_TIMEOUT)
+    return _restore(data)
+
+
+class UserContextBackend(ModelBackend):
+    # Logs in like ModelBackend; the user of every later request comes from cached_user(), so
+    # request.user.company_id and request.user.resume_id cost no query of their own.
+
+    def get_user(self, user_id):
+        user = cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+def user_changed(user_id):
+    # After the commit: a request reading the old rows meanwhile caches them under the old version.
+    if user_id is not None:
+        transaction.on_commit(lambda: bump_versions(_namespace(user_id)))
+
+
+def remember_owner(instance):
+    field = OWNER_FIELDS[type(instance)]
+    instance._stored_owner = None
+    if instance.pk:
+        instance._stored_owner = type(instance).objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def owner_changed(instance):
+    # Both the new owner and the one the row was taken from see it at once.
+    for user_id in {getattr(instance, OWNER_FIELDS[type(instance)]), getattr(instance, '_stored_owner', None)}:
+        user_changed(user_id)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from app_vacancy.models import Company, Specialty, Vacancy, Application
+from app_vacancy.models import Blob, Company, Skill, Specialty, Vacancy, Application
 
 
 @admin.register(Company)
@@ -18,6 +18,16 @@ class VacancyAdmin(admin.ModelAdmin):
     pass
 
 
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'vacancies_count')
+
+
+@admin.register(Blob)
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'references')
+
+
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
     pass
@@ -0,0 +1,169 @@
+from django.db.models import F
+from django.http import Http404, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+
+from app_vacancy.cache import CATALOG, get_version, last_modified, make_key
+from app_vacancy.models import Company, Specialty, Vacancy
+from app_vacancy.facets import base_vacancies, facet_counts, filter_vacancies
+from app_vacancy.pagination import paginate
+from app_vacancy.reference import specialty_by_code
+from app_vacancy.search import SearchPaginator
+from app_vacancy.storage import blob_storage
+
+API_VERSION = 'v1'
+MAX_PAGE_SIZE = 100
+
+VACANCY_FIELDS = ('id', 'title', 'skills', 'salary_min', 'salary_max', 'published_at', 'company_id')
+VACANCY_RELATED = {
+    'specialty_code': F('specialty__code'),
+    'company_name': F('company__name'),
+}
+COMPANY_FIELDS = ('id', 'name', 'location', 'logo', 'employee_count', 'vacancies_count')
+SPECIALTY_FIELDS = ('code', 'title', 'picture', 'vacancies_count')
+
+
+class BadRequest(Exception):
+    pass
+
+
+def catalog_etag(request, *args, **kwargs):
+    return make_key(API_VERSION, get_version(CATALOG))
+
+
+def catalog_modified(request, *args, **kwargs):
+    return last_modified(CATALOG)
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+
+def media_urls(row, *fields):
+    for field in fields:
+        if row.get(field):
+            row[field] = blob_storage.url(row[field])
+    return row
+
+
+def int_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f'{name} must be an integer')
+
+
+def page_size(request):
+    size = int_param(request, 'limit')
+    if size is not None and not 0 < size <= MAX_PAGE_SIZE:
+        raise BadRequest(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return size
+
+
+def paginated(request, rows, paginator_class=None, transform=None):
+    kwargs = {'page_size': page_size(request)}
+    if paginator_class:
+        kwargs['paginator_class'] = paginator_class
+    page = paginate(request, rows, **kwargs)
+    results = [transform(row) for row in page] if transform else list(page)
+    return {
+        'results': results,
+        'next': f'{request.path}?{page.next_query}' if page.has_next else None,
+    }
+
+
+def vacancy_rows(queryset, *extra):
+    return queryset.values(*VACANCY_FIELDS, *extra, **VACANCY_RELATED)
+
+
+@method_decorator(condition(etag_func=catalog_etag, last_modified_func=catalog_modified), name='dispatch')
+class ApiView(View):
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return json_response({'error': 'not found'}, status=404)
+        except BadRequest as error:
+            return json_response({'error': str(error)}, status=400)
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        response = super().http_method_not_allowed(request, *args, **kwargs)
+        return json_response({'error': 'method not allowed'}, status=response.status_code)
+
+
+def get_row(queryset, **lookup):
+    row = queryset.filter(**lookup).first()
+    if row is None:
+        raise Http404
+    return row
+
+
+class VacancyListApi(ApiView):
+
+    def get(self, request):
+        vacancies, paginator_class = base_vacancies(request.GET)
+        vacancies = filter_vacancies(vacancies, request.GET)
+        if issubclass(paginator_class, SearchPaginator):
+            data = paginated(request, vacancy_rows(vacancies, 'rank'), paginator_class, self.without_rank)
+        else:
+            data = paginated(request, vacancy_rows(vacancies), paginator_class)
+        if request.GET.get('facets'):
+            data['facets'] = facet_counts(request.GET)
+        return json_response(data)
+
+    @staticmethod
+    def without_rank(row):
+        row.pop('rank')
+        return row
+
+
+class VacancySpecialtyApi(ApiView):
+
+    def get(self, request, specialty):
+        rows = vacancy_rows(Vacancy.objects.filter(specialty__code=specialty))
+        data = paginated(request, rows)
+        if not data['results'] and specialty_by_code(specialty) is None:
+            raise Http404
+        return json_response(data)
+
+
+class VacancyApi(ApiView):
+
+    def get(self, request, id):
+        row = get_row(vacancy_rows(Vacancy.objects.all(), 'description'), id=id)
+        return json_response(row)
+
+
+class CompanyListApi(ApiView):
+
+    def get(self, request):
+        rows = Company.objects.values(*COMPANY_FIELDS)
+        return json_response(paginated(request, rows, transform=lambda row: media_urls(row, 'logo')))
+
+
+class CompanyApi(ApiView):
+
+    def get(self, request, id):
+        row = get_row(Company.objects.values(*COMPANY_FIELDS, 'description'), id=id)
+        return json_response(media_urls(row, 'logo'))
+
+
+class CompanyVacanciesApi(ApiView):
+
+    def get(self, request, id):
+        data = paginated(request, vacancy_rows(Vacancy.objects.filter(company_id=id)))
+        if not data['results'] and not Company.objects.filter(id=id).exists():
+            raise Http404
+        return json_response(data)
+
+
+class SpecialtyListApi(ApiView):
+
+    def get(self, request):
+        rows = Specialty.objects.order_by('code').values(*SPECIALTY_FIELDS)
+        return json_response({'results': [media_urls(row, 'picture') for row in rows], 'next': None})
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AppVacancyConfig(AppConfig):
     name = 'app_vacancy'
+
+    def ready(self):
+        import app_vacancy.signals  # noqa: F401
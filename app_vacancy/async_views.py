@@ -0,0 +1,155 @@
+import asyncio
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+from django.views import View
+
+from app_vacancy import views
+from app_vacancy.cache import homepage_companies, homepage_skills, homepage_specialties
+from app_vacancy.counters import total_vacancies
+from app_vacancy.forms import ApplicationForm
+from app_vacancy.middleware import request_queries
+from app_vacancy.facets import base_vacancies, facet_choices, facet_counts, filter_vacancies
+from app_vacancy.models import Company, Vacancy
+from app_vacancy.pages import depends_on
+from app_vacancy.pagination import paginate
+from app_vacancy.reference import attach_specialties, specialty_by_code
+from app_vacancy.similar import similar_to
+from app_vacancy.skills import random_skills
+
+
+def _closing_connections(func):
+    def call(*args, **kwargs):
+        try:
+            with request_queries():
+                return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return call
+
+
+def concurrently(func, *args, **kwargs):
+    return sync_to_async(_closing_connections(func), thread_sensitive=False)(*args, **kwargs)
+
+
+async def render_async(request, template_name, context):
+    return await concurrently(render, request, template_name, context=context)
+
+
+class AsyncView(View):
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+
+        return update_wrapper(async_view, view)
+
+
+class MainView(AsyncView):
+
+    async def get(self, request):
+        query = request.GET.get('search')
+        specialties, companies, skills = await asyncio.gather(
+            concurrently(homepage_specialties, query),
+            concurrently(homepage_companies, query),
+            concurrently(homepage_skills),
+        )
+        main = {
+            'specialties': specialties,
+            'companies': companies,
+            'skills_random': random_skills(skills)
+        }
+        return await render_async(request, 'index.html', main)
+
+
+class SearchView(AsyncView):
+
+    async def get(self, request):
+        vacancies, paginator_class = base_vacancies(request.GET)
+        vacancies = filter_vacancies(vacancies, request.GET)
+        page, counts = await asyncio.gather(
+            concurrently(paginate, request, vacancies, paginator_class),
+            concurrently(facet_counts, request.GET),
+        )
+        context = {
+            'vacancies': await concurrently(attach_specialties, page),
+            'vacancies_count': counts['total'],
+            'facets': facet_choices(counts, request.GET),
+        }
+        return await render_async(request, 'search.html', context)
+
+
+class AllVacanciesView(AsyncView):
+
+    async def get(self, request):
+        vacancies, vacancies_count = await asyncio.gather(
+            concurrently(paginate, request, Vacancy.objects.all()),
+            concurrently(total_vacancies),
+        )
+        all_vacancies = {
+            'vacancies': await concurrently(attach_specialties, vacancies),
+            'vacancies_count': vacancies_count,
+        }
+        return await render_async(request, 'vacancies.html', all_vacancies)
+
+
+class VacanciesSpecView(AsyncView):
+
+    async def get(self, request, specialty):
+        spec = await concurrently(specialty_by_code, specialty)
+        if spec is None:
+            raise Http404
+        vacs_of_spec = await concurrently(paginate, request, spec.vacancies.all())
+        vacancies_of_spec = {
+            'spec': spec,
+            'vacs_of_spec': await concurrently(attach_specialties, vacs_of_spec),
+            'vacs_of_spec_amount': spec.vacancies_count
+        }
+        return await render_async(request, 'vacsspec.html', vacancies_of_spec)
+
+
+class CompaniesView(AsyncView):
+
+    async def get(self, request, id):
+        vacancies = Vacancy.objects.filter(company_id=id)
+        company, vacs_of_company = await asyncio.gather(
+            concurrently(get_object_or_404, Company, id=id),
+            concurrently(paginate, request, vacancies),
+        )
+        specialties = {f'specialty:{vacancy.specialty_id}' for vacancy in vacs_of_company}
+        await concurrently(depends_on, request, *specialties)
+        companies = {
+            'company': company,
+            'vacs_of_company': await concurrently(attach_specialties, vacs_of_company),
+        }
+        return await render_async(request, 'company.html', companies)
+
+
+class OneVacancyView(AsyncView):
+
+    async def get(self, request, id):
+        vacancy, similar = await asyncio.gather(
+            concurrently(get_object_or_404, Vacancy.objects.select_related('company'), id=id),
+            concurrently(similar_to, id),
+        )
+        await concurrently(depends_on, request, f'company:{vacancy.company_id}', f'specialty:{vacancy.specialty_id}')
+        await concurrently(attach_specialties, [vacancy])
+        vac_and_form = {
+            'vacancy': vacancy,
+            'company': vacancy.company,
+            'form': ApplicationForm(),
+            'similar': similar,
+        }
+        return await render_async(request, 'vacancy.html', vac_and_form)
+
+    async def post(self, request, id):
+        return await sync_to_async(views.OneVacancyView.post)(self, request, id)
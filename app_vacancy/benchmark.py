@@ -0,0 +1,164 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from pathlib import Path
+from statistics import mean
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.db import connections
+from django.test import Client
+
+DEFAULT_BASELINE = Path('benchmarks') / 'baseline.json'
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Result:
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def add(self, latency, status, queries):
+        self.latencies.append(latency)
+        if queries is not None:
+            self.queries.append(queries)
+        if status >= 500:
+            self.errors += 1
+
+    def summary(self):
+        return {
+            'requests': len(self.latencies),
+            'errors': self.errors,
+            'rps': round(len(self.latencies) / self.elapsed, 1) if self.elapsed else 0,
+            'p50_ms': round(percentile(self.latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(self.latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(self.latencies, 0.99) * 1000, 2),
+            'queries': round(mean(self.queries), 1) if self.queries else None,
+        }
+
+
+class InProcessTarget:
+
+    def __init__(self, credentials=None):
+        self.client = Client()
+        if credentials:
+            self.client.login(**credentials)
+
+    def get(self, url):
+        response = self.client.get(url)
+        return self.outcome(response)
+
+    def post(self, url, data):
+        return self.outcome(self.client.post(url, data))
+
+    def outcome(self, response):
+        stats = getattr(response.wsgi_request, 'query_stats', None)
+        return response.status_code, stats.count if stats else None
+
+    def close(self):
+        connections.close_all()
+
+
+class HttpTarget:
+
+    def __init__(self, base_url, credentials=None):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+        if credentials:
+            self.login(credentials)
+
+    def login(self, credentials):
+        self.opener.open(f'{self.base_url}/login')
+        self.opener.open(self.form_request('/login', credentials))
+
+    def form_request(self, url, data):
+        token = next(cookie.value for cookie in self.cookies if cookie.name == 'csrftoken')
+        body = urlencode({**data, 'csrfmiddlewaretoken': token}).encode()
+        return Request(f'{self.base_url}{url}', data=body, headers={'Referer': self.base_url})
+
+    def get(self, url):
+        return self.open(f'{self.base_url}{url}')
+
+    def post(self, url, data):
+        if not any(cookie.name == 'csrftoken' for cookie in self.cookies):
+            self.get(url)
+        return self.open(self.form_request(url, data))
+
+    def open(self, request):
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                queries = response.headers.get('X-Query-Count')
+                return response.status, int(queries) if queries else None
+        except OSError as error:
+            return getattr(error, 'code', 599), None
+
+    def close(self):
+        pass
+
+
+def drive(make_target, call, count, result):
+    target = make_target()
+    try:
+        for number in range(count):
+            start = time.perf_counter()
+            status, queries = call(target, number)
+            result.add(time.perf_counter() - start, status, queries)
+    finally:
+        target.close()
+
+
+def run_route(make_target, name, url, requests, concurrency):
+    result = Result(name)
+    shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [executor.submit(drive, make_target, lambda target, _: target.get(url), share, result)
+                   for share in shares]
+    for future in futures:
+        future.result()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_together(make_target, workloads, requests):
+    # Every (result, call) workload gets a thread and a target of its own, and they all run at once.
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(workloads)) as executor:
+        futures = [executor.submit(drive, make_target, call, requests, result) for result, call in workloads]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    for result, _ in workloads:
+        result.elapsed = elapsed
+
+
+def save_baseline(results, path=DEFAULT_BASELINE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+def compare(results, path=DEFAULT_BASELINE, tolerance=0.2):
+    baseline = json.loads(Path(path).read_text())
+    regressions = []
+    for name, summary in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if summary['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append((name, before['p95_ms'], summary['p95_ms']))
+        if (summary['queries'] or 0) > (before['queries'] or 0):
+            regressions.append((f'{name} queries', before['queries'], summary['queries']))
+    return regressions
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+
+from app_vacancy.images import delete_variants
+from app_vacancy.models import Blob, Company, Specialty
+from app_vacancy.storage import blob_storage, is_hashed
+
+FILE_FIELDS = {Company: 'logo', Specialty: 'picture'}
+GRACE_PERIOD = timedelta(days=1)
+
+
+def _shift(name, delta):
+    if not name:
+        return
+    updated = Blob.objects.filter(name=name).update(references=F('references') + delta)
+    if updated or delta < 0:
+        return
+    # Two uploads of the same new content may both get here: get_or_create lets only one create the row.
+    blob, created = Blob.objects.get_or_create(name=name, defaults={'references': delta})
+    if not created:
+        Blob.objects.filter(pk=blob.pk).update(references=F('references') + delta)
+
+
+def remember_file(instance):
+    field = FILE_FIELDS[type(instance)]
+    instance._stored_file = None
+    if instance.pk:
+        instance._stored_file = type(instance).objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def file_saved(instance):
+    old = getattr(instance, '_stored_file', None)
+    new = getattr(instance, FILE_FIELDS[type(instance)]).name
+    if old != new:
+        _shift(old, -1)
+        _shift(new, 1)
+
+
+def file_deleted(instance):
+    _shift(getattr(instance, FILE_FIELDS[type(instance)]).name, -1)
+
+
+def referenced_names():
+    names = {}
+    for model, field in FILE_FIELDS.items():
+        for name in model.objects.exclude(**{field: ''}).values_list(field, flat=True):
+            names[name] = names.get(name, 0) + 1
+    return names
+
+
+def reconcile():
+    # Also the only way files of companies and specialties saved in bulk (seeding) get their blobs.
+    names = referenced_names()
+    Blob.objects.bulk_create([Blob(name=name) for name in names], ignore_conflicts=True)
+    for blob in Blob.objects.all():
+        references = names.get(blob.name, 0)
+        if blob.references != references:
+            Blob.objects.filter(pk=blob.pk).update(references=references)
+    return len(names)
+
+
+def adopt_legacy_files():
+    adopted = 0
+    for model, field in FILE_FIELDS.items():
+        for pk, name in model.objects.exclude(**{field: ''}).values_list('pk', field):
+            if is_hashed(name) or not blob_storage.exists(name):
+                continue
+            with blob_storage.open(name) as legacy:
+                hashed_name = blob_storage.save(name, File(legacy, name))
+            if hashed_name != name:
+                model.objects.filter(pk=pk).update(**{field: hashed_name})
+                Blob.objects.get_or_create(name=name)
+                adopted += 1
+    return adopted
+
+
+def collect_garbage(now=None):
+    cutoff = (now or timezone.now()) - GRACE_PERIOD
+    deleted = []
+    for blob in Blob.objects.filter(references__lte=0):
+        if blob_storage.exists(blob.name) and blob_storage.get_modified_time(blob.name) > cutoff:
+            continue
+        blob_storage.delete(blob.name)
+        delete_variants(blob.name)
+        blob.delete()
+        deleted.append(blob.name)
+    return deleted
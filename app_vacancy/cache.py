@@ -0,0 +1,156 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from app_vacancy.models import Company, Specialty
+from app_vacancy.skills import top_skills
+
+HOMEPAGE = 'homepage'
+CATALOG = 'catalog'
+# Stamp of the specialties and company cards every worker keeps in memory (app_vacancy/reference.py).
+REFERENCE = 'reference'
+DEFAULT_TIMEOUT = 60 * 60
+LOCK_TIMEOUT = 30
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def _modified_key(namespace):
+    return f'{namespace}:modified'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), uuid4().hex, None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def get_versions(namespaces):
+    found = cache.get_many([_version_key(namespace) for namespace in namespaces])
+    return {namespace: found.get(_version_key(namespace)) or get_version(namespace) for namespace in namespaces}
+
+
+def current_versions(namespaces):
+    found = cache.get_many([_version_key(namespace) for namespace in namespaces])
+    return {namespace: found.get(_version_key(namespace)) for namespace in namespaces}
+
+
+def bump_versions(*namespaces):
+    cache.set_many({_version_key(namespace): uuid4().hex for namespace in namespaces}, None)
+
+
+def bump_version(namespace):
+    cache.set_many({_version_key(namespace): uuid4().hex, _modified_key(namespace): time.time()}, None)
+
+
+def last_modified(namespace):
+    modified = cache.get(_modified_key(namespace))
+    if modified is None:
+        cache.add(_modified_key(namespace), time.time(), None)
+        modified = cache.get(_modified_key(namespace))
+    return datetime.fromtimestamp(int(modified), timezone.utc)
+
+
+def catalog_committed():
+    bump_version(HOMEPAGE)
+    bump_version(CATALOG)
+    bump_versions(REFERENCE)
+
+
+def invalidate_catalog():
+    # After the commit: a request reading the old rows meanwhile would cache them under the new version,
+    # and workers reload their reference data as soon as they see the new stamp.
+    transaction.on_commit(catalog_committed)
+
+
+def make_key(*parts):
+    raw = ':'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _take_over(path):
+    # A worker killed while computing leaves its file behind; past LOCK_TIMEOUT the next one takes over.
+    # Two arriving in that same instant may both compute, as they would without a lock.
+    try:
+        if time.time() - os.path.getmtime(path) < LOCK_TIMEOUT:
+            return None
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def acquire_lock(name):
+    # cache.add() is no lock on the file cache, which checks for the key and then writes it. Creating a file
+    # with O_EXCL is atomic on any local filesystem: exactly one worker gets it.
+    os.makedirs(settings.CACHE_LOCK_DIR, exist_ok=True)
+    path = os.path.join(settings.CACHE_LOCK_DIR, f'{make_key(name)}.lock')
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return _take_over(path)
+    return path
+
+
+def release_lock(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_or_compute(namespace, key, compute, timeout=DEFAULT_TIMEOUT):
+    versioned_key = f'{namespace}:{get_version(namespace)}:{key}'
+    value = cache.get(versioned_key)
+    if value is not None:
+        return value
+
+    stale_key = f'{namespace}:stale:{key}'
+    lock = acquire_lock(versioned_key)
+    if lock is None:
+        value = cache.get(stale_key)
+        if value is not None:
+            return value
+
+    try:
+        value = compute()
+        cache.set(versioned_key, value, timeout)
+        cache.set(stale_key, value, timeout * 2)
+    finally:
+        if lock is not None:
+            release_lock(lock)
+    return value
+
+
+def homepage_specialties(query=None):
+    def compute():
+        specialties = Specialty.objects.all()
+        if query:
+            specialties = specialties.filter(title__icontains=query)
+        return list(specialties)
+
+    return get_or_compute(HOMEPAGE, make_key('specialties', query), compute)
+
+
+def homepage_companies(query=None):
+    def compute():
+        companies = Company.objects.values('id', 'name', 'logo', 'vacancies_count')
+        if query:
+            companies = companies.filter(name__icontains=query)
+        return list(companies)
+
+    return get_or_compute(HOMEPAGE, make_key('companies', query), compute)
+
+
+def homepage_skills():
+    return get_or_compute(HOMEPAGE, 'skills', top_skills)
@@ -0,0 +1,123 @@
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from app_vacancy.models import Application, Company, Skill, Specialty, Vacancy
+
+COUNTED_RELATIONS = (('company_id', Company), ('specialty_id', Specialty))
+
+
+def _shift(model, pk, delta):
+    # Greatest(): a count that drifted to zero must not fail the save or delete; reconcile() repairs it.
+    model.objects.filter(pk=pk).update(vacancies_count=Greatest(F('vacancies_count') + delta, 0))
+
+
+def remember_vacancy_relations(vacancy):
+    vacancy._counted_relations = None
+    if vacancy.pk:
+        vacancy._counted_relations = (
+            Vacancy.objects
+            .filter(pk=vacancy.pk)
+            .values('company_id', 'specialty_id')
+            .first()
+        )
+
+
+def vacancy_saved(vacancy):
+    old = getattr(vacancy, '_counted_relations', None) or {}
+    for field, model in COUNTED_RELATIONS:
+        old_pk, new_pk = old.get(field), getattr(vacancy, field)
+        if old_pk == new_pk:
+            continue
+        if old_pk is not None:
+            _shift(model, old_pk, -1)
+        _shift(model, new_pk, 1)
+
+
+def vacancy_deleted(vacancy):
+    for field, model in COUNTED_RELATIONS:
+        _shift(model, getattr(vacancy, field), -1)
+
+
+def application_created(application):
+    Vacancy.objects.filter(pk=application.vacancy_id).update(
+        applications_count=F('applications_count') + 1,
+        unread_applications_count=F('unread_applications_count') + (0 if application.is_read else 1),
+    )
+
+
+def application_deleted(application):
+    # Floored at zero like _shift().
+    Vacancy.objects.filter(pk=application.vacancy_id).update(
+        applications_count=Greatest(F('applications_count') - 1, 0),
+        unread_applications_count=Greatest(F('unread_applications_count') - (0 if application.is_read else 1), 0),
+    )
+
+
+def applications_read(counts):
+    if counts:
+        read = Case(*[When(pk=pk, then=Value(count)) for pk, count in counts.items()], default=Value(0))
+        Vacancy.objects.filter(pk__in=counts).update(
+            unread_applications_count=Greatest(F('unread_applications_count') - read, 0),
+        )
+
+
+def total_vacancies():
+    return Specialty.objects.aggregate(total=Sum('vacancies_count'))['total'] or 0
+
+
+def _actual_counts(model, related_field):
+    counts = (
+        Vacancy.objects
+        .filter(**{related_field: OuterRef('pk')})
+        .values(related_field)
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile(model, related_field):
+    drifted = (
+        model.objects
+        .annotate(actual=_actual_counts(model, related_field))
+        .filter(~Q(vacancies_count=F('actual')))
+    )
+    repaired = drifted.count()
+    if repaired:
+        model.objects.update(vacancies_count=_actual_counts(model, related_field))
+    return repaired
+
+
+def _application_counts(**condition):
+    counts = (
+        Application.objects
+        .filter(vacancy=OuterRef('pk'), **condition)
+        .values('vacancy')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_applications():
+    drifted = (
+        Vacancy.objects
+        .annotate(total=_application_counts(), unread=_application_counts(is_read=False))
+        .filter(~Q(applications_count=F('total')) | ~Q(unread_applications_count=F('unread')))
+    )
+    repaired = drifted.count()
+    if repaired:
+        Vacancy.objects.update(
+            applications_count=_application_counts(),
+            unread_applications_count=_application_counts(is_read=False),
+        )
+    return repaired
+
+
+def reconcile_all():
+    return {
+        'company': reconcile(Company, 'company'),
+        'specialty': reconcile(Specialty, 'specialty'),
+        'skill': reconcile(Skill, 'skill_tags'),
+        'application': reconcile_applications(),
+    }
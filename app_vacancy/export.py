@@ -0,0 +1,162 @@
+import csv
+import json
+from datetime import date
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.http import StreamingHttpResponse
+
+from app_vacancy.models import Application, Company, Vacancy
+
+# Rows fetched from the database cursor at a time; memory stays flat however large the export is.
+CHUNK_SIZE = 2000
+# Lines buffered between the database thread and the response when serving under ASGI.
+BUFFERED_LINES = 10000
+# Cells starting with these are run as formulas by Excel and LibreOffice; a leading quote keeps them text.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+EXPORTS = {
+    'applications': (Application, (
+        ('id', 'id'),
+        ('created', 'created'),
+        ('vacancy_id', 'vacancy_id'),
+        ('vacancy', 'vacancy__title'),
+        ('name', 'written_username'),
+        ('phone', 'written_phone'),
+        ('cover_letter', 'written_cover_letter'),
+        ('status', 'status'),
+        ('is_read', 'is_read'),
+    )),
+    'vacancies': (Vacancy, (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('specialty', 'specialty__code'),
+        ('company_id', 'company_id'),
+        ('company', 'company__name'),
+        ('salary_min', 'salary_min'),
+        ('salary_max', 'salary_max'),
+        ('skills', 'skills'),
+        ('published_at', 'published_at'),
+        ('updated_at', 'updated_at'),
+        ('applications_count', 'applications_count'),
+    )),
+    'companies': (Company, (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('location', 'location'),
+        ('employee_count', 'employee_count'),
+        ('vacancies_count', 'vacancies_count'),
+        ('updated_at', 'updated_at'),
+    )),
+}
+CATALOG_EXPORTS = ('vacancies', 'companies')
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(name):
+    model, _ = EXPORTS[name]
+    # Catalog dumps walk the primary key, which needs no sort; applications keep the inbox index order.
+    return model.objects.all() if model is Application else model.objects.order_by('pk')
+
+
+def export_rows(queryset, name):
+    _, columns = EXPORTS[name]
+    header = [column for column, _ in columns]
+    rows = queryset.values_list(*(lookup for _, lookup in columns)).iterator(chunk_size=CHUNK_SIZE)
+    return header, rows
+
+
+def csv_cell(value):
+    # Applicants write the cover letters and names: an exported '=HYPERLINK(...)' must not become a live formula.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    # The byte order mark makes Excel read the file as UTF-8.
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([csv_cell(value) for value in row])
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson; charset=utf-8'),
+}
+
+
+def export_lines(queryset, name, fmt):
+    lines, _ = FORMATS[fmt]
+    return lines(*export_rows(queryset, name))
+
+
+def _offer(queue, line, stopped):
+    while not stopped.is_set():
+        try:
+            queue.put(line, timeout=1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _produce(lines, queue, stopped):
+    end = StopIteration()
+    try:
+        for line in lines:
+            if not _offer(queue, line, stopped):
+                break
+    except Exception as error:
+        end = error
+    finally:
+        lines.close()
+        connection.close()
+        queue.put(end)
+
+
+def in_thread(lines):
+    # The ASGI handler iterates streaming responses on the event loop, where the ORM refuses to run.
+    # A worker thread runs the cursor instead and hands lines over through a bounded queue.
+    queue = Queue(BUFFERED_LINES)
+    stopped = Event()
+    Thread(target=_produce, args=(lines, queue, stopped), daemon=True).start()
+    try:
+        while True:
+            line = queue.get()
+            if isinstance(line, StopIteration):
+                break
+            if isinstance(line, Exception):
+                raise line
+            yield line
+    finally:
+        stopped.set()
+        try:
+            while True:
+                queue.get_nowait()
+        except Empty:
+            pass
+
+
+def stream_export(queryset, name, fmt):
+    lines = export_lines(queryset, name, fmt)
+    if settings.ASYNC_VIEWS:
+        lines = in_thread(lines)
+    _, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{name}-{date.today().isoformat()}.{fmt}"'
+    return response
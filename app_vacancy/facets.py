@@ -0,0 +1,126 @@
+from collections import Counter
+
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from app_vacancy.cache import CATALOG, get_or_compute, make_key
+from app_vacancy.models import Vacancy
+from app_vacancy.pagination import KeysetPaginator
+from app_vacancy.reference import all_specialties, company_cards
+from app_vacancy.search import SearchPaginator, build_match_query, search_vacancies
+
+SALARY_STEPS = (50000, 100000, 150000, 200000, 300000)
+COMPANY_FACET_SIZE = 15
+
+LIST_FILTERS = {
+    'specialty': 'specialty__code__in',
+    'company': 'company_id__in',
+    'location': 'company__location__in',
+}
+RANGE_FILTERS = {
+    'salary_min': 'salary_max__gte',
+    'salary_max': 'salary_min__lte',
+}
+NUMERIC_FILTERS = {'company', 'salary_min', 'salary_max'}
+
+
+def _valid(name, value):
+    return value.isdigit() if name in NUMERIC_FILTERS else bool(value)
+
+
+def parse_filters(params):
+    filters = {}
+    for name, lookup in LIST_FILTERS.items():
+        values = sorted(value for value in params.getlist(name) if _valid(name, value))
+        if values:
+            filters[lookup] = values
+    for name, lookup in RANGE_FILTERS.items():
+        value = params.get(name, '')
+        if _valid(name, value):
+            filters[lookup] = int(value)
+    return filters
+
+
+def base_vacancies(params):
+    query = params.get('search', '')
+    skill = params.get('skill')
+    # A query without a single word (only punctuation) matches nothing and has no rank to order by.
+    ranked = bool(build_match_query(query))
+    vacancies = search_vacancies(query) if query else Vacancy.objects.all()
+    if skill:
+        vacancies = vacancies.filter(skill_tags__name=skill)
+    return vacancies, SearchPaginator if ranked else KeysetPaginator
+
+
+def filter_vacancies(vacancies, params):
+    return vacancies.filter(**parse_filters(params))
+
+
+def salary_step():
+    steps = reversed(list(enumerate(SALARY_STEPS, start=1)))
+    return Case(
+        *[When(salary_max__gte=step, then=Value(index)) for index, step in steps],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _fold(rows):
+    counts = {'total': 0, 'specialty': Counter(), 'company': Counter(), 'salary': [0] * len(SALARY_STEPS)}
+    for specialty_id, company_id, step, total in rows:
+        counts['total'] += total
+        counts['specialty'][specialty_id] += total
+        counts['company'][company_id] += total
+        for index in range(step):
+            counts['salary'][index] += total
+    return counts
+
+
+def _ranked(choices, limit=None):
+    return sorted(choices, key=lambda choice: -choice[2])[:limit]
+
+
+def compute_facets(params):
+    vacancies, _ = base_vacancies(params)
+    rows = (
+        filter_vacancies(vacancies, params)
+        .order_by()
+        .annotate(step=salary_step())
+        .values_list('specialty_id', 'company_id', 'step')
+        .annotate(total=Count('id'))
+    )
+    counts = _fold(rows)
+    specialties = [specialty for specialty in all_specialties() if specialty.pk in counts['specialty']]
+    companies = company_cards(counts['company']).values()
+    locations = Counter()
+    for company in companies:
+        locations[company.location] += counts['company'][company.pk]
+    return {
+        'total': counts['total'],
+        'specialty': _ranked((item.code, item.title, counts['specialty'][item.pk]) for item in specialties),
+        'company': _ranked(
+            ((item.pk, item.name, counts['company'][item.pk]) for item in companies), COMPANY_FACET_SIZE
+        ),
+        'location': _ranked((location, location, count) for location, count in locations.items()),
+        'salary': [(str(step), f'от {step:,}'.replace(',', ' '), count)
+                   for step, count in zip(SALARY_STEPS, counts['salary']) if count],
+    }
+
+
+def facet_counts(params):
+    key = make_key('facets', params.get('search'), params.get('skill'), sorted(parse_filters(params).items()))
+    return get_or_compute(CATALOG, key, lambda: compute_facets(params))
+
+
+def facet_choices(counts, params):
+    choices = {}
+    for facet in ('specialty', 'location', 'company'):
+        selected = set(params.getlist(facet))
+        choices[facet] = [
+            {'value': value, 'label': label, 'count': count, 'selected': str(value) in selected}
+            for value, label, count in counts[facet]
+        ]
+    choices['salary'] = [
+        {'value': value, 'label': label, 'count': count, 'selected': value == params.get('salary_min')}
+        for value, label, count in counts['salary']
+    ]
+    return choices
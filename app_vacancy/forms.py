@@ -3,8 +3,42 @@ from crispy_forms.layout import Layout, Row, Column, Submit
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
 
 from app_vacancy.models import Application, Company, Vacancy, Resume
+from app_vacancy.reference import all_specialties, specialty_by_id
+
+
+class SpecialtyChoiceIterator(ModelChoiceIterator):
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for specialty in all_specialties():
+            yield self.choice(specialty)
+
+    def __len__(self):
+        return len(all_specialties()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(all_specialties())
+
+
+class SpecialtyChoiceField(forms.ModelChoiceField):
+    # Options and validation come from the specialties the worker keeps in memory, not a query per form.
+    iterator = SpecialtyChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            specialty = specialty_by_id(int(value))
+        except (TypeError, ValueError):
+            specialty = None
+        if specialty is None:
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+        return specialty
 
 
 class RegisterUserForm(UserCreationForm):
@@ -80,6 +114,7 @@ class MyCompanyVacanciesCreateEditForm(forms.ModelForm):
     class Meta:
         model = Vacancy
         exclude = ('company', 'published_at')
+        field_classes = {'specialty': SpecialtyChoiceField}
         labels = {
             'title': 'Название вакансии',
             'specialty': 'Специализация',
@@ -137,6 +172,7 @@ class MyResumeForm(forms.ModelForm):
     class Meta:
         model = Resume
         exclude = ('user',)
+        field_classes = {'specialty': SpecialtyChoiceField}
         labels = {
             'name': 'Имя',
             'surname': 'Фамилия',
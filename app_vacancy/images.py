@@ -0,0 +1,98 @@
+import io
+import logging
+import posixpath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from app_vacancy.cache import make_key
+from app_vacancy.models import VARIANTS_FAILED, VARIANTS_PENDING, VARIANTS_READY, Blob
+from app_vacancy.storage import blob_storage
+
+logger = logging.getLogger(__name__)
+
+SIZES = {
+    'card': (130, 80),
+    'icon': (80, 80),
+    'logo': (150, 150),
+}
+WEBP = 'webp'
+# Whether a name has its variants is cached per name; the worker overwrites the entry when it is done.
+READY_TIMEOUT = 60 * 60
+
+
+def variant_name(name, size, extension=None):
+    root, original_extension = posixpath.splitext(name)
+    return f'{root}-{size}.{extension or original_extension.lstrip(".").lower()}'
+
+
+def image_format(extension):
+    # Pillow's own table covers every spelling it reads, such as jpe, jfif or tif.
+    found = Image.registered_extensions().get(f'.{extension}')
+    if found is None:
+        raise ValueError(f'No image format for .{extension} files')
+    return found
+
+
+def render_variant(image, size, extension):
+    variant = image.copy()
+    variant.thumbnail(SIZES[size])
+    if image_format(extension) == 'JPEG':
+        variant = variant.convert('RGB')
+    output = io.BytesIO()
+    variant.save(output, image_format(extension))
+    return ContentFile(output.getvalue())
+
+
+def generate_variants(name):
+    with blob_storage.open(name) as original:
+        image = Image.open(original)
+        image.load()
+    extension = posixpath.splitext(name)[1].lstrip('.').lower()
+    for size in SIZES:
+        for variant_extension in (extension, WEBP):
+            blob_storage.save_variant(
+                variant_name(name, size, variant_extension), render_variant(image, size, variant_extension),
+            )
+
+
+def delete_variants(name):
+    extension = posixpath.splitext(name)[1].lstrip('.').lower()
+    for size in SIZES:
+        for variant_extension in (extension, WEBP):
+            blob_storage.delete(variant_name(name, size, variant_extension))
+
+
+def _ready_key(name):
+    return f'images:ready:{make_key(name)}'
+
+
+def process_pending(limit=100):
+    processed = 0
+    states = {}
+    for blob in Blob.objects.filter(variants=VARIANTS_PENDING, references__gt=0)[:limit]:
+        try:
+            generate_variants(blob.name)
+            blob.variants = VARIANTS_READY
+        except Exception:
+            # Whatever goes wrong with one file, the worker marks it and moves on instead of retrying it forever.
+            logger.exception('Could not generate image variants for %s', blob.name)
+            blob.variants = VARIANTS_FAILED
+        Blob.objects.filter(pk=blob.pk).update(variants=blob.variants)
+        states[_ready_key(blob.name)] = blob.variants == VARIANTS_READY
+        processed += 1
+    cache.set_many(states, READY_TIMEOUT)
+    return processed
+
+
+def ready_among(names):
+    # Which of these names have variants: cached per name, with the misses read in one query.
+    keys = {_ready_key(name): name for name in set(names)}
+    known = {keys[key]: ready for key, ready in cache.get_many(keys).items()}
+    missing = set(keys.values()) - known.keys()
+    if missing:
+        ready = set(Blob.objects.filter(name__in=missing, variants=VARIANTS_READY).values_list('name', flat=True))
+        cache.set_many({_ready_key(name): name in ready for name in missing}, READY_TIMEOUT)
+        known.update((name, name in ready) for name in missing)
+    return {name for name, ready in known.items() if ready}
@@ -0,0 +1,46 @@
+from collections import Counter
+
+from app_vacancy.counters import applications_read
+from app_vacancy.models import APPLICATION_STATUSES, Application
+from app_vacancy.transactions import atomic_write
+
+STATUS_LABELS = dict(APPLICATION_STATUSES)
+
+
+def filter_applications(applications, params):
+    status = params.get('status')
+    if status in STATUS_LABELS:
+        applications = applications.filter(status=status)
+    if params.get('unread'):
+        applications = applications.filter(is_read=False)
+    vacancy = params.get('vacancy', '')
+    if vacancy.isdigit():
+        applications = applications.filter(vacancy_id=vacancy)
+    return applications
+
+
+def unread_ids(applications):
+    return [application.pk for application in applications if not application.is_read]
+
+
+def mark_read(owner, ids):
+    # The ids come from the inbox form; only the owner's own applications are touched.
+    ids = [pk for pk in ids if pk.isdigit()]
+    if ids and owner.company_id is not None:
+        mark_ids_read(owner.company_id, ids)
+
+
+@atomic_write
+def mark_ids_read(company_id, ids):
+    unread = Application.objects.select_for_update().filter(pk__in=ids, company_id=company_id, is_read=False)
+    counts = Counter(unread.values_list('vacancy_id', flat=True))
+    Application.objects.filter(pk__in=ids, company_id=company_id).update(is_read=True)
+    applications_read(counts)
+
+
+@atomic_write
+def set_status(owner, application_id, status):
+    # company_id is None for users without a company, which would match applications that have none.
+    if status not in STATUS_LABELS or owner.company_id is None:
+        return False
+    return bool(Application.objects.filter(pk=application_id, company_id=owner.company_id).update(status=status))
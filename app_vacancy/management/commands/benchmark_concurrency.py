@@ -0,0 +1,81 @@
+import os
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.urls import reverse
+
+from app_vacancy import benchmark
+from app_vacancy.counters import reconcile_applications
+from app_vacancy.management.commands.compare_servers import free_port, serve
+from app_vacancy.models import Application, Vacancy
+
+APPLICANT = 'Нагрузочный тест'
+
+
+def application_data(number):
+    return {
+        'written_username': APPLICANT,
+        'written_phone': f'+7 900 000-{number % 10000:04d}',
+        'written_cover_letter': 'Отклик отправлен benchmark_concurrency',
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Read vacancy pages and submit applications to them at the same time through gunicorn workers, '
+        'and report latency and errors for readers and writers. A "database is locked" shows up as an error. '
+        'The submitted applications are deleted afterwards unless --keep is given'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server; by default gunicorn is started')
+        parser.add_argument('--workers', type=int, default=4, help='Gunicorn worker processes')
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent reading clients')
+        parser.add_argument('--writers', type=int, default=4, help='Concurrent clients submitting applications')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per client')
+        parser.add_argument('--vacancies', type=int, default=20, help='Vacancies the clients spread over')
+        parser.add_argument('--keep', action='store_true', help='Keep the submitted applications')
+
+    def handle(self, *args, **options):
+        paths = [reverse('vacancy', args=[pk]) for pk in
+                 Vacancy.objects.order_by('-id').values_list('id', flat=True)[:options['vacancies']]]
+        if not paths:
+            raise CommandError('The catalog is empty, run generate_data or load_seed first')
+        last_id = Application.objects.aggregate(last=Max('id'))['last'] or 0
+        try:
+            results = self.run(paths, options)
+        finally:
+            if not options['keep']:
+                Application.objects.filter(id__gt=last_id, written_username=APPLICANT).delete()
+                reconcile_applications()
+        self.report(results)
+
+    def run(self, paths, options):
+        read, write = benchmark.Result('read'), benchmark.Result('write')
+        workloads = (
+            [(read, lambda target, number: target.get(paths[number % len(paths)]))] * options['readers']
+            + [(write, lambda target, number: target.post(paths[number % len(paths)], application_data(number)))]
+            * options['writers']
+        )
+        with self.server(options) as url:
+            benchmark.run_together(lambda: benchmark.HttpTarget(url), workloads, options['requests'])
+        return read, write
+
+    def server(self, options):
+        if options['url']:
+            return nullcontext(options['url'])
+        port = free_port()
+        command = ['gunicorn', 'vacancies.wsgi', '--workers', str(options['workers']), '--bind', f'127.0.0.1:{port}']
+        return serve(command, port, {**os.environ, 'ASYNC_VIEWS': '0'})
+
+    def report(self, results):
+        self.stdout.write(f'{"clients":<10}{"req":>6}{"err":>5}{"rps":>9}{"p50":>9}{"p95":>9}{"p99":>9}')
+        for result in results:
+            summary = result.summary()
+            self.stdout.write(
+                f'{result.name:<10}{summary["requests"]:>6}{summary["errors"]:>5}{summary["rps"]:>9}'
+                f'{summary["p50_ms"]:>9}{summary["p95_ms"]:>9}{summary["p99_ms"]:>9}'
+            )
+        if any(result.errors for result in results):
+            raise CommandError('Some requests failed')
@@ -0,0 +1,72 @@
+import time
+from statistics import mean
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.http import QueryDict
+
+from app_vacancy.benchmark import percentile
+from app_vacancy.facets import base_vacancies, compute_facets, filter_vacancies
+from app_vacancy.models import Company, Specialty, Vacancy
+
+
+def scenarios():
+    specialty = Specialty.objects.order_by('-vacancies_count').values_list('code', flat=True).first()
+    company = Company.objects.order_by('-vacancies_count').values_list('id', flat=True).first()
+    location = (
+        Company.objects.values('location').annotate(total=Count('id')).order_by('-total')
+        .values_list('location', flat=True).first()
+    )
+    if specialty is None or company is None:
+        raise CommandError('The catalog is empty, run generate_data or load_seed first')
+    return {
+        'everything': '',
+        'specialty': f'specialty={specialty}',
+        'location': f'location={location}',
+        'company': f'company={company}',
+        'salary': 'salary_min=150000',
+        'specialty+salary': f'specialty={specialty}&salary_min=100000&salary_max=200000',
+        'location+specialty': f'location={location}&specialty={specialty}',
+        'search': 'search=Python',
+        'search+location': f'search=Python&location={location}',
+        'skill+salary': 'skill=Git&salary_min=100000',
+    }
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def first_page(params):
+    vacancies, paginator_class = base_vacancies(params)
+    return paginator_class(filter_vacancies(vacancies, params).select_related('specialty')).page(params)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the uncached facet aggregate and the first result page for typical filter combinations '
+        'on the current catalog (generate a large one with generate_data first)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{Vacancy.objects.count()} vacancies')
+        self.stdout.write(f'{"filters":<22}{"matches":>9}{"page p50":>10}{"page p95":>10}{"facet p50":>11}'
+                          f'{"facet p95":>11}{"facet avg":>11}')
+        for name, query in scenarios().items():
+            params = QueryDict(query)
+            matches = compute_facets(params)['total']
+            page = timed(lambda: first_page(params), options['repeat'])
+            facets = timed(lambda: compute_facets(params), options['repeat'])
+            self.stdout.write(
+                f'{name:<22}{matches:>9}{percentile(page, 0.5) * 1000:>10.1f}{percentile(page, 0.95) * 1000:>10.1f}'
+                f'{percentile(facets, 0.5) * 1000:>11.1f}{percentile(facets, 0.95) * 1000:>11.1f}'
+                f'{mean(facets) * 1000:>11.1f}'
+            )
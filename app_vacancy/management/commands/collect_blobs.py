@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_vacancy.blobs import adopt_legacy_files, collect_garbage, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recount references to stored logos and pictures and delete blobs nothing points to'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--adopt', action='store_true',
+            help='Move files saved before content-addressed storage under their digest, merging duplicates',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['adopt']:
+                self.stdout.write(f'{adopt_legacy_files()} files moved under their digest')
+            self.stdout.write(f'{reconcile()} referenced blobs')
+        for name in collect_garbage():
+            self.stdout.write(f'deleted {name}')
+        self.stdout.write(self.style.SUCCESS('Blob storage collected'))
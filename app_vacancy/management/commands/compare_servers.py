@@ -0,0 +1,86 @@
+import os
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_vacancy import benchmark
+from app_vacancy.management.commands.loadtest import anonymous_routes
+
+READ_ROUTES = ('main', 'search', 'all_vacancies', 'vacancies_by_specialty', 'company', 'vacancy')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'Server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Server did not start listening on port {port}')
+
+
+@contextmanager
+def serve(command, port, env):
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(port, process)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the public read-only pages served by gunicorn with the sync WSGI views '
+        'against uvicorn with the async views from vacancies/asgi.py'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes for each server')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per gunicorn worker')
+
+    def servers(self, options):
+        workers = str(options['workers'])
+        yield 'wsgi', ['gunicorn', 'vacancies.wsgi', '--workers', workers,
+                       '--threads', str(options['threads'])], {'ASYNC_VIEWS': '0'}
+        yield 'asgi', ['uvicorn', 'vacancies.asgi:application', '--workers', workers,
+                       '--no-access-log'], {'ASYNC_VIEWS': '1'}
+
+    def handle(self, *args, **options):
+        routes = {name: url for name, url in anonymous_routes().items() if name in READ_ROUTES}
+        results = {}
+        for server, command, extra_env in self.servers(options):
+            port = free_port()
+            bind = ['--bind', f'127.0.0.1:{port}'] if server == 'wsgi' else ['--port', str(port)]
+            with serve(command + bind, port, {**os.environ, **extra_env}) as url:
+                for name, path in routes.items():
+                    result = benchmark.run_route(lambda: benchmark.HttpTarget(url), name, path,
+                                                 options['requests'], options['concurrency'])
+                    results[server, name] = result.summary()
+        self.report(routes, results)
+
+    def report(self, routes, results):
+        self.stdout.write(
+            f'{"route":<28}{"wsgi rps":>10}{"asgi rps":>10}{"wsgi p95":>10}{"asgi p95":>10}{"errors":>8}'
+        )
+        for name in routes:
+            wsgi, asgi = results['wsgi', name], results['asgi', name]
+            self.stdout.write(
+                f'{name:<28}{wsgi["rps"]:>10}{asgi["rps"]:>10}{wsgi["p95_ms"]:>10}{asgi["p95_ms"]:>10}'
+                f'{wsgi["errors"] + asgi["errors"]:>8}'
+            )
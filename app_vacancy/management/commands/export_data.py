@@ -0,0 +1,41 @@
+import gzip
+import lzma
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_vacancy.export import EXPORTS, FORMATS, export_lines, export_queryset
+
+COMPRESSORS = {
+    'gz': gzip.open,
+    'xz': lzma.open,
+}
+
+
+class Command(BaseCommand):
+    help = 'Stream applications, vacancies or companies into a compressed CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--compress', choices=sorted(COMPRESSORS), default='gz')
+        parser.add_argument('--company', type=int, help='Only export applications sent to this company')
+        parser.add_argument('--output', help='Defaults to exports/<name>-<date>.<format>.<compress>')
+
+    def handle(self, *args, **options):
+        name, fmt, compress = options['name'], options['fmt'], options['compress']
+        queryset = export_queryset(name)
+        if options['company']:
+            if name != 'applications':
+                raise CommandError('--company only applies to applications')
+            queryset = queryset.filter(company_id=options['company'])
+
+        path = Path(options['output'] or Path('exports') / f'{name}-{date.today().isoformat()}.{fmt}.{compress}')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = 0
+        with COMPRESSORS[compress](path, 'wt', encoding='utf-8', newline='') as output:
+            for line in export_lines(queryset, name, fmt):
+                output.write(line)
+                lines += 1
+        self.stdout.write(self.style.SUCCESS(f'{lines} lines written to {path} ({path.stat().st_size} bytes)'))
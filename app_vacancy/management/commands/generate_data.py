@@ -0,0 +1,180 @@
+import random
+from datetime import date, timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from app_vacancy import blobs
+from app_vacancy.cache import invalidate_catalog
+from app_vacancy.counters import reconcile_all
+from app_vacancy.forms import GRADES, STATUSES
+from app_vacancy.models import APPLICATION_NEW, APPLICATION_STATUSES, Application, Resume, Specialty, Vacancy
+from app_vacancy.search import rebuild_index
+from app_vacancy.seed import BATCH_SIZE, load_companies, load_specialties, load_vacancies
+from data import specialties
+
+ROLES = {
+    'frontend': ('Фронтенд-разработчик', 'Верстальщик', 'React-разработчик', 'Vue-разработчик'),
+    'backend': ('Разработчик на Python', 'Java-разработчик', 'Go-разработчик', 'PHP-программист'),
+    'gamedev': ('Unity-разработчик', 'Геймдизайнер', 'C++ программист игр', '3D-художник'),
+    'devops': ('DevOps-инженер', 'Системный администратор', 'SRE-инженер'),
+    'design': ('UI/UX дизайнер', 'Веб-дизайнер', 'Продуктовый дизайнер'),
+    'products': ('Продакт-менеджер', 'Продуктовый аналитик', 'Бизнес-аналитик'),
+    'management': ('Проектный менеджер', 'Тимлид', 'Scrum-мастер'),
+    'testing': ('Тестировщик', 'QA-инженер', 'Автотестировщик на Python'),
+}
+
+SKILLS = {
+    'frontend': ('JavaScript', 'TypeScript', 'React', 'Vue', 'HTML', 'CSS', 'Webpack', 'Git', 'Redux'),
+    'backend': ('Python', 'Django', 'PostgreSQL', 'Java', 'Spring', 'Go', 'Docker', 'Redis', 'Git', 'Kafka'),
+    'gamedev': ('Unity', 'C#', 'C++', 'Unreal Engine', 'Blender', 'OpenGL', 'Git'),
+    'devops': ('Linux', 'Docker', 'Kubernetes', 'Ansible', 'Terraform', 'Nginx', 'Prometheus', 'CI/CD'),
+    'design': ('Figma', 'Sketch', 'Photoshop', 'Illustrator', 'Прототипирование', 'UX-исследования'),
+    'products': ('SQL', 'Jira', 'Аналитика', 'A/B тесты', 'Excel', 'Tableau', 'Agile'),
+    'management': ('Agile', 'Scrum', 'Jira', 'Confluence', 'Управление рисками', 'Коммуникации'),
+    'testing': ('Selenium', 'Python', 'pytest', 'Postman', 'SQL', 'Jira', 'Тест-дизайн'),
+}
+
+GRADE_SALARIES = (('Junior', 60000), ('Middle', 120000), ('Senior', 200000))
+
+CITIES = ('Москва', 'Санкт-Петербург', 'Новосибирск', 'Екатеринбург', 'Казань', 'Нижний Новгород', 'Удаленно')
+SYLLABLES = ('ра', 'ко', 'ми', 'тех', 'софт', 'дата', 'лаб', 'нет', 'вер', 'про', 'гор', 'сис')
+LOGOS = tuple(f'logo{number}.png' for number in range(1, 10))
+
+SENTENCES = (
+    'Офис в центре города, чай и печеньки всегда в наличии.',
+    'Возможен свободный график и удаленная работа.',
+    'Ищем человека, который умеет доводить задачи до конца.',
+    'Официальное оформление, ДМС и оплачиваемое обучение.',
+    'Работаем по Scrum, спринты по две недели.',
+    'Большая кодовая база и интересные задачи под высокой нагрузкой.',
+    'Команда из двадцати человек и наставник на испытательный срок.',
+)
+
+
+def pick_skills(rng, specialty):
+    chosen = []
+    for skill in rng.sample(SKILLS[specialty], rng.randint(3, 6)):
+        if len(', '.join(chosen + [skill])) > 75:
+            break
+        chosen.append(skill)
+    return ', '.join(chosen)
+
+
+def text(rng, sentences=3):
+    return ' '.join(rng.choice(SENTENCES) for _ in range(sentences))
+
+
+def zipf_weights(size):
+    return [1 / (rank + 1) for rank in range(size)]
+
+
+def company_rows(rng, count):
+    for number in range(count):
+        name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        yield {
+            'id': f'gen-{number}',
+            'title': name,
+            'location': rng.choice(CITIES),
+            'logo': rng.choice(LOGOS),
+            'description': text(rng),
+            'employee_count': int(rng.lognormvariate(3, 1.2)) + 1,
+        }
+
+
+def job_rows(rng, count, companies_count):
+    codes = [specialty['code'] for specialty in specialties]
+    company_weights = zipf_weights(companies_count)
+    start = date.today() - timedelta(days=365)
+    for number in range(count):
+        code = rng.choice(codes)
+        grade, base_salary = rng.choice(GRADE_SALARIES)
+        salary_from = round(base_salary * rng.lognormvariate(0, 0.25), -3)
+        yield {
+            'id': f'gen-{number}',
+            'title': rng.choice(ROLES[code])[:29],
+            'specialty': code,
+            'company': f'gen-{rng.choices(range(companies_count), company_weights)[0]}',
+            'salary_from': int(salary_from),
+            'salary_to': int(round(salary_from * rng.uniform(1.2, 1.8), -3)),
+            'posted': (start + timedelta(days=rng.randint(0, 365))).isoformat(),
+            'skills': pick_skills(rng, code),
+            'description': f'<p>{grade}. {text(rng, 4)}</p>',
+        }
+
+
+def applications(rng, count, vacancies):
+    weights = zipf_weights(len(vacancies))
+    statuses = [value for value, _ in APPLICATION_STATUSES]
+    now = timezone.now()
+    for vacancy_id, company_id in rng.choices(vacancies, weights, k=count):
+        is_read = rng.random() < 0.7
+        yield Application(
+            written_username=f'{rng.choice(("Иванов", "Петрова", "Сидоров", "Кузнецова"))} {rng.randint(1, 999)}',
+            written_phone=f'+7 9{rng.randint(10, 99)} {rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+            written_cover_letter=text(rng, 2),
+            vacancy_id=vacancy_id,
+            company_id=company_id,
+            created=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            is_read=is_read,
+            status=rng.choice(statuses) if is_read else APPLICATION_NEW,
+        )
+
+
+def resumes(rng, count, specialties):
+    statuses = [value for value, _ in STATUSES if value]
+    grades = [value for value, _ in GRADES if value]
+    for number in range(count):
+        specialty_id, code = rng.choice(specialties)
+        yield Resume(
+            name=rng.choice(('Иван', 'Мария', 'Алексей', 'Анна', 'Дмитрий', 'Ольга')),
+            surname=rng.choice(('Иванов', 'Петрова', 'Смирнов', 'Соколова', 'Попов')),
+            status=rng.choice(statuses),
+            salary=int(round(rng.lognormvariate(11.5, 0.5), -3)),
+            specialty_id=specialty_id,
+            grade=rng.choice(grades),
+            education=rng.choice(('МГУ, прикладная математика', 'СПбГУ, информатика', 'Самоучка', 'НГТУ, АСУ')),
+            experience=f'Работал с {pick_skills(rng, code)}. {text(rng, 2)}',
+            portfolio=f'https://github.com/candidate{number}',
+        )
+
+
+def bulk_insert(model, objects):
+    objects = iter(objects)
+    batch = list(islice(objects, BATCH_SIZE))
+    while batch:
+        model.objects.bulk_create(batch)
+        batch = list(islice(objects, BATCH_SIZE))
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic catalog of companies, vacancies, applications and resumes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1000)
+        parser.add_argument('--vacancies', type=int, default=100000)
+        parser.add_argument('--applications', type=int, default=200000)
+        parser.add_argument('--resumes', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            load_specialties(specialties)
+            load_companies(company_rows(rng, options['companies']))
+            created, updated = load_vacancies(job_rows(rng, options['vacancies'], options['companies']))
+            self.stdout.write(f'vacancies: {created} created, {updated} updated')
+
+            vacancies = list(Vacancy.objects.filter(external_id__startswith='gen-').values_list('id', 'company_id'))
+            bulk_insert(Application, applications(rng, options['applications'], vacancies))
+            specialty_codes = list(Specialty.objects.filter(code__in=SKILLS).values_list('id', 'code'))
+            bulk_insert(Resume, resumes(rng, options['resumes'], specialty_codes))
+            self.stdout.write(f'applications: {options["applications"]}, resumes: {options["resumes"]}')
+
+            rebuild_index()
+            reconcile_all()
+            blobs.reconcile()
+        invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS('Synthetic data generated'))
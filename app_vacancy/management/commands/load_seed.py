@@ -0,0 +1,77 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app_vacancy import blobs
+from app_vacancy.cache import invalidate_catalog
+from app_vacancy.counters import reconcile_all
+from app_vacancy.search import rebuild_index
+from app_vacancy.seed import BATCH_SIZE, load_companies, load_specialties, load_vacancies
+
+ENTITIES = ('specialties', 'companies', 'jobs')
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as json_file:
+        content = json.load(json_file)
+    if isinstance(content, list):
+        return {path.stem: content}
+    return content
+
+
+def read_sources(paths):
+    sources = {}
+    for path in map(Path, paths):
+        if path.suffix == '.csv':
+            sources[path.stem] = read_csv(path)
+        elif path.suffix == '.json':
+            sources.update(read_json(path))
+        else:
+            raise CommandError(f'Unsupported file type: {path}')
+    unknown = sources.keys() - set(ENTITIES)
+    if unknown:
+        raise CommandError(f'Unknown entities: {", ".join(sorted(unknown))}. Expected {", ".join(ENTITIES)}')
+    return sources
+
+
+def data_module_sources():
+    import data
+    return {entity: getattr(data, entity) for entity in ENTITIES}
+
+
+class Command(BaseCommand):
+    help = 'Load specialties, companies and vacancies from data.py or JSON/CSV files of the same shape'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='CSV or JSON files named after their entity (specialties, companies, jobs), '
+                 'or a JSON object holding several of them. Defaults to data.py',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sources = read_sources(options['paths']) if options['paths'] else data_module_sources()
+        loaders = {
+            'specialties': load_specialties,
+            'companies': load_companies,
+            'jobs': lambda rows: load_vacancies(rows, options['batch_size']),
+        }
+        with transaction.atomic():
+            for entity in ENTITIES:
+                if entity in sources:
+                    created, updated = loaders[entity](sources[entity])
+                    self.stdout.write(f'{entity}: {created} created, {updated} updated')
+            rebuild_index()
+            reconcile_all()
+            blobs.reconcile()
+        invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS('Seed data loaded'))
@@ -0,0 +1,153 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from app_vacancy import benchmark
+from app_vacancy.models import Company, Specialty, Vacancy
+
+PASSWORD_ENV = 'LOADTEST_PASSWORD'
+
+
+def create_employer(credentials):
+    # Only with --create-user: a real account and a company handed over to it, so run it against a copy of the data.
+    user = get_user_model().objects.create_user(**credentials)
+    company = Company.objects.filter(owner__isnull=True).order_by('-vacancies_count').first()
+    if company is None:
+        raise CommandError('No company without an owner to hand to the load test employer')
+    company.owner = user
+    company.save(update_fields=['owner'])
+    return user
+
+
+def find_employer(credentials, create):
+    user = get_user_model().objects.filter(username=credentials['username']).first()
+    if user is None:
+        if not create:
+            raise CommandError(f'No user {credentials["username"]!r}, pass --create-user to create one')
+        return create_employer(credentials)
+    if not user.check_password(credentials['password']):
+        raise CommandError(f'Wrong password for {credentials["username"]!r}')
+    if not Company.objects.filter(owner=user).exists():
+        raise CommandError(f'{credentials["username"]!r} owns no company, the employer routes need one')
+    return user
+
+
+def anonymous_routes():
+    vacancy = Vacancy.objects.order_by('-id').values('id', 'company_id').first()
+    if vacancy is None:
+        raise CommandError('The catalog is empty, run generate_data or load_seed first')
+    specialty = Specialty.objects.order_by('-vacancies_count').values_list('code', flat=True).first()
+    return {
+        'main': reverse('main'),
+        'main_search': reverse('main') + '?search=Python',
+        'search': reverse('search') + '?search=Python',
+        'search_skill': reverse('search') + '?skill=Git',
+        'search_facets': reverse('search') + f'?specialty={specialty}&salary_min=100000',
+        'all_vacancies': reverse('all_vacancies'),
+        'vacancies_by_specialty': reverse('vacancies_by_specialty', args=[specialty]),
+        'company': reverse('company', args=[vacancy['company_id']]),
+        'vacancy': reverse('vacancy', args=[vacancy['id']]),
+        'send_request': reverse('send_request', args=[vacancy['id']]),
+        'login': reverse('login'),
+        'register': reverse('register'),
+        'api_vacancies': reverse('api_vacancies'),
+        'api_search': reverse('api_vacancies') + '?search=Python&facets=1',
+        'api_vacancies_by_specialty': reverse('api_vacancies_by_specialty', args=[specialty]),
+        'api_vacancy': reverse('api_vacancy', args=[vacancy['id']]),
+        'api_companies': reverse('api_companies'),
+        'api_company': reverse('api_company', args=[vacancy['company_id']]),
+        'api_company_vacancies': reverse('api_company_vacancies', args=[vacancy['company_id']]),
+        'api_specialties': reverse('api_specialties'),
+        'metrics': reverse('metrics'),
+    }
+
+
+def employer_routes(user):
+    vacancy_id = Vacancy.objects.filter(company__owner=user).values_list('id', flat=True).first()
+    routes = {
+        name: reverse(name) for name in (
+            'my_company', 'company_start', 'company_create', 'my_vacancies', 'my_vacancies_start',
+            'my_vacancies_create', 'my_applications', 'resume_search', 'resume', 'resume_start', 'resume_create',
+        )
+    }
+    routes['resume_search_query'] = reverse('resume_search') + '?search=Python'
+    routes['export_applications'] = reverse('export_applications', args=['csv'])
+    if vacancy_id:
+        routes['my_one_vacancy'] = reverse('my_one_vacancy', args=[vacancy_id])
+    return routes
+
+
+class Command(BaseCommand):
+    help = (
+        'GET the pages and API routes of vacancies/urls.py as an anonymous visitor and as a logged-in employer, '
+        'report p50/p95/p99 latency, throughput and queries per request, and compare against a stored baseline. '
+        'Left out: the admin, logout, the staff-only catalog export and the POST-only application status. '
+        f'The employer routes log in as --username with --password or ${PASSWORD_ENV}, and are skipped without one'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server; by default requests go through the '
+                                          'WSGI handler in-process')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--routes', nargs='*', help='Only run these route names')
+        parser.add_argument('--baseline', default=str(benchmark.DEFAULT_BASELINE))
+        parser.add_argument('--save-baseline', action='store_true')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown against baseline')
+        parser.add_argument('--username', default='loadtest', help='Employer to log in as')
+        parser.add_argument('--password', help=f'Password of the employer; defaults to ${PASSWORD_ENV}')
+        parser.add_argument('--create-user', action='store_true',
+                            help='Create the employer with that password and hand them an ownerless company '
+                                 'if they do not exist yet. Writes to the database: use a throwaway copy')
+
+    def target_factory(self, options, credentials=None):
+        if options['url']:
+            return lambda: benchmark.HttpTarget(options['url'], credentials)
+        return lambda: benchmark.InProcessTarget(credentials)
+
+    def scenarios(self, options):
+        # The employer is checked first, so a missing account fails before any route runs.
+        password = options['password'] or os.environ.get(PASSWORD_ENV)
+        credentials = {'username': options['username'], 'password': password}
+        employer = find_employer(credentials, options['create_user']) if password else None
+        yield self.target_factory(options), anonymous_routes()
+        if employer is None:
+            self.stdout.write(f'No employer password given (--password or ${PASSWORD_ENV}), skipping employer routes')
+            return
+        yield self.target_factory(options, credentials), employer_routes(employer)
+
+    def handle(self, *args, **options):
+        results = {}
+        self.stdout.write(f'{"route":<28}{"req":>6}{"err":>5}{"rps":>9}{"p50":>9}{"p95":>9}{"p99":>9}{"sql":>6}')
+        for make_target, routes in self.scenarios(options):
+            for name, url in routes.items():
+                if options['routes'] and name not in options['routes']:
+                    continue
+                result = benchmark.run_route(make_target, name, url, options['requests'], options['concurrency'])
+                results[name] = summary = result.summary()
+                self.stdout.write(
+                    f'{name:<28}{summary["requests"]:>6}{summary["errors"]:>5}{summary["rps"]:>9}'
+                    f'{summary["p50_ms"]:>9}{summary["p95_ms"]:>9}{summary["p99_ms"]:>9}'
+                    f'{summary["queries"] if summary["queries"] is not None else "-":>6}'
+                )
+        self.report(results, options)
+
+    def report(self, results, options):
+        if options['save_baseline']:
+            benchmark.save_baseline(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {options["baseline"]}'))
+        else:
+            self.compare(results, options)
+
+    def compare(self, results, options):
+        try:
+            regressions = benchmark.compare(results, options['baseline'], options['tolerance'])
+        except FileNotFoundError:
+            self.stdout.write(f'No baseline at {options["baseline"]}, run with --save-baseline to create one')
+            return
+        for name, before, after in regressions:
+            self.stdout.write(self.style.ERROR(f'{name}: {before} -> {after}'))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app_vacancy.images import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and WebP variants for uploaded logos and specialty pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new uploads')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+        parser.add_argument('--batch', type=int, default=100)
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending(options['batch'])
+            if processed:
+                self.stdout.write(f'{processed} images processed')
+            if not options['loop']:
+                break
+            if processed < options['batch']:
+                time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_vacancy.models import Resume, Vacancy
+from app_vacancy.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over vacancies and resumes'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_index()
+        indexed = f'Indexed {Vacancy.objects.count()} vacancies and {Resume.objects.count()} resumes'
+        self.stdout.write(self.style.SUCCESS(indexed))
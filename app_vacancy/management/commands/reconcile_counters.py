@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_vacancy.counters import reconcile_all
+
+
+class Command(BaseCommand):
+    help = 'Recount denormalized vacancy counters on companies, specialties and skills, and application counters'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            repaired = reconcile_all()
+        for name, rows in repaired.items():
+            self.stdout.write(f'{name}: {rows} drifted rows repaired')
+        self.stdout.write(self.style.SUCCESS('Counters are consistent'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app_vacancy.matching import rebuild_matches, refresh_stale
+
+
+class Command(BaseCommand):
+    help = 'Recompute the top matching resumes for vacancies and the top matching vacancies for resumes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every list instead of only stale ones')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for changed vacancies and resumes')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between polls with --loop')
+        parser.add_argument('--batch', type=int, default=1000, help='Stale vacancies and resumes taken per round')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            self.rebuild()
+        else:
+            self.refresh(options)
+
+    def rebuild(self):
+        started = time.perf_counter()
+        rebuild_matches()
+        self.stdout.write(self.style.SUCCESS(f'Matches rebuilt in {time.perf_counter() - started:.1f} s'))
+
+    def refresh(self, options):
+        while True:
+            stale, vacancies, resumes = refresh_stale(options['batch'])
+            if stale:
+                self.stdout.write(f'{stale} changed: {vacancies} vacancy lists and {resumes} resume lists refreshed')
+            if not options['loop']:
+                break
+            if stale < options['batch']:
+                time.sleep(options['interval'])
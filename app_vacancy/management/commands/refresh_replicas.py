@@ -0,0 +1,27 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app_vacancy.routers import refresh_replica
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the replica files listed in SQLITE_REPLICAS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep the replicas refreshed')
+        parser.add_argument('--interval', type=float, default=settings.REPLICA_PIN_SECONDS / 3,
+                            help='Seconds between refreshes with --loop')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICAS:
+            raise CommandError('No replicas configured, set SQLITE_REPLICAS')
+        while True:
+            for alias in settings.REPLICAS:
+                started = time.perf_counter()
+                refresh_replica(alias)
+                self.stdout.write(f'{alias} refreshed in {time.perf_counter() - started:.2f} s')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app_vacancy.similar import rebuild_similar, refresh_stale
+
+
+class Command(BaseCommand):
+    help = 'Recompute the similar vacancies shown on every vacancy page'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true', help='Rebuild every list and the stored corpus instead of only stale ones',
+        )
+        parser.add_argument('--loop', action='store_true', help='Keep polling for changed vacancies')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between polls with --loop')
+        parser.add_argument('--batch', type=int, default=1000, help='Stale vacancies taken per round')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            self.rebuild()
+        else:
+            self.refresh(options)
+
+    def rebuild(self):
+        started = time.perf_counter()
+        refreshed = rebuild_similar()
+        self.stdout.write(self.style.SUCCESS(f'{refreshed} lists rebuilt in {time.perf_counter() - started:.1f} s'))
+
+    def refresh(self, options):
+        while True:
+            stale, refreshed = refresh_stale(options['batch'])
+            if stale:
+                self.stdout.write(f'{stale} changed: {refreshed} lists refreshed')
+            if not options['loop']:
+                break
+            if stale < options['batch']:
+                time.sleep(options['interval'])
@@ -0,0 +1,326 @@
+import math
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from app_vacancy.models import Resume, ResumeMatch, Specialty, Vacancy, VacancyMatch
+from app_vacancy.search import RESUME_FTS_TABLE, build_match_query
+from app_vacancy.seed import batches
+from app_vacancy.skills import split_skills
+
+TOP_K = 20
+# Vacancies or resumes scored against the whole specialty at once; bounds the score matrix in memory.
+SCORE_BATCH = 256
+# Terms of the other side made dense at once while a batch is scored; bounds that slice the same way.
+TERM_BATCH = 256
+SKILLS_WEIGHT = 0.7
+SALARY_WEIGHT = 0.3
+# A candidate asking this share above salary_max, or below salary_min, scores zero on salary.
+SALARY_TOLERANCE = 0.5
+# Skills looked up in the resume search index with one query.
+MATCH_BATCH = 100
+DELETE_CHUNK = 500
+
+ALL = slice(None)
+
+
+def skill_terms(skills):
+    return {skill.lower() for skill in split_skills(skills)}
+
+
+def term_pattern(vocabulary):
+    alternatives = '|'.join(re.escape(term) for term in sorted(vocabulary, key=len, reverse=True))
+    return re.compile(rf'(?<!\w)(?:{alternatives})(?!\w)', re.IGNORECASE)
+
+
+def top_k(scores, k=TOP_K):
+    k = min(k, scores.shape[1])
+    if not k:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(best, order, axis=1)
+
+
+def expand(starts, ends):
+    # The concatenated ranges starts[i]:ends[i], without a Python loop.
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(len(offsets))
+
+
+class Rows:
+    # A sparse matrix in CSR arrays: row i holds data[indptr[i]:indptr[i + 1]] in the columns at the same
+    # positions of indices. Only a batch of rows at a time ever becomes dense.
+
+    def __init__(self, indptr, indices, data, width):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.width = width
+
+    @classmethod
+    def build(cls, rows, width):
+        # rows: one (columns, values) pair of lists per row.
+        indptr, indices, data = array('q', [0]), array('q'), array('f')
+        for columns, values in rows:
+            indices.extend(columns)
+            data.extend(values)
+            indptr.append(len(indices))
+        return cls(
+            np.frombuffer(indptr, dtype=np.int64), np.frombuffer(indices, dtype=np.int64),
+            np.frombuffer(data, dtype=np.float32), width,
+        )
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def transposed(self):
+        # The inverted index: per column, the rows that have it.
+        owners = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind='stable')
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=self.width))))
+        return Rows(indptr, owners[order], self.data[order], len(self))
+
+    def dense(self, positions):
+        starts, ends = self.indptr[positions], self.indptr[positions + 1]
+        entries = expand(starts, ends)
+        rows = np.zeros((len(positions), self.width), dtype=np.float32)
+        rows[np.repeat(np.arange(len(positions)), ends - starts), self.indices[entries]] = self.data[entries]
+        return rows
+
+    def product(self, positions, other):
+        # rows[positions] @ other, with other given by its rows: of other, only the rows for columns the
+        # batch uses become dense, TERM_BATCH of them at a time.
+        rows = self.dense(positions)
+        used = np.flatnonzero(rows.any(axis=0))
+        product = np.zeros((len(positions), other.width), dtype=np.float32)
+        for start in range(0, len(used), TERM_BATCH):
+            columns = used[start:start + TERM_BATCH]
+            product += rows[:, columns] @ other.dense(columns)
+        return product
+
+
+class Block:
+    # Candidates are only matched within their specialty: every vacancy of one specialty is loaded as
+    # sparse term arrays, and whole batches are scored against the other side at once. Vacancy skills
+    # are short, but matching resume texts is not: resumes are only tokenized once some score needs
+    # them, and refresh() asks for those that changed and those the search index finds a scored term in.
+
+    def __init__(self, specialty_id):
+        self.specialty_id = specialty_id
+        vacancies = list(
+            Vacancy.objects.filter(specialty_id=specialty_id).order_by('id')
+            .values_list('id', 'skills', 'salary_min', 'salary_max')
+        )
+        resumes = list(Resume.objects.filter(specialty_id=specialty_id).order_by('id').values_list('id', 'salary'))
+        self.vacancy_ids = np.array([row[0] for row in vacancies], dtype=np.int64)
+        self.resume_ids = np.array([row[0] for row in resumes], dtype=np.int64)
+        self.salary_min = np.maximum(np.array([row[2] for row in vacancies], dtype=np.float32), 1)
+        self.salary_max = np.maximum(np.array([row[3] for row in vacancies], dtype=np.float32), self.salary_min)
+        self.salary = np.array([row[1] for row in resumes], dtype=np.float32)
+
+        self.vacancy_terms = [skill_terms(row[1]) for row in vacancies]
+        frequency = Counter(term for terms in self.vacancy_terms for term in terms)
+        self.vocabulary = {term: index for index, term in enumerate(sorted(frequency))}
+        # Vacancies by term and resumes by term, each with its inverted index for scoring the other side.
+        self.skills = self.vacancy_vectors(frequency)
+        self.skills_by_term = self.skills.transposed()
+        self.found = [()] * len(resumes)
+        self.tokenized = np.zeros(len(resumes), dtype=bool)
+        self.tokenize(np.empty(0, dtype=np.intp))
+
+    def vacancy_vectors(self, frequency):
+        # Rarer skills weigh more; each row sums to one, so the skills score is the covered share.
+        idf = {term: math.log(1 + len(self.vacancy_terms) / frequency[term]) for term in self.vocabulary}
+        rows = []
+        for terms in self.vacancy_terms:
+            total = sum(idf[term] for term in terms)
+            rows.append(([self.vocabulary[term] for term in terms], [idf[term] / total for term in terms]))
+        return Rows.build(rows, len(self.vocabulary))
+
+    def tokenize(self, positions):
+        # Finds the vocabulary in the texts of the resumes at positions not read yet; every other resume
+        # keeps an empty row.
+        missing = positions[~self.tokenized[positions]]
+        if len(missing) and self.vocabulary:
+            pattern = term_pattern(self.vocabulary)
+            for batch in batches(self.resume_ids[missing].tolist()):
+                texts = Resume.objects.filter(pk__in=batch).values_list('id', 'education', 'experience')
+                for resume_id, education, experience in texts:
+                    found = {match.lower() for match in pattern.findall(f'{education}\n{experience}')}
+                    self.found[np.searchsorted(self.resume_ids, resume_id)] = [self.vocabulary[term] for term in found]
+        self.tokenized[missing] = True
+        self.terms = Rows.build(((found, [1] * len(found)) for found in self.found), len(self.vocabulary))
+        self.terms_by_term = self.terms.transposed()
+
+    def mentioning(self, vacancies):
+        # The resumes that can score on the skills of these vacancies: the search index matches every
+        # word of a skill, so it finds a superset of what the term pattern does.
+        terms = set().union(*(self.vacancy_terms[position] for position in vacancies.tolist()))
+        queries = [build_match_query(term) for term in sorted(terms)]
+        if not all(queries):
+            return np.arange(len(self.resume_ids))
+        found = []
+        with connection.cursor() as cursor:
+            for batch in batches(queries, MATCH_BATCH):
+                cursor.execute(
+                    f'SELECT rowid FROM {RESUME_FTS_TABLE} WHERE {RESUME_FTS_TABLE} MATCH %s',
+                    [' OR '.join(f'({query})' for query in batch)],
+                )
+                found.extend(row[0] for row in cursor.fetchall())
+        return np.flatnonzero(np.isin(self.resume_ids, found))
+
+    def skill_scores(self, vacancies, resumes):
+        # One side is always ALL: the batch side is multiplied out against the other's inverted index.
+        if resumes is ALL:
+            return self.skills.product(np.arange(len(self.skills))[vacancies], self.terms_by_term)
+        return self.terms.product(np.arange(len(self.terms))[resumes], self.skills_by_term).T
+
+    def salary_scores(self, vacancies, resumes):
+        # Full marks anywhere within salary_min..salary_max; outside, the score falls with the distance
+        # to the range, reaching zero SALARY_TOLERANCE of the nearest bound away.
+        salary_min, salary_max = self.salary_min[vacancies, None], self.salary_max[vacancies, None]
+        salary = self.salary[None, resumes]
+        above = np.maximum(salary - salary_max, 0) / (salary_max * SALARY_TOLERANCE)
+        below = np.maximum(salary_min - salary, 0) / (salary_min * SALARY_TOLERANCE)
+        return np.clip(1 - above - below, 0, 1)
+
+    def scores(self, vacancies, resumes):
+        return SKILLS_WEIGHT * self.skill_scores(vacancies, resumes) + SALARY_WEIGHT * self.salary_scores(
+            vacancies, resumes,
+        )
+
+    def vacancy_lists(self, positions):
+        for start in range(0, len(positions), SCORE_BATCH):
+            batch = positions[start:start + SCORE_BATCH]
+            owner_ids = self.vacancy_ids[batch]
+            yield owner_ids, list(self.ranked(self.scores(batch, ALL), owner_ids, self.resume_ids))
+
+    def resume_lists(self, positions):
+        for start in range(0, len(positions), SCORE_BATCH):
+            batch = positions[start:start + SCORE_BATCH]
+            owner_ids = self.resume_ids[batch]
+            yield owner_ids, list(self.ranked(self.scores(ALL, batch).T, owner_ids, self.vacancy_ids))
+
+    def ranked(self, scores, owner_ids, candidate_ids):
+        best = top_k(scores)
+        for row, owner_id in enumerate(owner_ids.tolist()):
+            for column in best[row].tolist():
+                yield owner_id, int(candidate_ids[column]), float(scores[row, column])
+
+    def best_per_resume(self, vacancies):
+        best = np.full(len(self.resume_ids), -np.inf, dtype=np.float32)
+        for start in range(0, len(vacancies), SCORE_BATCH):
+            best = np.maximum(best, self.scores(vacancies[start:start + SCORE_BATCH], ALL).max(axis=0))
+        return best
+
+    def best_per_vacancy(self, resumes):
+        best = np.full(len(self.vacancy_ids), -np.inf, dtype=np.float32)
+        for start in range(0, len(resumes), SCORE_BATCH):
+            best = np.maximum(best, self.scores(ALL, resumes[start:start + SCORE_BATCH]).max(axis=1))
+        return best
+
+    def floors(self, model, owner, owner_ids):
+        # The lowest score each full top-K list keeps; owners with shorter lists accept anything.
+        floor = np.full(len(owner_ids), -np.inf, dtype=np.float32)
+        rows = (
+            model.objects
+            .filter(**{f'{owner}__specialty_id': self.specialty_id})
+            .order_by()
+            .values_list(f'{owner}_id')
+            .annotate(lowest=Min('score'), size=Count('id'))
+        )
+        for owner_id, lowest, size in rows:
+            position = np.searchsorted(owner_ids, owner_id)
+            if size >= TOP_K and position < len(owner_ids) and owner_ids[position] == owner_id:
+                floor[position] = lowest
+        return floor
+
+    def rebuild(self):
+        vacancies, resumes = np.arange(len(self.vacancy_ids)), np.arange(len(self.resume_ids))
+        self.tokenize(resumes)
+        replace_lists(VacancyMatch, 'vacancy', 'resume', self.vacancy_lists(vacancies))
+        replace_lists(ResumeMatch, 'resume', 'vacancy', self.resume_lists(resumes))
+
+    def refresh(self, stale, redo):
+        # A stale entity gets a new list, and so does every entity whose list it was on (redo).
+        # Any other list only changes if a stale entity now beats its lowest kept score.
+        vacancies = np.isin(self.vacancy_ids, list(redo['vacancy']))
+        resumes = np.isin(self.resume_ids, list(redo['resume']))
+        stale_vacancies = np.flatnonzero(np.isin(self.vacancy_ids, list(stale['vacancy'])))
+        stale_resumes = np.flatnonzero(np.isin(self.resume_ids, list(stale['resume'])))
+        self.tokenize(np.flatnonzero(resumes))
+        if len(stale_resumes):
+            vacancies |= self.best_per_vacancy(stale_resumes) > self.floors(VacancyMatch, 'vacancy', self.vacancy_ids)
+        vacancies = np.flatnonzero(vacancies)
+        # Every vacancy scored from here on is in vacancies, and a resume none of their skills occur in
+        # has a zero skills score without being read.
+        self.tokenize(self.mentioning(vacancies))
+        if len(stale_vacancies):
+            resumes |= self.best_per_resume(stale_vacancies) > self.floors(ResumeMatch, 'resume', self.resume_ids)
+        resumes = np.flatnonzero(resumes)
+        self.tokenize(resumes)
+        replace_lists(VacancyMatch, 'vacancy', 'resume', self.vacancy_lists(vacancies))
+        replace_lists(ResumeMatch, 'resume', 'vacancy', self.resume_lists(resumes))
+        return len(vacancies), len(resumes)
+
+
+def replace_lists(model, owner, candidate, lists):
+    # Each batch of (owner ids, rows) is scored before and written in its own transaction, so the
+    # write lock is only held for the delete and insert. Plain executemany: building a model instance
+    # per row costs more than scoring the whole block.
+    insert = f'INSERT INTO {model._meta.db_table} ({owner}_id, {candidate}_id, score) VALUES (%s, %s, %s)'
+    for owner_ids, rows in lists:
+        owner_ids = owner_ids.tolist()
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(owner_ids), DELETE_CHUNK):
+                model.objects.filter(**{f'{owner}_id__in': owner_ids[start:start + DELETE_CHUNK]}).delete()
+            for batch in batches(rows):
+                cursor.executemany(insert, batch)
+
+
+def settle(queryset, started, flag='matches_stale'):
+    # Anything saved after the run started stays stale for the next one.
+    return queryset.filter(**{flag: True, 'updated_at__lte': started}).update(**{flag: False})
+
+
+def rebuild_matches():
+    started = timezone.now()
+    for specialty_id in Specialty.objects.values_list('id', flat=True):
+        Block(specialty_id).rebuild()
+    with transaction.atomic():
+        settle(Vacancy.objects.all(), started)
+        settle(Resume.objects.all(), started)
+
+
+def stale_ids(model, limit):
+    return dict(model.objects.filter(matches_stale=True).order_by('id').values_list('id', 'specialty_id')[:limit])
+
+
+def listed_with(model, owner, candidate, candidate_ids):
+    rows = model.objects.filter(**{f'{candidate}_id__in': candidate_ids})
+    return dict(rows.values_list(f'{owner}_id', f'{owner}__specialty_id'))
+
+
+def refresh_stale(limit=1000):
+    started = timezone.now()
+    stale = {'vacancy': stale_ids(Vacancy, limit), 'resume': stale_ids(Resume, limit)}
+    if not stale['vacancy'] and not stale['resume']:
+        return 0, 0, 0
+    redo = {
+        'vacancy': {**listed_with(VacancyMatch, 'vacancy', 'resume', stale['resume']), **stale['vacancy']},
+        'resume': {**listed_with(ResumeMatch, 'resume', 'vacancy', stale['vacancy']), **stale['resume']},
+    }
+    refreshed = np.zeros(2, dtype=np.int64)
+    for specialty_id in set(redo['vacancy'].values()) | set(redo['resume'].values()):
+        refreshed += Block(specialty_id).refresh(stale, redo)
+    with transaction.atomic():
+        settle(Vacancy.objects.filter(pk__in=stale['vacancy']), started)
+        settle(Resume.objects.filter(pk__in=stale['resume']), started)
+    return len(stale['vacancy']) + len(stale['resume']), int(refreshed[0]), int(refreshed[1])
@@ -0,0 +1,259 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from uuid import uuid4
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+from app_vacancy.cache import acquire_lock, release_lock
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# A worker writes its totals to its own file this often when it has new ones, and whenever it serves /metrics.
+FLUSH_SECONDS = 5
+# The histograms of workers that have exited, merged into one file so the directory does not grow with restarts.
+TOTALS_FILE = 'totals.json'
+MERGE_LOCK = 'metrics:merge'
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (0, 1, 2, 5, 10, 20, 50, 100)
+
+HISTOGRAMS = {
+    'vacancies_request_duration_seconds': ('Time spent in Django per request.', SECONDS),
+    'vacancies_db_duration_seconds': ('Time spent in database queries per request.', SECONDS),
+    'vacancies_db_queries': ('Database queries per request.', QUERIES),
+    'vacancies_template_duration_seconds': ('Time spent rendering templates per request.', SECONDS),
+}
+
+# Per request: seconds spent rendering templates, added to by TimedTemplate.
+timings = ContextVar('timings', default=None)
+
+
+class Timings:
+
+    def __init__(self):
+        self.template = 0.0
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            current = timings.get()
+            if current is not None:
+                current.template += time.perf_counter() - start
+
+
+class TimedTemplates(DjangoTemplates):
+    # The stock Django backend; only top-level renders are timed, so includes are not counted twice.
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class Store:
+    # One worker's histograms since it started: per metric and view, the count in each bucket
+    # (the last one is +Inf) followed by the sum. The file is named per process, never per pid,
+    # so a restarted worker adds to the totals instead of overwriting those of its predecessor.
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.path = os.path.join(settings.METRICS_DIR, f'{self.pid}-{uuid4().hex}.json')
+        self.values = {name: {} for name in HISTOGRAMS}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def observe(self, name, view, value):
+        _, buckets = HISTOGRAMS[name]
+        with self.lock:
+            row = self.values[name].setdefault(view, [0] * (len(buckets) + 2))
+            row[next((index for index, bound in enumerate(buckets) if value <= bound), len(buckets))] += 1
+            row[-1] += value
+            self.dirty = True
+
+    def flush(self):
+        with self.lock:
+            write_json(self.path, self.values)
+            self.dirty = False
+
+    def flush_loop(self):
+        # Also catches a worker going idle right after a request.
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            if self.dirty:
+                self.flush()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    # Created in the worker itself: a store inherited over fork would share the parent's file.
+    global _store
+    with _store_lock:
+        if _store is None or _store.pid != os.getpid():
+            _store = Store()
+            threading.Thread(target=_store.flush_loop, daemon=True).start()
+            atexit.register(_store.flush)
+    return _store
+
+
+def record(view, total, db, queries, template):
+    current = store()
+    current.observe('vacancies_request_duration_seconds', view, total)
+    current.observe('vacancies_db_duration_seconds', view, db)
+    current.observe('vacancies_db_queries', view, queries)
+    current.observe('vacancies_template_duration_seconds', view, template)
+
+
+def can_read(request):
+    # /metrics and the Server-Timing header tell how slow each page is and where: for the scraper and staff.
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+def server_timing(total, db, queries, template):
+    return ', '.join((
+        f'db;dur={db * 1000:.1f};desc="queries: {queries}"',
+        f'tpl;dur={template * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ))
+
+
+def _add(totals, values):
+    for name, views in values.items():
+        for view, row in views.items():
+            current = totals.setdefault(name, {}).setdefault(view, [0] * len(row))
+            totals[name][view] = [a + b for a, b in zip(current, row)]
+
+
+def write_json(path, data):
+    # Readers only ever see whole files: os.replace swaps the new one in atomically.
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+def read_json(path, default):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+
+def worker_files():
+    # {file name: pid} of every worker's file, named <pid>-<uuid>.json.
+    files = {}
+    for entry in os.scandir(settings.METRICS_DIR):
+        pid, _, rest = entry.name.partition('-')
+        if pid.isdigit() and rest.endswith('.json'):
+            files[entry.name] = int(pid)
+    return files
+
+
+def alive(pid):
+    if os.name != 'posix':
+        # No harmless way to probe a pid on Windows (os.kill would end it): every file is kept.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def load_totals():
+    return read_json(os.path.join(settings.METRICS_DIR, TOTALS_FILE), {'values': {}, 'merged': []})
+
+
+def merge_exited():
+    # The totals list the files merged into them: a reader skips those, and a crash before they are
+    # removed does not count them twice. Workers are told apart by pid, so the directory is per host.
+    files = worker_files()
+    totals = load_totals()
+    merged = {name for name in totals['merged'] if name in files}
+    exited = [name for name, pid in files.items() if name not in merged and not alive(pid)]
+    if exited:
+        for name in exited:
+            _add(totals['values'], read_json(os.path.join(settings.METRICS_DIR, name), {}))
+        totals = {'values': totals['values'], 'merged': [*merged, *exited]}
+        write_json(os.path.join(settings.METRICS_DIR, TOTALS_FILE), totals)
+    for name in [*merged, *exited]:
+        remove_file(os.path.join(settings.METRICS_DIR, name))
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def read_all():
+    # The files are listed before the totals are read, so one merged meanwhile is listed in them.
+    # One removed after that was merged by a later run: read again.
+    while True:
+        files = worker_files()
+        totals = load_totals()
+        values = totals['values']
+        try:
+            for name in files.keys() - set(totals['merged']):
+                with open(os.path.join(settings.METRICS_DIR, name)) as file:
+                    _add(values, json.load(file))
+        except FileNotFoundError:
+            continue
+        return values
+
+
+def collect():
+    # Sums the files of every worker, live or gone, as Prometheus expects of counters.
+    store().flush()
+    lock = acquire_lock(MERGE_LOCK)
+    if lock is not None:
+        try:
+            merge_exited()
+        finally:
+            release_lock(lock)
+    return read_all()
+
+
+def _label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _histogram_lines(name, views):
+    _, buckets = HISTOGRAMS[name]
+    for view, row in sorted(views.items()):
+        label = f'view="{_label(view)}"'
+        cumulative = 0
+        for bound, count in zip([*buckets, '+Inf'], row):
+            cumulative += count
+            yield f'{name}_bucket{{{label},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{label}}} {row[-1]}'
+        yield f'{name}_count{{{label}}} {cumulative}'
+
+
+def exposition():
+    totals = collect()
+    lines = []
+    for name, (help_text, _) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        lines += _histogram_lines(name, totals.get(name, {}))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, nullcontext
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from app_vacancy import metrics, pages, reference
+from app_vacancy.routers import PIN_COOKIE, Routing, pick_replica, routing
+
+logger = logging.getLogger(__name__)
+
+# The QueryStats of the current request, for code running its queries in other threads (async views).
+request_stats = ContextVar('request_stats', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    # Async views run queries for one request in several threads at once.
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.duration += time.perf_counter() - start
+                self.count += 1
+                self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return {sql: times for sql, times in self.statements.items() if times > 1}
+
+
+def track_queries(stats):
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(stats))
+    return stack
+
+
+def request_queries():
+    # For another thread working on the current request (the async views' pool): that thread has
+    # connections of its own, so the request's QueryStats are attached to them too.
+    stats = request_stats.get()
+    return track_queries(stats) if stats is not None else nullcontext()
+
+
+def query_budget(url_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+def check_query_budget(url_name, stats):
+    budget = query_budget(url_name)
+    if budget is None or stats.count <= budget:
+        return
+    # The statements themselves: the count alone does not say which lookup runs once per row.
+    duplicated = '; '.join(f'{times}x {sql}' for sql, times in stats.duplicates.items()) or 'none'
+    message = (
+        f'{url_name} ran {stats.count} queries (budget {budget}) in {stats.duration * 1000:.1f} ms, '
+        f'duplicated statements: {duplicated}'
+    )
+    if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        request.query_stats = stats
+        token = request_stats.set(stats)
+        try:
+            with track_queries(stats):
+                response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        if request.resolver_match:
+            check_query_budget(request.resolver_match.url_name, stats)
+        if settings.DEBUG:
+            response['X-Query-Count'] = stats.count
+        return response
+
+
+class ServerTimingMiddleware:
+    # Sits outside QueryBudgetMiddleware and reports its query stats next to the template and total times:
+    # as a Server-Timing header to those who may read /metrics (and anyone under DEBUG), and into the
+    # histograms of the request's URL name served at /metrics.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        timings = metrics.Timings()
+        token = metrics.timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.timings.reset(token)
+        total = time.perf_counter() - start
+        stats = getattr(request, 'query_stats', None) or QueryStats()
+        if settings.DEBUG or metrics.can_read(request):
+            response['Server-Timing'] = metrics.server_timing(total, stats.duration, stats.count, timings.template)
+        if request.resolver_match:
+            metrics.record(request.resolver_match.view_name, total, stats.duration, stats.count, timings.template)
+        return response
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = Routing()
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if state.wrote:
+            # Read your writes: replicas may trail the primary by up to REPLICA_PIN_SECONDS.
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing.get().replica = pick_replica(request)
+
+
+class ReferenceDataMiddleware:
+    # The worker's copy of the reference data is compared with the shared stamp at most once per request,
+    # on first use, so an edit reaches every worker by its next request that shows a specialty or company.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = reference.checked.set(False)
+        try:
+            return self.get_response(request)
+        finally:
+            reference.checked.reset(token)
+
+
+class PageCacheMiddleware:
+    # Serves whole pages of the views in pages.PAGE_NAMESPACES from the cache to anonymous visitors:
+    # the CSRF token is filled in per request.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if hasattr(request, 'page_versions'):
+            pages.store_page(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not pages.cacheable(request):
+            return None
+        response = pages.cached_page(request)
+        if response is None:
+            pages.remember_versions(request)
+        return response
+
+
+def assert_within_query_budget(response):
+    request = getattr(response, 'wsgi_request', None) or response.asgi_request
+    url_name = request.resolver_match.url_name
+    budget = query_budget(url_name)
+    stats = request.query_stats
+    assert budget is not None, f'No query budget declared for {url_name}'
+    assert stats.count <= budget, (
+        f'{url_name} ran {stats.count} queries, budget is {budget}. Duplicated: {stats.duplicates}'
+    )
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('app_vacancy', '0004_addResume_and_littleadditions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE app_vacancy_vacancy_fts USING fts5("
+                "title, skills, description, company_name, specialty_title, "
+                "tokenize = 'unicode61 remove_diacritics 2')",
+                "INSERT INTO app_vacancy_vacancy_fts(rowid, title, skills, description, company_name, specialty_title) "
+                "SELECT v.id, v.title, v.skills, v.description, c.name, s.title "
+                "FROM app_vacancy_vacancy v "
+                "JOIN app_vacancy_company c ON c.id = v.company_id "
+                "JOIN app_vacancy_specialty s ON s.id = v.specialty_id",
+            ],
+            reverse_sql='DROP TABLE app_vacancy_vacancy_fts',
+        ),
+    ]
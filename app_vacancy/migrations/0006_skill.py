@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0005_vacancy_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=75, unique=True)),
+                ('vacancies_count', models.PositiveIntegerField(db_index=True, default=0, editable=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='skill_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='vacancies', to='app_vacancy.Skill'),
+        ),
+    ]
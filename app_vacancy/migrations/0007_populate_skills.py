@@ -0,0 +1,49 @@
+from collections import Counter
+from itertools import islice
+
+from django.db import migrations
+
+# The seed loader's batch size (app_vacancy/seed.py), kept here so the migration does not change with it.
+BATCH_SIZE = 500
+
+
+def vacancy_skills(Vacancy):
+    # Read off the database cursor a chunk at a time: the table is never all in memory.
+    for vacancy_id, skills in Vacancy.objects.values_list('id', 'skills').iterator(chunk_size=BATCH_SIZE):
+        yield vacancy_id, {skill.strip() for skill in skills.split(',') if skill.strip()}
+
+
+def populate_skills(apps, schema_editor):
+    Skill = apps.get_model('app_vacancy', 'Skill')
+    Vacancy = apps.get_model('app_vacancy', 'Vacancy')
+    Through = Vacancy.skill_tags.through
+
+    counts = Counter()
+    for _, skills in vacancy_skills(Vacancy):
+        counts.update(skills)
+    Skill.objects.bulk_create([Skill(name=name, vacancies_count=count) for name, count in counts.items()])
+
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+    links = (
+        Through(vacancy_id=vacancy_id, skill_id=skill_ids[name])
+        for vacancy_id, skills in vacancy_skills(Vacancy)
+        for name in skills
+    )
+    batch = list(islice(links, BATCH_SIZE))
+    while batch:
+        Through.objects.bulk_create(batch)
+        batch = list(islice(links, BATCH_SIZE))
+
+
+def clear_skills(apps, schema_editor):
+    apps.get_model('app_vacancy', 'Skill').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('app_vacancy', '0006_skill'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_skills, clear_skills),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.0.4 on 2026-10-18 06:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_vacancies(apps, schema_editor):
+    Vacancy = apps.get_model('app_vacancy', 'Vacancy')
+    for model_name, field in (('Company', 'company'), ('Specialty', 'specialty')):
+        counts = (
+            Vacancy.objects
+            .filter(**{field: OuterRef('pk')})
+            .values(field)
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        apps.get_model('app_vacancy', model_name).objects.update(vacancies_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0007_populate_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='vacancies_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='specialty',
+            name='vacancies_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_vacancies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.0.4 on 2026-10-18 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0008_vacancies_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='external_id',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='external_id',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='specialty',
+            name='code',
+            field=models.CharField(max_length=10, unique=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:00
+
+import app_vacancy.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0009_external_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('references', models.IntegerField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='logo',
+            field=models.ImageField(storage=app_vacancy.storage.ContentAddressedStorage(), upload_to='company_images'),
+        ),
+        migrations.AlterField(
+            model_name='specialty',
+            name='picture',
+            field=models.ImageField(storage=app_vacancy.storage.ContentAddressedStorage(),
+                                    upload_to='speciality_images'),
+        ),
+    ]
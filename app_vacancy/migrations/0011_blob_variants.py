@@ -0,0 +1,18 @@
+# Generated by Django 3.0.4 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0010_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='variants',
+            field=models.CharField(db_index=True, default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:20
+
+from datetime import datetime, time
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_published(value):
+    published = parse_datetime(value) or parse_date(value)
+    if published is None:
+        return timezone.now()
+    if not isinstance(published, datetime):
+        published = datetime.combine(published, time.min)
+    if timezone.is_naive(published):
+        published = timezone.make_aware(published, timezone.utc)
+    return published
+
+
+def forwards(apps, schema_editor):
+    Vacancy = apps.get_model('app_vacancy', 'Vacancy')
+    vacancies = list(Vacancy.objects.only('published_text'))
+    for vacancy in vacancies:
+        vacancy.published_at = parse_published(vacancy.published_text)
+    Vacancy.objects.bulk_update(vacancies, ['published_at'])
+
+
+def backwards(apps, schema_editor):
+    Vacancy = apps.get_model('app_vacancy', 'Vacancy')
+    vacancies = list(Vacancy.objects.only('published_at'))
+    for vacancy in vacancies:
+        vacancy.published_text = vacancy.published_at.date().isoformat() if vacancy.published_at else ''
+    Vacancy.objects.bulk_update(vacancies, ['published_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0011_blob_variants'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='vacancy',
+            old_name='published_at',
+            new_name='published_text',
+        ),
+        migrations.AlterField(
+            model_name='vacancy',
+            name='published_text',
+            field=models.CharField(default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='published_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(forwards, backwards),
+        migrations.RemoveField(
+            model_name='vacancy',
+            name='published_text',
+        ),
+        migrations.AlterField(
+            model_name='vacancy',
+            name='published_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AlterModelOptions(
+            name='vacancy',
+            options={'ordering': ('-published_at', '-id')},
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['specialty', '-published_at', '-id'], name='vacancy_specialty_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['company', '-published_at', '-id'], name='vacancy_company_recent'),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0012_published_at_datetime'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['specialty', 'company', 'salary_max', 'salary_min'], name='vacancy_facets'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['salary_max', 'salary_min'], name='vacancy_salary'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def populate(apps, schema_editor):
+    Application = apps.get_model('app_vacancy', 'Application')
+    Vacancy = apps.get_model('app_vacancy', 'Vacancy')
+    company_ids = Vacancy.objects.filter(pk=OuterRef('vacancy_id')).values('company_id')
+    Application.objects.update(company_id=Subquery(company_ids))
+    for field, condition in (('applications_count', {}), ('unread_applications_count', {'is_read': False})):
+        counts = (
+            Application.objects
+            .filter(vacancy=OuterRef('pk'), **condition)
+            .order_by()
+            .values('vacancy')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        Vacancy.objects.update(**{field: Coalesce(Subquery(counts), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0013_facet_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='application',
+            options={'ordering': ('-created', '-id')},
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='company',
+            field=models.ForeignKey(
+                editable=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                related_name='applications', to='app_vacancy.company',
+            ),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='is_read',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='status',
+            field=models.CharField(
+                choices=[('new', 'Новый'), ('invited', 'Приглашение'), ('rejected', 'Отказ')],
+                default='new', editable=False, max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='unread_applications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['vacancy', '-created', '-id'], name='application_vacancy_inbox'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['company', '-created', '-id'], name='application_company_inbox'),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0014_applications_inbox'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='resume',
+            options={'ordering': ('-updated_at', '-id')},
+        ),
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(fields=['-updated_at', '-id'], name='resume_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(fields=['specialty', '-updated_at', '-id'], name='resume_specialty_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(fields=['specialty', 'status', 'grade', '-updated_at', '-id'], name='resume_filters'),
+        ),
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE app_vacancy_resume_fts USING fts5("
+                "education, experience, "
+                "tokenize = 'unicode61 remove_diacritics 2')",
+                "INSERT INTO app_vacancy_resume_fts(rowid, education, experience) "
+                "SELECT r.id, r.education, r.experience FROM app_vacancy_resume r",
+            ],
+            reverse_sql='DROP TABLE app_vacancy_resume_fts',
+        ),
+    ]
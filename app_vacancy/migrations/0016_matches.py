@@ -0,0 +1,90 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0015_resume_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeMatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'ordering': ('-score', 'id'),
+            },
+        ),
+        migrations.CreateModel(
+            name='VacancyMatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'ordering': ('-score', 'id'),
+            },
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='matches_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='matches_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(condition=models.Q(matches_stale=True), fields=['id'], name='resume_matches_stale'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(condition=models.Q(matches_stale=True), fields=['id'], name='vacancy_matches_stale'),
+        ),
+        migrations.AddField(
+            model_name='vacancymatch',
+            name='resume',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app_vacancy.resume',
+            ),
+        ),
+        migrations.AddField(
+            model_name='vacancymatch',
+            name='vacancy',
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.CASCADE,
+                related_name='resume_matches', to='app_vacancy.vacancy',
+            ),
+        ),
+        migrations.AddField(
+            model_name='resumematch',
+            name='resume',
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.CASCADE,
+                related_name='vacancy_matches', to='app_vacancy.resume',
+            ),
+        ),
+        migrations.AddField(
+            model_name='resumematch',
+            name='vacancy',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app_vacancy.vacancy',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='vacancymatch',
+            index=models.Index(fields=['vacancy', '-score'], name='vacancy_match_best'),
+        ),
+        migrations.AddIndex(
+            model_name='resumematch',
+            index=models.Index(fields=['resume', '-score'], name='resume_match_best'),
+        ),
+    ]
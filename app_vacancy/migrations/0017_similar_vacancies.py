@@ -0,0 +1,52 @@
+# Generated by Django 3.1.14 on 2026-10-18 07:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_vacancy', '0016_matches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarVacancy',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+            ],
+            options={
+                'ordering': ('-score', 'id'),
+            },
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='similar_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(condition=models.Q(similar_stale=True), fields=['id'], name='vacancy_similar_stale'),
+        ),
+        migrations.AddField(
+            model_name='similarvacancy',
+            name='similar',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='+', to='app_vacancy.vacancy',
+            ),
+        ),
+        migrations.AddField(
+            model_name='similarvacancy',
+            name='vacancy',
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similar',
+                to='app_vacancy.vacancy',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='similarvacancy',
+            index=models.Index(fields=['vacancy', '-score'], name='similar_vacancy_best'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # journal_mode is stored in the database file, so it is switched once here rather than on every connection,
+    # which rewrote the file header whenever any command opened it. SQLite refuses the switch inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('app_vacancy', '0017_similar_vacancies'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='PRAGMA journal_mode = WAL',
+            reverse_sql='PRAGMA journal_mode = DELETE',
+        ),
+    ]
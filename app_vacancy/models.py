@@ -1,34 +1,118 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
+from app_vacancy.storage import blob_storage
 
-class Company(models.Model):
+
+class CounterModel(models.Model):
+    # Counters only ever change by F() updates (app_vacancy/counters.py). Saving a row that exists writes
+    # every other field, so a stale copy of the counters read with it never undoes a concurrent update.
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        if update_fields is None and not force_insert and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+
+class Company(CounterModel):
+    external_id = models.CharField(max_length=64, null=True, unique=True, editable=False)
     name = models.CharField(max_length=64)
     location = models.CharField(max_length=150)
-    logo = models.ImageField(upload_to='company_images')
+    logo = models.ImageField(upload_to='company_images', storage=blob_storage)
     description = models.TextField()
     employee_count = models.PositiveIntegerField()
     owner = models.OneToOneField(get_user_model(), null=True, on_delete=models.CASCADE, related_name='company')
+    vacancies_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    counter_fields = ('vacancies_count',)
 
-class Specialty(models.Model):
-    code = models.CharField(max_length=10)
+
+class Specialty(CounterModel):
+    code = models.CharField(max_length=10, unique=True)
     title = models.CharField(max_length=12)
-    picture = models.ImageField(upload_to='speciality_images')
+    picture = models.ImageField(upload_to='speciality_images', storage=blob_storage)
+    vacancies_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ('vacancies_count',)
 
     def __str__(self):
         return self.title
 
 
-class Vacancy(models.Model):
+class Skill(CounterModel):
+    name = models.CharField(max_length=75, unique=True)
+    vacancies_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+
+    counter_fields = ('vacancies_count',)
+
+    def __str__(self):
+        return self.name
+
+
+class Vacancy(CounterModel):
+    external_id = models.CharField(max_length=64, null=True, unique=True, editable=False)
     title = models.CharField(max_length=29)
     specialty = models.ForeignKey(Specialty, on_delete=models.CASCADE, related_name='vacancies')
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='vacancies')
     skills = models.CharField(max_length=75)
+    skill_tags = models.ManyToManyField(Skill, blank=True, editable=False, related_name='vacancies')
     description = models.TextField()
     salary_min = models.PositiveIntegerField()
     salary_max = models.PositiveIntegerField()
-    published_at = models.CharField(max_length=10)
+    published_at = models.DateTimeField(default=timezone.now, db_index=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    applications_count = models.PositiveIntegerField(default=0, editable=False)
+    unread_applications_count = models.PositiveIntegerField(default=0, editable=False)
+    matches_stale = models.BooleanField(default=True, editable=False)
+    similar_stale = models.BooleanField(default=True, editable=False)
+
+    counter_fields = ('applications_count', 'unread_applications_count')
+
+    class Meta:
+        ordering = ('-published_at', '-id')
+        indexes = [
+            models.Index(fields=['specialty', '-published_at', '-id'], name='vacancy_specialty_recent'),
+            models.Index(fields=['company', '-published_at', '-id'], name='vacancy_company_recent'),
+            models.Index(fields=['specialty', 'company', 'salary_max', 'salary_min'], name='vacancy_facets'),
+            models.Index(fields=['salary_max', 'salary_min'], name='vacancy_salary'),
+            models.Index(fields=['id'], name='vacancy_matches_stale', condition=models.Q(matches_stale=True)),
+            models.Index(fields=['id'], name='vacancy_similar_stale', condition=models.Q(similar_stale=True)),
+        ]
+
+
+VARIANTS_PENDING = 'pending'
+VARIANTS_READY = 'ready'
+VARIANTS_FAILED = 'failed'
+
+
+class Blob(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    references = models.IntegerField(default=0, db_index=True)
+    variants = models.CharField(max_length=10, default=VARIANTS_PENDING, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+
+APPLICATION_NEW = 'new'
+APPLICATION_INVITED = 'invited'
+APPLICATION_REJECTED = 'rejected'
+
+APPLICATION_STATUSES = (
+    (APPLICATION_NEW, 'Новый'),
+    (APPLICATION_INVITED, 'Приглашение'),
+    (APPLICATION_REJECTED, 'Отказ'),
+)
 
 
 class Application(models.Model):
@@ -36,7 +120,20 @@ class Application(models.Model):
     written_phone = models.CharField(max_length=50)
     written_cover_letter = models.TextField()
     vacancy = models.ForeignKey(Vacancy, null=True, on_delete=models.CASCADE, related_name='applications')
+    company = models.ForeignKey(
+        Company, null=True, on_delete=models.CASCADE, related_name='applications', editable=False,
+    )
     user = models.ForeignKey(get_user_model(), null=True, on_delete=models.CASCADE, related_name='applications')
+    created = models.DateTimeField(default=timezone.now, editable=False)
+    is_read = models.BooleanField(default=False, editable=False)
+    status = models.CharField(max_length=10, choices=APPLICATION_STATUSES, default=APPLICATION_NEW, editable=False)
+
+    class Meta:
+        ordering = ('-created', '-id')
+        indexes = [
+            models.Index(fields=['vacancy', '-created', '-id'], name='application_vacancy_inbox'),
+            models.Index(fields=['company', '-created', '-id'], name='application_company_inbox'),
+        ]
 
 
 class Resume(models.Model):
@@ -50,3 +147,50 @@ class Resume(models.Model):
     education = models.TextField()
     experience = models.TextField()
     portfolio = models.URLField()
+    updated_at = models.DateTimeField(auto_now=True)
+    matches_stale = models.BooleanField(default=True, editable=False)
+
+    class Meta:
+        ordering = ('-updated_at', '-id')
+        indexes = [
+            models.Index(fields=['-updated_at', '-id'], name='resume_recent'),
+            models.Index(fields=['specialty', '-updated_at', '-id'], name='resume_specialty_recent'),
+            models.Index(fields=['specialty', 'status', 'grade', '-updated_at', '-id'], name='resume_filters'),
+            models.Index(fields=['id'], name='resume_matches_stale', condition=models.Q(matches_stale=True)),
+        ]
+
+
+class VacancyMatch(models.Model):
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name='resume_matches', db_index=False)
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score', 'id')
+        indexes = [
+            models.Index(fields=['vacancy', '-score'], name='vacancy_match_best'),
+        ]
+
+
+class SimilarVacancy(models.Model):
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name='similar', db_index=False)
+    similar = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score', 'id')
+        indexes = [
+            models.Index(fields=['vacancy', '-score'], name='similar_vacancy_best'),
+        ]
+
+
+class ResumeMatch(models.Model):
+    resume = models.ForeignKey(Resume, on_delete=models.CASCADE, related_name='vacancy_matches', db_index=False)
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ('-score', 'id')
+        indexes = [
+            models.Index(fields=['resume', '-score'], name='resume_match_best'),
+        ]
@@ -0,0 +1,111 @@
+import re
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+
+from app_vacancy.cache import CATALOG, HOMEPAGE, bump_versions, current_versions, get_versions, make_key
+from app_vacancy.models import Vacancy
+from app_vacancy.pagination import CURSOR_PARAM, decode_cursor, encode_cursor
+from app_vacancy.templatetags.image_variants import accepts_webp
+
+PAGE_TIMEOUT = 10 * 60
+
+# Views whose pages are cached, with the namespaces read off the URL that every cached page is checked
+# against. Views add the namespaces of other objects they show with depends_on().
+PAGE_NAMESPACES = {
+    'main': (HOMEPAGE,),
+    'all_vacancies': (CATALOG,),
+    'vacancies_by_specialty': (CATALOG,),
+    'company': ('company:{id}',),
+    'vacancy': ('vacancy:{id}',),
+}
+
+# The query parameters each of those views reads. A request with any other parameter is not served from
+# the cache nor stored, so made-up query strings cannot fill the cache and push real pages out.
+PAGE_PARAMS = {
+    'main': ('search',),
+    'all_vacancies': (CURSOR_PARAM,),
+    'vacancies_by_specialty': (CURSOR_PARAM,),
+    'company': (CURSOR_PARAM,),
+    'vacancy': (),
+}
+
+# Hole punched into the stored page and filled in for every visitor.
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_HOLE = '<csrf-token-hole>'
+
+
+def _known_params(request, url_name):
+    allowed = PAGE_PARAMS[url_name]
+    return all(name in allowed and len(request.GET.getlist(name)) == 1 for name in request.GET)
+
+
+def cacheable(request):
+    # Only anonymous visitors: a logged-in user's page carries their name and may show more.
+    match = request.resolver_match
+    if request.method not in ('GET', 'HEAD') or match is None or match.url_name not in PAGE_NAMESPACES:
+        return False
+    return request.user.is_anonymous and _known_params(request, match.url_name)
+
+
+def _normalized(name, value):
+    if name == CURSOR_PARAM:
+        # A cursor the paginator would ignore gives the first page, and shares its key.
+        values = decode_cursor(value)
+        return encode_cursor(values) if values else ''
+    return value
+
+
+def page_key(request):
+    # Image variants depend on whether the browser takes WebP, so that is part of the key.
+    url_name = request.resolver_match.url_name
+    params = [(name, _normalized(name, request.GET.get(name, ''))) for name in PAGE_PARAMS[url_name]]
+    params = [(name, value) for name, value in params if value]
+    return f'page:{make_key(url_name, request.path, params, accepts_webp({"request": request}))}'
+
+
+def fill_holes(request, content):
+    return content.replace(CSRF_HOLE, get_token(request))
+
+
+def cached_page(request):
+    page = cache.get(page_key(request))
+    if page is None or current_versions(page['versions']) != page['versions']:
+        return None
+    response = HttpResponse(fill_holes(request, page['content']), content_type=page['content_type'])
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def remember_versions(request):
+    url_name, kwargs = request.resolver_match.url_name, request.resolver_match.kwargs
+    request.page_versions = get_versions([namespace.format(**kwargs) for namespace in PAGE_NAMESPACES[url_name]])
+
+
+def depends_on(request, *namespaces):
+    # A change that lands between the view reading an object and declaring it shows until the page expires.
+    if hasattr(request, 'page_versions'):
+        request.page_versions.update(get_versions(namespaces))
+
+
+def store_page(request, response):
+    patch_vary_headers(response, ('Accept',))
+    if request.method != 'GET' or response.status_code != 200 or response.streaming or response.cookies:
+        return
+    content = CSRF_INPUT.sub(rf'\g<1>{CSRF_HOLE}\g<2>', response.content.decode(response.charset))
+    page = {'versions': request.page_versions, 'content': content, 'content_type': response['Content-Type']}
+    cache.set(page_key(request), page, PAGE_TIMEOUT)
+
+
+def page_source_changed(instance):
+    namespaces = {f'{instance._meta.model_name}:{instance.pk}'}
+    if isinstance(instance, Vacancy):
+        # A vacancy is listed on its company's page, and on the previous company's page if it moved.
+        previous = getattr(instance, '_counted_relations', None) or {}
+        company_ids = {instance.company_id, previous.get('company_id')} - {None}
+        namespaces.update(f'company:{company_id}' for company_id in company_ids)
+    # After the commit: a page rendered from the old rows meanwhile would be stored under the new versions.
+    transaction.on_commit(lambda: bump_versions(*namespaces))
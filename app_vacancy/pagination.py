@@ -0,0 +1,127 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+PAGE_SIZE = 20
+CURSOR_PARAM = 'after'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts datetimes to milliseconds. A cursor needs the exact key: cut, it falls before
+    # the rows that share the last one's timestamp, and they are skipped.
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        return None
+    # Keys are plain numbers and strings (dates come as ISO strings); anything else was not made by encode_cursor().
+    if not isinstance(values, list) or not all(isinstance(value, (int, float, str)) for value in values):
+        return None
+    return [parse_key(value) for value in values]
+
+
+def parse_key(value):
+    # Datetimes back to datetimes, to the microsecond; a string that is no datetime stays as it is.
+    if not isinstance(value, str):
+        return value
+    try:
+        return parse_datetime(value) or value
+    except ValueError:
+        return value
+
+
+class Page:
+
+    def __init__(self, object_list, next_cursor, query, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+        self._query = query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def next_query(self):
+        query = self._query.copy()
+        query[CURSOR_PARAM] = self.next_cursor
+        return query.urlencode()
+
+    @property
+    def first_query(self):
+        query = self._query.copy()
+        query.pop(CURSOR_PARAM, None)
+        return query.urlencode()
+
+
+class KeysetPaginator:
+    ordering = None
+    page_size = PAGE_SIZE
+
+    def __init__(self, queryset, ordering=None, page_size=None):
+        self.queryset = queryset
+        self.ordering = tuple(ordering or self.ordering or queryset.model._meta.ordering or ('-id',))
+        self.page_size = page_size or self.page_size
+
+    def seek(self, queryset, values):
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        leading = self.ordering[0]
+        bound = Q(**{f"{leading.lstrip('-')}__{'lte' if leading.startswith('-') else 'gte'}": values[0]})
+        return queryset.filter(bound, condition)
+
+    def key(self, obj):
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(obj, dict):
+            return [obj[field] for field in fields]
+        return [getattr(obj, field) for field in fields]
+
+    def page(self, query):
+        cursor = query.get(CURSOR_PARAM)
+        values = decode_cursor(cursor) if cursor else None
+        queryset = self.queryset.order_by(*self.ordering)
+        if values and len(values) == len(self.ordering):
+            try:
+                queryset = self.seek(queryset, values)
+            except (TypeError, ValueError, ValidationError):
+                # A cursor edited by hand, e.g. text for an id: start over from the first page.
+                values = None
+        rows = list(queryset[:self.page_size + 1])
+        next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            next_cursor = encode_cursor(self.key(rows[-1]))
+        return Page(rows, next_cursor, query, is_first=not values)
+
+
+def paginate(request, queryset, paginator_class=KeysetPaginator, **kwargs):
+    return paginator_class(queryset, **kwargs).page(request.GET)
@@ -0,0 +1,99 @@
+from contextvars import ContextVar
+
+from app_vacancy.cache import REFERENCE, get_version
+from app_vacancy.models import Company, Specialty
+from app_vacancy.routers import PRIMARY
+
+# What vacancy and match cards show of a company; other fields load on first use.
+COMPANY_CARD_FIELDS = ('id', 'name', 'logo', 'location')
+# Companies kept per worker; past this the cards are dropped and loaded again as pages ask for them.
+MAX_COMPANIES = 5000
+
+# Whether the current request already compared this worker's copy with the shared stamp. ReferenceDataMiddleware
+# starts each request at False; outside requests (commands, shell) it stays None and every lookup compares.
+checked = ContextVar('reference_checked', default=None)
+
+
+class Snapshot:
+    # Specialties and company cards as of one version of the REFERENCE stamp. Loaded from the primary:
+    # a copy read off a lagging replica would be kept until the next change.
+
+    def __init__(self, version):
+        self.version = version
+        self.specialties = None
+        self.companies = {}
+
+    def load_specialties(self):
+        self.specialties = {specialty.pk: specialty for specialty in Specialty.objects.using(PRIMARY).order_by('pk')}
+
+    def specialty(self, pk):
+        if self.specialties is None or pk not in self.specialties:
+            # Also catches a specialty committed just before the stamp changed.
+            self.load_specialties()
+        return self.specialties.get(pk)
+
+    def load_companies(self, ids):
+        missing = set(ids) - self.companies.keys()
+        if not missing:
+            return
+        if len(self.companies) + len(missing) > MAX_COMPANIES:
+            self.companies = {}
+        companies = Company.objects.using(PRIMARY).only(*COMPANY_CARD_FIELDS).filter(pk__in=missing)
+        self.companies.update((company.pk, company) for company in companies)
+
+
+_snapshot = Snapshot(None)
+
+
+def current():
+    global _snapshot
+    state = checked.get()
+    if not state:
+        version = get_version(REFERENCE)
+        if version != _snapshot.version:
+            _snapshot = Snapshot(version)
+        if state is False:
+            checked.set(True)
+    return _snapshot
+
+
+def all_specialties():
+    snapshot = current()
+    if snapshot.specialties is None:
+        snapshot.load_specialties()
+    return list(snapshot.specialties.values())
+
+
+def specialty_by_id(pk):
+    return current().specialty(pk)
+
+
+def specialty_by_code(code):
+    return next((specialty for specialty in all_specialties() if specialty.code == code), None)
+
+
+def attach_specialties(objects):
+    # Stands in for select_related('specialty'): the instances are shared by every request of the worker.
+    snapshot = current()
+    for obj in objects:
+        specialty = snapshot.specialty(obj.specialty_id)
+        if specialty is not None:
+            obj.specialty = specialty
+    return objects
+
+
+def company_cards(ids):
+    snapshot = current()
+    ids = sorted(set(ids))
+    snapshot.load_companies(ids)
+    companies = snapshot.companies
+    return {pk: companies[pk] for pk in ids if pk in companies}
+
+
+def attach_companies(objects):
+    objects = list(objects)
+    companies = company_cards(obj.company_id for obj in objects)
+    for obj in objects:
+        if obj.company_id in companies:
+            obj.company = companies[obj.company_id]
+    return objects
@@ -0,0 +1,31 @@
+from app_vacancy.forms import GRADES, STATUSES
+from app_vacancy.models import Resume
+from app_vacancy.pagination import KeysetPaginator
+from app_vacancy.search import ResumeSearchPaginator, build_match_query, search_resumes
+
+GRADE_CHOICES = tuple(value for value, _ in GRADES if value)
+STATUS_CHOICES = tuple(value for value, _ in STATUSES if value)
+
+
+def parse_resume_filters(params):
+    filters = {}
+    specialty = params.get('specialty')
+    if specialty:
+        filters['specialty__code'] = specialty
+    if params.get('status') in STATUS_CHOICES:
+        filters['status'] = params['status']
+    if params.get('grade') in GRADE_CHOICES:
+        filters['grade'] = params['grade']
+    salary = params.get('salary', '')
+    if salary.isdigit():
+        filters['salary__lte'] = int(salary)
+    return filters
+
+
+def find_resumes(params):
+    query = params.get('search', '').strip()
+    # As with vacancies, a query without a single word matches nothing and has no rank to order by.
+    ranked = bool(build_match_query(query))
+    resumes = search_resumes(query) if query else Resume.objects.all()
+    resumes = resumes.filter(**parse_resume_filters(params))
+    return resumes, ResumeSearchPaginator if ranked else KeysetPaginator
@@ -0,0 +1,65 @@
+import random
+import sqlite3
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+# Set on responses to requests that wrote; while it lives, the client reads from the primary.
+PIN_COOKIE = 'primary_pin'
+
+routing = ContextVar('routing', default=None)
+
+
+class Routing:
+    # Per request: the replica public reads may use, and whether the request wrote to the primary.
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def pick_replica(request):
+    if not settings.REPLICAS or PIN_COOKIE in request.COOKIES or request.method not in ('GET', 'HEAD'):
+        return None
+    if request.resolver_match.url_name not in settings.REPLICA_READ_VIEWS:
+        return None
+    return random.choice(settings.REPLICAS)
+
+
+class PrimaryReplicaRouter:
+    # Outside a routed request (commands, shell, tests) everything goes to the primary. Sessions and users
+    # always do: only the catalog is served from a replica, so a lagging copy can never log anybody out.
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or state.replica is None or state.wrote or model._meta.app_label != 'app_vacancy':
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == PRIMARY
+
+
+def refresh_replica(alias):
+    # The backup API reads the primary in one read transaction, so writers carry on, and writes the copy
+    # in one step: readers of the replica see either the previous snapshot or the new one.
+    primary = sqlite3.connect(connections[PRIMARY].settings_dict['NAME'])
+    replica = sqlite3.connect(connections[alias].settings_dict['NAME'])
+    try:
+        primary.backup(replica)
+    finally:
+        replica.close()
+        primary.close()
@@ -0,0 +1,120 @@
+import re
+
+from django.db import connection
+
+from app_vacancy.models import Resume, Vacancy
+from app_vacancy.pagination import KeysetPaginator
+
+FTS_TABLE = 'app_vacancy_vacancy_fts'
+
+INDEX_SQL = (
+    'INSERT INTO app_vacancy_vacancy_fts(rowid, title, skills, description, company_name, specialty_title) '
+    'SELECT v.id, v.title, v.skills, v.description, c.name, s.title '
+    'FROM app_vacancy_vacancy v '
+    'JOIN app_vacancy_company c ON c.id = v.company_id '
+    'JOIN app_vacancy_specialty s ON s.id = v.specialty_id'
+)
+
+# title, skills, description, company_name, specialty_title
+RANK_SQL = 'bm25(app_vacancy_vacancy_fts, 10.0, 5.0, 1.0, 3.0, 3.0)'
+
+RESUME_FTS_TABLE = 'app_vacancy_resume_fts'
+
+RESUME_INDEX_SQL = (
+    'INSERT INTO app_vacancy_resume_fts(rowid, education, experience) '
+    'SELECT r.id, r.education, r.experience FROM app_vacancy_resume r'
+)
+
+# education, experience
+RESUME_RANK_SQL = 'bm25(app_vacancy_resume_fts, 1.0, 2.0)'
+
+
+def build_match_query(query):
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _search(model, fts_table, rank_sql, query):
+    match_query = build_match_query(query)
+    if not match_query:
+        return model.objects.none()
+    return model.objects.extra(
+        select={'rank': rank_sql},
+        tables=[fts_table],
+        where=[f'{fts_table}.rowid = {model._meta.db_table}.id', f'{fts_table} MATCH %s'],
+        params=[match_query],
+        order_by=['rank', 'id'],
+    )
+
+
+def search_vacancies(query):
+    return _search(Vacancy, FTS_TABLE, RANK_SQL, query)
+
+
+def search_resumes(query):
+    return _search(Resume, RESUME_FTS_TABLE, RESUME_RANK_SQL, query)
+
+
+class SearchPaginator(KeysetPaginator):
+    ordering = ('rank', 'id')
+    rank_sql = RANK_SQL
+
+    def seek(self, queryset, values):
+        rank, row_id = values
+        # Goes into raw SQL, where nothing else would check it.
+        if not isinstance(rank, (int, float)) or not isinstance(row_id, int):
+            raise ValueError('malformed search cursor')
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            where=[f'({self.rank_sql} > %s OR ({self.rank_sql} = %s AND {table}.id > %s))'],
+            params=[rank, rank, row_id],
+        )
+
+
+class ResumeSearchPaginator(SearchPaginator):
+    rank_sql = RESUME_RANK_SQL
+
+
+def _reindex(where, params):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT v.id FROM app_vacancy_vacancy v WHERE {where})',
+            params,
+        )
+        cursor.execute(f'{INDEX_SQL} WHERE {where}', params)
+
+
+def index_vacancy(vacancy_id):
+    _reindex('v.id = %s', [vacancy_id])
+
+
+def index_company(company_id):
+    _reindex('v.company_id = %s', [company_id])
+
+
+def index_specialty(specialty_id):
+    _reindex('v.specialty_id = %s', [specialty_id])
+
+
+def unindex_vacancy(vacancy_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [vacancy_id])
+
+
+def index_resume(resume_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {RESUME_FTS_TABLE} WHERE rowid = %s', [resume_id])
+        cursor.execute(f'{RESUME_INDEX_SQL} WHERE r.id = %s', [resume_id])
+
+
+def unindex_resume(resume_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {RESUME_FTS_TABLE} WHERE rowid = %s', [resume_id])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        for table, index_sql in ((FTS_TABLE, INDEX_SQL), (RESUME_FTS_TABLE, RESUME_INDEX_SQL)):
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(index_sql)
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
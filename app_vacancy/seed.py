@@ -0,0 +1,157 @@
+from datetime import datetime, time
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from app_vacancy.models import Company, Skill, Specialty, Vacancy
+from app_vacancy.skills import split_skills
+
+BATCH_SIZE = 500
+
+SPECIALTY_FIELDS = ('title', 'picture')
+COMPANY_FIELDS = ('name', 'location', 'logo', 'description', 'employee_count')
+VACANCY_FIELDS = (
+    'title', 'specialty_id', 'company_id', 'skills', 'description', 'salary_min', 'salary_max', 'published_at',
+)
+
+
+def batches(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def prepared_values(model, obj, fields):
+    return tuple(model._meta.get_field(field).get_prep_value(getattr(obj, field)) for field in fields)
+
+
+def parse_published(value):
+    published = parse_datetime(value) or parse_date(value)
+    if published is None:
+        raise ValueError(f'Unrecognized publication date: {value!r}')
+    if not isinstance(published, datetime):
+        published = datetime.combine(published, time.min)
+    if timezone.is_naive(published):
+        published = timezone.make_aware(published, timezone.utc)
+    return published
+
+
+def touch(model, objects):
+    fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    for obj in objects:
+        for field in fields:
+            field.pre_save(obj, add=False)
+    return tuple(field.name for field in fields)
+
+
+def upsert(model, objects, key, fields):
+    existing = {
+        row[0]: (row[1], row[2:])
+        for row in model.objects
+        .filter(**{f'{key}__in': [getattr(obj, key) for obj in objects]})
+        .values_list(key, 'id', *fields)
+    }
+    new, changed = [], []
+    for obj in objects:
+        obj.id, values = existing.get(getattr(obj, key), (None, None))
+        if obj.id is None:
+            new.append(obj)
+        elif values != prepared_values(model, obj, fields):
+            changed.append(obj)
+    model.objects.bulk_create(new)
+    if changed:
+        model.objects.bulk_update(changed, fields + touch(model, changed))
+    return new, changed
+
+
+def specialty_from_row(row):
+    picture = row.get('picture') or f"{settings.MEDIA_SPECIALITY_IMAGE_DIR}/specty_{row['code']}.png"
+    return Specialty(code=row['code'], title=row['title'], picture=picture)
+
+
+def company_from_row(row):
+    return Company(
+        external_id=str(row['id']),
+        name=row['title'],
+        location=row['location'],
+        logo=f"{settings.MEDIA_COMPANY_IMAGE_DIR}/{row['logo']}" if row.get('logo') else '',
+        description=row['description'],
+        employee_count=int(row['employee_count']),
+    )
+
+
+def vacancy_from_row(row, specialty_ids, company_ids):
+    return Vacancy(
+        external_id=str(row['id']),
+        title=row['title'],
+        specialty_id=specialty_ids[row['specialty']],
+        company_id=company_ids[str(row['company'])],
+        skills=row['skills'],
+        description=row['description'],
+        salary_min=int(row['salary_from']),
+        salary_max=int(row['salary_to']),
+        published_at=parse_published(row['posted']),
+    )
+
+
+class SkillLinker:
+
+    def __init__(self):
+        self.skill_ids = dict(Skill.objects.values_list('name', 'id'))
+
+    def ids(self, names):
+        missing = names - self.skill_ids.keys()
+        if missing:
+            Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+            self.skill_ids.update(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+        return self.skill_ids
+
+    def link(self, vacancies):
+        skills_by_vacancy = {
+            vacancy_id: split_skills(skills)
+            for vacancy_id, skills in Vacancy.objects
+            .filter(external_id__in=[vacancy.external_id for vacancy in vacancies])
+            .values_list('id', 'skills')
+        }
+        skill_ids = self.ids(set().union(*skills_by_vacancy.values()))
+        Through = Vacancy.skill_tags.through
+        Through.objects.filter(vacancy_id__in=skills_by_vacancy).delete()
+        Through.objects.bulk_create(
+            [
+                Through(vacancy_id=vacancy_id, skill_id=skill_ids[name])
+                for vacancy_id, names in skills_by_vacancy.items()
+                for name in names
+            ]
+        )
+
+
+def load_specialties(rows):
+    new, changed = upsert(Specialty, [specialty_from_row(row) for row in rows], 'code', SPECIALTY_FIELDS)
+    return len(new), len(changed)
+
+
+def load_companies(rows):
+    new, changed = upsert(Company, [company_from_row(row) for row in rows], 'external_id', COMPANY_FIELDS)
+    return len(new), len(changed)
+
+
+def load_vacancies(rows, batch_size=BATCH_SIZE):
+    specialty_ids = dict(Specialty.objects.values_list('code', 'id'))
+    company_ids = dict(Company.objects.filter(external_id__isnull=False).values_list('external_id', 'id'))
+    linker = SkillLinker()
+    created = updated = 0
+    for batch in batches(rows, batch_size):
+        vacancies = [vacancy_from_row(row, specialty_ids, company_ids) for row in batch]
+        new, changed = upsert(Vacancy, vacancies, 'external_id', VACANCY_FIELDS)
+        if new or changed:
+            linker.link(new + changed)
+        if changed:
+            changed_ids = [vacancy.id for vacancy in changed]
+            Vacancy.objects.filter(pk__in=changed_ids).update(matches_stale=True, similar_stale=True)
+        created += len(new)
+        updated += len(changed)
+    return created, updated
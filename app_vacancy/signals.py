@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from app_vacancy import accounts, blobs, counters, pages, search
+from app_vacancy.cache import invalidate_catalog
+from app_vacancy.skills import release_vacancy_skills, sync_vacancy_skills
+from app_vacancy.models import Application, Company, Resume, Specialty, Vacancy
+
+
+@receiver(pre_save, sender=Vacancy)
+def vacancy_saving(sender, instance, **kwargs):
+    counters.remember_vacancy_relations(instance)
+    instance.similar_stale = True
+
+
+@receiver(pre_save, sender=Vacancy)
+@receiver(pre_save, sender=Resume)
+def match_source_saving(sender, instance, **kwargs):
+    instance.matches_stale = True
+
+
+@receiver(post_save, sender=Vacancy)
+def vacancy_saved(sender, instance, **kwargs):
+    counters.vacancy_saved(instance)
+    search.index_vacancy(instance.id)
+    sync_vacancy_skills(instance)
+
+
+@receiver(pre_delete, sender=Vacancy)
+def vacancy_deleting(sender, instance, **kwargs):
+    release_vacancy_skills(instance)
+    Resume.objects.filter(vacancy_matches__vacancy=instance).update(matches_stale=True)
+    Vacancy.objects.filter(similar__similar=instance).update(similar_stale=True)
+
+
+@receiver(pre_delete, sender=Resume)
+def resume_deleting(sender, instance, **kwargs):
+    Vacancy.objects.filter(resume_matches__resume=instance).update(matches_stale=True)
+
+
+@receiver(post_delete, sender=Vacancy)
+def vacancy_deleted(sender, instance, **kwargs):
+    counters.vacancy_deleted(instance)
+    search.unindex_vacancy(instance.id)
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.application_created(instance)
+
+
+@receiver(post_delete, sender=Application)
+def application_deleted(sender, instance, **kwargs):
+    counters.application_deleted(instance)
+
+
+@receiver(post_save, sender=Resume)
+def resume_saved(sender, instance, **kwargs):
+    search.index_resume(instance.id)
+
+
+@receiver(post_delete, sender=Resume)
+def resume_deleted(sender, instance, **kwargs):
+    search.unindex_resume(instance.id)
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created, **kwargs):
+    if not created:
+        search.index_company(instance.id)
+
+
+@receiver(post_save, sender=Specialty)
+def specialty_saved(sender, instance, created, **kwargs):
+    if not created:
+        search.index_specialty(instance.id)
+
+
+@receiver(post_save, sender=Vacancy)
+@receiver(post_delete, sender=Vacancy)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Specialty)
+@receiver(post_delete, sender=Specialty)
+def catalog_changed(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Vacancy)
+@receiver(post_delete, sender=Vacancy)
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Specialty)
+@receiver(post_delete, sender=Specialty)
+def page_source_changed(sender, instance, **kwargs):
+    pages.page_source_changed(instance)
+
+
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=Specialty)
+def file_owner_saving(sender, instance, **kwargs):
+    blobs.remember_file(instance)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_save, sender=Specialty)
+def file_owner_saved(sender, instance, **kwargs):
+    blobs.file_saved(instance)
+
+
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Specialty)
+def file_owner_deleted(sender, instance, **kwargs):
+    blobs.file_deleted(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    accounts.user_changed(instance.pk)
+
+
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=Resume)
+def user_object_saving(sender, instance, **kwargs):
+    accounts.remember_owner(instance)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def user_object_changed(sender, instance, **kwargs):
+    accounts.owner_changed(instance)
@@ -0,0 +1,294 @@
+import heapq
+import math
+import os
+import re
+from array import array
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from app_vacancy.matching import expand, replace_lists, settle, skill_terms
+from app_vacancy.models import SimilarVacancy, Vacancy
+from app_vacancy.reference import attach_companies
+from app_vacancy.seed import batches
+
+SIMILAR_COUNT = 6
+# Vacancies read from the database cursor at a time; the rows themselves are never all in memory.
+CHUNK_SIZE = 5000
+# Only the heaviest terms of each vacancy are kept, which bounds the corpus at MAX_TERMS entries per vacancy.
+MAX_TERMS = 24
+# A term in fewer vacancies links nothing, one in more than this share of them says nothing.
+MIN_DF = 2
+MAX_DF_SHARE = 0.25
+# Each term is only scored against the vacancies it weighs most in (champion lists).
+CHAMPIONS = 2000
+# Postings expanded per scoring chunk; bounds the memory of the pair arrays.
+POSTINGS_BUDGET = 2000000
+TITLE_WEIGHT = 3
+SKILL_WEIGHT = 2
+SPECIALTY_BONUS = 0.25
+
+WORD = re.compile(r'\w{3,}')
+
+
+def term_counts(title, skills, description):
+    counts = Counter(WORD.findall(strip_tags(description).lower()))
+    for word in WORD.findall(title.lower()):
+        counts[word] += TITLE_WEIGHT
+    # Skills are whole phrases, kept apart from the words of the texts.
+    for skill in skill_terms(skills):
+        counts[f'#{skill}'] += SKILL_WEIGHT
+    return counts
+
+
+def catalog_rows(ids=None):
+    rows = Vacancy.objects.order_by('id').values_list('id', 'specialty_id', 'title', 'skills', 'description')
+    if ids is None:
+        return rows.iterator(chunk_size=CHUNK_SIZE)
+    return chain.from_iterable(rows.filter(pk__in=batch) for batch in batches(ids))
+
+
+def catalog_ids():
+    ids = Vacancy.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=CHUNK_SIZE)
+    return np.fromiter(ids, dtype=np.int64)
+
+
+def build_vocabulary():
+    # term: (column, idf) of the terms worth keeping, from one streaming pass over the catalog.
+    frequency = Counter()
+    documents = 0
+    for _, _, *text in catalog_rows():
+        frequency.update(term_counts(*text).keys())
+        documents += 1
+    kept = sorted(term for term, count in frequency.items() if MIN_DF <= count <= MAX_DF_SHARE * documents)
+    return {term: (index, math.log(documents / frequency[term])) for index, term in enumerate(kept)}
+
+
+def vector(counts, vocabulary):
+    weights = []
+    for term, count in counts.items():
+        if term in vocabulary:
+            index, idf = vocabulary[term]
+            weights.append((index, (1 + math.log(count)) * idf))
+    weights = heapq.nlargest(MAX_TERMS, weights, key=itemgetter(1))
+    norm = math.sqrt(sum(weight * weight for _, weight in weights))
+    return [(index, weight / norm) for index, weight in weights]
+
+
+def vectorize(rows, vocabulary):
+    # The pruned, normalized rows as (ids, specialties, indptr, indices, data) arrays.
+    ids, specialties, indptr, indices, data = array('q'), array('q'), array('q', [0]), array('i'), array('f')
+    for id, specialty_id, *text in rows:
+        for index, weight in vector(term_counts(*text), vocabulary):
+            indices.append(index)
+            data.append(weight)
+        ids.append(id)
+        specialties.append(specialty_id)
+        indptr.append(len(indices))
+    return (
+        np.frombuffer(ids, dtype=np.int64), np.frombuffer(specialties, dtype=np.int64),
+        np.frombuffer(indptr, dtype=np.int64), np.frombuffer(indices, dtype=np.int32),
+        np.frombuffer(data, dtype=np.float32),
+    )
+
+
+def best(owners, scores, count=SIMILAR_COUNT):
+    # Pairs come grouped by owner, candidates ascending. Numbering the groups and folding the score
+    # into one float key lets a single stable sort rank every group, ties going to the older vacancy.
+    groups = np.cumsum(np.diff(owners, prepend=owners[:1]) != 0)
+    order = np.argsort(2.0 * groups + 1 - scores, kind='stable')
+    ranked = groups[order]
+    return order[np.arange(len(order)) - np.searchsorted(ranked, ranked) < count]
+
+
+class Corpus:
+    # The catalog as a sparse TF-IDF matrix, rows in CSR arrays plus an inverted index of the same entries.
+    # A full build takes two streaming passes: document frequencies first, then the pruned, normalized rows.
+    # It is stored between runs (settings.SIMILAR_CORPUS_PATH), and a refresh only vectorizes the changed
+    # vacancies, with the stored vocabulary and IDF; the full build of refresh_similar --full renews them.
+
+    def __init__(self, vocabulary, ids, specialties, indptr, indices, data):
+        self.vocabulary = vocabulary
+        self.ids = ids
+        self.specialties = specialties
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.invert(len(vocabulary))
+
+    @classmethod
+    def build(cls):
+        vocabulary = build_vocabulary()
+        return cls(vocabulary, *vectorize(catalog_rows(), vocabulary))
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as stored:
+            vocabulary = {
+                term: (index, idf) for index, (term, idf) in enumerate(zip(stored['terms'].tolist(), stored['idf']))
+            }
+            return cls(vocabulary, *(stored[name] for name in ('ids', 'specialties', 'indptr', 'indices', 'data')))
+
+    def save(self, path):
+        # Written aside and swapped in, so a reader never loads half a file.
+        terms = sorted(self.vocabulary, key=lambda term: self.vocabulary[term][0])
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as file:
+            np.savez(
+                file, terms=np.array(terms, dtype=str), idf=np.array([self.vocabulary[term][1] for term in terms]),
+                ids=self.ids, specialties=self.specialties, indptr=self.indptr, indices=self.indices, data=self.data,
+            )
+        os.replace(temporary, path)
+
+    def merged(self, changed, rows):
+        # This corpus with the rows of the changed ids replaced by the given ones (none for deleted vacancies).
+        kept = np.flatnonzero(~np.isin(self.ids, changed))
+        ids, specialties, indptr, indices, data = vectorize(rows, self.vocabulary)
+        kept_entries = expand(self.indptr[kept], self.indptr[kept + 1])
+        all_ids = np.concatenate((self.ids[kept], ids))
+        all_specialties = np.concatenate((self.specialties[kept], specialties))
+        all_indices = np.concatenate((self.indices[kept_entries], indices))
+        all_data = np.concatenate((self.data[kept_entries], data))
+        lengths = np.concatenate((np.diff(self.indptr)[kept], np.diff(indptr)))
+        starts = np.concatenate(([0], np.cumsum(lengths)))
+        # Back in id order, which positions() relies on.
+        order = np.argsort(all_ids, kind='stable')
+        entries = expand(starts[order], starts[order + 1])
+        return Corpus(
+            self.vocabulary, all_ids[order], all_specialties[order], np.concatenate(([0], np.cumsum(lengths[order]))),
+            all_indices[entries], all_data[entries],
+        )
+
+    def invert(self, terms):
+        rows = np.repeat(np.arange(len(self.ids), dtype=np.int32), np.diff(self.indptr))
+        order = np.lexsort((-self.data, self.indices))
+        starts = np.searchsorted(self.indices[order], np.arange(terms + 1))
+        rank = np.arange(len(order)) - starts[self.indices[order]]
+        order = order[rank < CHAMPIONS]
+        self.posting_rows = rows[order]
+        self.posting_weights = self.data[order]
+        self.term_starts = np.searchsorted(self.indices[order], np.arange(terms + 1))
+        # Postings one row of the matrix expands to when scored, summed up to every row.
+        entry_costs = np.diff(self.term_starts)[self.indices]
+        self.costs = np.concatenate(([0], np.cumsum(entry_costs)))[self.indptr]
+
+    def positions(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        positions = positions[positions < len(self.ids)]
+        return positions[np.isin(self.ids[positions], ids)]
+
+    def chunks(self, positions):
+        # Consecutive runs of positions whose postings together fit the budget; always at least one row.
+        spent = np.concatenate(([0], np.cumsum(self.costs[positions + 1] - self.costs[positions])))
+        start = 0
+        while start < len(positions):
+            end = max(np.searchsorted(spent, spent[start] + POSTINGS_BUDGET, 'right') - 1, start + 1)
+            yield positions[start:end]
+            start = end
+
+    def score(self, positions):
+        # Sparse product of the chunk's rows with the whole matrix, as (owner, candidate, score) arrays.
+        starts, ends = self.indptr[positions], self.indptr[positions + 1]
+        entries = expand(starts, ends)
+        owners = np.repeat(np.arange(len(positions)), ends - starts)
+        terms = self.indices[entries]
+        first, last = self.term_starts[terms], self.term_starts[terms + 1]
+        postings = expand(first, last)
+        owners = np.repeat(owners, last - first)
+        products = np.repeat(self.data[entries], last - first) * self.posting_weights[postings]
+        keys, inverse = np.unique(owners * len(self.ids) + self.posting_rows[postings], return_inverse=True)
+        cosine = np.bincount(inverse, weights=products)
+        owners, candidates = positions[keys // len(self.ids)], keys % len(self.ids)
+        scores = (cosine + SPECIALTY_BONUS * (self.specialties[owners] == self.specialties[candidates]))
+        other = owners != candidates
+        return owners[other], candidates[other], scores[other] / (1 + SPECIALTY_BONUS)
+
+    def lists(self, positions):
+        for chunk in self.chunks(positions):
+            owners, candidates, scores = self.score(chunk)
+            kept = best(owners, scores)
+            rows = zip(self.ids[owners[kept]].tolist(), self.ids[candidates[kept]].tolist(), scores[kept].tolist())
+            yield self.ids[chunk], list(rows)
+
+    def replace(self, positions):
+        replace_lists(SimilarVacancy, 'vacancy', 'similar', self.lists(positions))
+        return len(positions)
+
+    def floors(self, positions):
+        # The lowest score the full lists of the given vacancies keep; shorter lists accept anything.
+        floor = np.full(len(self.ids), -np.inf)
+        for batch in batches(self.ids[positions].tolist()):
+            rows = (
+                SimilarVacancy.objects.filter(vacancy_id__in=batch).order_by()
+                .values_list('vacancy_id')
+                .annotate(lowest=Min('score'), size=Count('id'))
+                .filter(size__gte=SIMILAR_COUNT)
+                .values_list('vacancy_id', 'lowest')
+            )
+            for vacancy_id, lowest in rows:
+                floor[np.searchsorted(self.ids, vacancy_id)] = lowest
+        return floor
+
+    def beaten(self, positions):
+        # A vacancy's list only changes if one of the given vacancies now beats its lowest kept score.
+        # Only the floors of vacancies the given ones score against at all are read.
+        best = np.full(len(self.ids), -np.inf)
+        for chunk in self.chunks(positions):
+            _, candidates, scores = self.score(chunk)
+            np.maximum.at(best, candidates, scores)
+        return best > self.floors(np.flatnonzero(best > -np.inf))
+
+
+def similar_to(vacancy_id):
+    similar = list(SimilarVacancy.objects.filter(vacancy_id=vacancy_id).select_related('similar'))
+    attach_companies(item.similar for item in similar)
+    return similar
+
+
+def stored_corpus(stale):
+    # The stored corpus with the stale vacancies vectorized again, deleted ones dropped and any it misses
+    # added; only those rows are read and tokenized. Without a stored corpus, a full build.
+    corpus = Corpus.load(settings.SIMILAR_CORPUS_PATH)
+    if corpus is None:
+        corpus = Corpus.build()
+    else:
+        ids = catalog_ids()
+        changed = np.union1d(np.setxor1d(corpus.ids, ids), stale)
+        corpus = corpus.merged(changed, catalog_rows(changed[np.isin(changed, ids)].tolist()))
+    corpus.save(settings.SIMILAR_CORPUS_PATH)
+    return corpus
+
+
+def rebuild_similar():
+    started = timezone.now()
+    corpus = Corpus.build()
+    corpus.save(settings.SIMILAR_CORPUS_PATH)
+    refreshed = corpus.replace(np.arange(len(corpus.ids)))
+    settle(Vacancy.objects.all(), started, flag='similar_stale')
+    return refreshed
+
+
+def refresh_stale(limit=1000):
+    # Stale vacancies get new lists, and so does every vacancy that listed one of them or now ranks one higher.
+    started = timezone.now()
+    stale = list(Vacancy.objects.filter(similar_stale=True).order_by('id').values_list('id', flat=True)[:limit])
+    if not stale:
+        return 0, 0
+    listing = SimilarVacancy.objects.filter(similar_id__in=stale).values_list('vacancy_id', flat=True)
+    corpus = stored_corpus(stale)
+    positions = corpus.positions(stale)
+    redo = corpus.beaten(positions)
+    redo[positions] = True
+    redo[corpus.positions(sorted(set(listing)))] = True
+    refreshed = corpus.replace(np.flatnonzero(redo))
+    settle(Vacancy.objects.filter(pk__in=stale), started, flag='similar_stale')
+    return len(stale), refreshed
@@ -0,0 +1,47 @@
+from random import sample
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from app_vacancy.models import Skill
+
+SKILL_CLOUD_POOL = 30
+SKILL_CLOUD_SIZE = 5
+
+
+def split_skills(skills):
+    return {skill.strip() for skill in skills.split(',') if skill.strip()}
+
+
+def sync_vacancy_skills(vacancy):
+    names = split_skills(vacancy.skills)
+    current = set(vacancy.skill_tags.values_list('name', flat=True))
+    removed_names = current - names
+    if removed_names:
+        removed = Skill.objects.filter(name__in=removed_names)
+        vacancy.skill_tags.remove(*removed)
+        removed.update(vacancies_count=Greatest(F('vacancies_count') - 1, 0))
+    added_names = names - current
+    if added_names:
+        Skill.objects.bulk_create([Skill(name=name) for name in added_names], ignore_conflicts=True)
+        added = Skill.objects.filter(name__in=added_names)
+        vacancy.skill_tags.add(*added)
+        added.update(vacancies_count=F('vacancies_count') + 1)
+
+
+def release_vacancy_skills(vacancy):
+    # Floored at zero like the other counters: a drifted count must not fail the delete.
+    vacancy.skill_tags.update(vacancies_count=Greatest(F('vacancies_count') - 1, 0))
+
+
+def top_skills(limit=SKILL_CLOUD_POOL):
+    return list(
+        Skill.objects
+        .filter(vacancies_count__gt=0)
+        .order_by('-vacancies_count')
+        .values_list('name', flat=True)[:limit]
+    )
+
+
+def random_skills(skills):
+    return sample(skills, min(SKILL_CLOUD_SIZE, len(skills)))
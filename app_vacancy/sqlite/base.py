@@ -0,0 +1,27 @@
+from django.db.backends.sqlite3 import base
+
+# Options this backend reads itself instead of passing them on to sqlite3.connect().
+BACKEND_OPTIONS = ('pragmas', 'transaction_mode')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # The stock SQLite backend with two more OPTIONS: pragmas run on every new connection (only those
+    # scoped to the connection belong there, the file's journal_mode is set by a migration), and
+    # transaction_mode for BEGIN. With IMMEDIATE a transaction takes the write lock up front, waiting
+    # out busy_timeout, rather than failing at once when a read inside it has to become a write.
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in BACKEND_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+HASHED_NAME = re.compile(r'^(?P<directory>.*?)/?[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_hashed(name):
+    return HASHED_NAME.match(name) is not None
+
+
+def content_digest(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def hashed_name(self, name, content):
+        name = name.replace('\\', '/')
+        directory, filename = posixpath.split(name)
+        if is_hashed(name):
+            directory = HASHED_NAME.match(name).group('directory')
+        digest = content_digest(content)
+        extension = os.path.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def save_variant(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        return self._save(name, content)
+
+
+blob_storage = ContentAddressedStorage()
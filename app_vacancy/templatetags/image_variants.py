@@ -0,0 +1,58 @@
+import re
+
+from django import template
+
+from app_vacancy.images import WEBP, ready_among, variant_name
+from app_vacancy.storage import blob_storage
+
+register = template.Library()
+
+# Inside {% image_variants %} every image_variant is left as a marker until the whole block is rendered.
+MARKER = '@@image-variant-{}@@'
+MARKERS = re.compile(r'@@image-variant-(\d+)@@')
+PENDING = 'image_variants_pending'
+
+
+def accepts_webp(context):
+    request = context.get('request')
+    return request is not None and 'image/webp' in request.META.get('HTTP_ACCEPT', '')
+
+
+def variant_url(name, size, extension, ready):
+    return blob_storage.url(variant_name(name, size, extension) if name in ready else name)
+
+
+@register.simple_tag(takes_context=True)
+def image_variant(context, image, size):
+    name = getattr(image, 'name', image)
+    if not name:
+        return ''
+    extension = WEBP if accepts_webp(context) else None
+    pending = context.render_context.get(PENDING)
+    if pending is None:
+        return variant_url(name, size, extension, ready_among([name]))
+    pending.append((name, size, extension))
+    return MARKER.format(len(pending) - 1)
+
+
+class ImageVariantsNode(template.Node):
+
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        pending = context.render_context[PENDING] = []
+        try:
+            content = self.nodelist.render(context)
+        finally:
+            del context.render_context[PENDING]
+        ready = ready_among(name for name, _, _ in pending)
+        return MARKERS.sub(lambda match: variant_url(*pending[int(match.group(1))], ready), content)
+
+
+@register.tag
+def image_variants(parser, token):
+    # Looks up whether the images of the page have variants in one go instead of one image at a time.
+    nodelist = parser.parse(('endimage_variants',))
+    parser.delete_first_token()
+    return ImageVariantsNode(nodelist)
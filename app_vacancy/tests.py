@@ -1,2 +1,931 @@
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F, QuerySet
+from django.http import QueryDict
+from django.contrib.auth.models import AnonymousUser
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve
+from django.utils import timezone
+from PIL import Image
+
+from app_vacancy import accounts, async_views, blobs, matching, metrics, pages, reference, similar
+from app_vacancy.cache import CATALOG, HOMEPAGE, acquire_lock, get_or_compute, get_version, release_lock
+from app_vacancy.export import csv_lines
+from app_vacancy.forms import MyResumeForm
+from app_vacancy.matching import Rows, expand, top_k
+from app_vacancy.images import process_pending
+from app_vacancy.middleware import assert_within_query_budget
+from app_vacancy.models import (
+    VARIANTS_FAILED, VARIANTS_READY, Application, Blob, Company, Resume, Skill, Specialty, Vacancy,
+)
+from app_vacancy.pagination import CURSOR_PARAM, KeysetPaginator, encode_cursor
+from app_vacancy.routers import PIN_COOKIE, PRIMARY, PrimaryReplicaRouter, Routing, pick_replica, routing
+from app_vacancy.storage import blob_storage
+from app_vacancy.transactions import atomic_save
+from vacancies import urls
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TEST_METRICS_DIR = os.path.join(tempfile.gettempdir(), 'vacancies-test-metrics')
+TEST_LOCK_DIR = os.path.join(tempfile.gettempdir(), 'vacancies-test-locks')
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR=TEST_METRICS_DIR, CACHE_LOCK_DIR=TEST_LOCK_DIR)
+class CatalogTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.specialty = Specialty.objects.create(code='backend', title='Бэкенд', picture='backend.png')
+        cls.company = Company.objects.create(
+            name='Рога и копыта', location='Москва', logo='logo.png', description='', employee_count=10,
+        )
+        cls.vacancy = Vacancy.objects.create(
+            title='Python разработчик', specialty=cls.specialty, company=cls.company, skills='Python, Django',
+            description='', salary_min=100000, salary_max=150000,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+
+class SearchTests(CatalogTestCase):
+
+    def test_query_without_words_finds_nothing(self):
+        for url in ('/search?search=%22', '/search?search=---', '/search?skill=Python&search=!!'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, self.vacancy.title)
+
+    def test_api_query_without_words_finds_nothing(self):
+        response = self.client.get('/api/v1/vacancies?search=!!')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.vacancy.title)
+
+    def test_query_finds_vacancy(self):
+        response = self.client.get('/search?search=python')
+        self.assertContains(response, self.vacancy.title)
+
+
+class CursorTests(CatalogTestCase):
+
+    def test_tampered_cursor_starts_over(self):
+        cursors = ('W251bGwsbnVsbF0=', encode_cursor(['x', 'y']), encode_cursor([[1], {}]), 'not-base64')
+        for url in ('/vacancies', '/search?search=python', '/api/v1/vacancies', '/api/v1/vacancies?search=python'):
+            for cursor in cursors:
+                with self.subTest(url=url, cursor=cursor):
+                    separator = '&' if '?' in url else '?'
+                    response = self.client.get(f'{url}{separator}after={cursor}')
+                    self.assertContains(response, self.vacancy.title)
+
+    def test_rows_tied_on_the_sort_key_span_pages(self):
+        published_at = timezone.now().replace(microsecond=123456)
+        Vacancy.objects.bulk_create(
+            Vacancy(
+                title=f'Вакансия {number}', specialty=self.specialty, company=self.company, skills='Python',
+                description='', salary_min=1, salary_max=2, published_at=published_at,
+            )
+            for number in range(31)
+        )
+        seen, query = [], QueryDict(mutable=True)
+        while True:
+            page = KeysetPaginator(Vacancy.objects.all()).page(query)
+            seen += [vacancy.pk for vacancy in page]
+            if not page.has_next:
+                break
+            query[CURSOR_PARAM] = page.next_cursor
+        self.assertEqual(sorted(seen), sorted(Vacancy.objects.values_list('pk', flat=True)))
+
+
+class ResumeSearchTests(CatalogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.employer = get_user_model().objects.create_user('employer', password='password')
+        Company.objects.filter(pk=cls.company.pk).update(owner=cls.employer)
+        cls.resume = Resume.objects.create(
+            name='Иван', surname='Петров', status='Ищу работу', salary=100000, specialty=cls.specialty,
+            grade='Middle', education='МГУ', experience='Python и Django', portfolio='https://example.com',
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.employer)
+
+    def test_query_without_words_finds_nothing(self):
+        response = self.client.get('/mycompany/resumes?search=%22')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.resume.surname)
+
+    def test_query_finds_resume(self):
+        response = self.client.get('/mycompany/resumes?search=django')
+        self.assertContains(response, self.resume.surname)
+
+
+class ExportTests(CatalogTestCase):
+
+    def test_csv_cells_are_never_formulas(self):
+        cells = ['=HYPERLINK("http://example.com")', '+7 900', '-1', '@SUM(A1)', '\tx', '\rx', 'Иван', -5, None]
+        lines = list(csv_lines(['a'] * len(cells), [cells]))
+        self.assertEqual(
+            lines[1], '"\'=HYPERLINK(""http://example.com"")",\'+7 900,\'-1,\'@SUM(A1),\'\tx,"\'\rx",Иван,-5,\r\n',
+        )
+
+
+class AtomicSaveTests(CatalogTestCase):
+
+    def test_upload_is_stored_before_the_transaction(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        depth = len(connection.savepoint_ids)
+        depths = []
+
+        def save(name, content):
+            depths.append(len(connection.savepoint_ids))
+            return name
+
+        self.company.logo = SimpleUploadedFile('logo.png', b'logo')
+        with override_settings(MEDIA_ROOT=media), mock.patch.object(blob_storage, '_save', side_effect=save):
+            atomic_save(self.company)
+        self.assertEqual(depths, [depth])
+        self.assertTrue(Company.objects.filter(pk=self.company.pk, logo=self.company.logo.name).exists())
+
+
+class CounterTests(CatalogTestCase):
+
+    def test_saving_keeps_concurrent_counts(self):
+        company = Company.objects.get(pk=self.company.pk)
+        vacancy = Vacancy.objects.get(pk=self.vacancy.pk)
+        Company.objects.filter(pk=company.pk).update(vacancies_count=F('vacancies_count') + 5)
+        Vacancy.objects.filter(pk=vacancy.pk).update(applications_count=F('applications_count') + 2)
+        company.name = 'Копыта и рога'
+        company.save()
+        vacancy.title = 'Django разработчик'
+        vacancy.save()
+        self.assertEqual(
+            Company.objects.values_list('name', 'vacancies_count').get(pk=company.pk),
+            ('Копыта и рога', company.vacancies_count + 5),
+        )
+        self.assertEqual(
+            Vacancy.objects.values_list('title', 'applications_count').get(pk=vacancy.pk),
+            ('Django разработчик', vacancy.applications_count + 2),
+        )
+
+    def test_drifted_counts_do_not_fail_a_delete(self):
+        Company.objects.update(vacancies_count=0)
+        Specialty.objects.update(vacancies_count=0)
+        Vacancy.objects.get(pk=self.vacancy.pk).delete()
+        self.assertEqual(Company.objects.get(pk=self.company.pk).vacancies_count, 0)
+        self.assertEqual(Specialty.objects.get(pk=self.specialty.pk).vacancies_count, 0)
+
+    def test_drifted_skill_counts_do_not_fail_a_save(self):
+        Skill.objects.update(vacancies_count=0)
+        vacancy = Vacancy.objects.get(pk=self.vacancy.pk)
+        vacancy.skills = 'Python'
+        vacancy.save()
+        vacancy.delete()
+        self.assertEqual(set(Skill.objects.values_list('vacancies_count', flat=True)), {0})
+
+
+class InboxTests(CatalogTestCase):
+
+    def setUp(self):
+        super().setUp()
+        employer = get_user_model().objects.create_user('employer')
+        Company.objects.filter(pk=self.company.pk).update(owner=employer)
+        self.client.force_login(employer)
+        self.applications = [
+            Application.objects.create(
+                written_username=f'Соискатель {number}', written_phone='+7 900 000-00-00',
+                written_cover_letter='Здравствуйте', vacancy=self.vacancy, company=self.company,
+            )
+            for number in range(2)
+        ]
+
+    def counts(self):
+        return Vacancy.objects.values_list('applications_count', 'unread_applications_count').get(pk=self.vacancy.pk)
+
+    def test_viewing_the_inbox_marks_nothing_read(self):
+        response = self.client.get('/mycompany/applications')
+        self.assertContains(response, 'Отметить прочитанными')
+        self.assertEqual(self.counts(), (2, 2))
+
+    def test_marking_read(self):
+        other = Company.objects.create(name='Другая', location='Казань', logo='', description='', employee_count=1)
+        foreign = Application.objects.create(written_username='Чужой', vacancy=self.vacancy, company=other)
+        ids = [str(self.applications[0].pk), str(foreign.pk), 'x']
+        response = self.client.post('/mycompany/applications/read', {'id': ids, 'next': '/mycompany/applications'})
+        self.assertRedirects(response, '/mycompany/applications')
+        self.assertEqual(self.counts(), (3, 2))
+        self.assertFalse(Application.objects.get(pk=foreign.pk).is_read)
+
+    def test_deleting_updates_counts(self):
+        self.client.post('/mycompany/applications/read', {'id': [str(self.applications[0].pk)]})
+        Application.objects.get(pk=self.applications[0].pk).delete()
+        self.assertEqual(self.counts(), (1, 1))
+        self.applications[1].delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+
+class PageCacheTests(CatalogTestCase):
+
+    def request(self, url):
+        request = RequestFactory().get(url)
+        request.resolver_match = resolve(request.path)
+        request.user = AnonymousUser()
+        return request
+
+    def test_logged_in_users_get_their_own_page(self):
+        self.client.get('/vacancies')
+        user = get_user_model().objects.create_user('visitor', first_name='Мария', last_name='Кузнецова')
+        self.client.force_login(user)
+        response = self.client.get('/vacancies')
+        self.assertContains(response, 'Мария Кузнецова')
+        self.assertFalse(pages.cacheable(response.wsgi_request))
+
+    def test_only_known_params_are_cached(self):
+        self.assertTrue(pages.cacheable(self.request('/vacancies?after=' + encode_cursor(['2026-01-01', 1]))))
+        for url in ('/vacancies?utm_source=mail', '/vacancies?after=a&after=b', f'/vacancies/{self.vacancy.pk}/?x=1'):
+            with self.subTest(url=url):
+                self.assertFalse(pages.cacheable(self.request(url)))
+
+    def test_key_ignores_what_the_page_ignores(self):
+        key = pages.page_key(self.request('/vacancies'))
+        for url in ('/vacancies?after=', '/vacancies?after=not-a-cursor', '/vacancies?after=' + encode_cursor({})):
+            with self.subTest(url=url):
+                self.assertEqual(pages.page_key(self.request(url)), key)
+        self.assertNotEqual(pages.page_key(self.request('/?search=Python')), pages.page_key(self.request('/')))
+
+
+class CacheLockTests(CatalogTestCase):
+
+    def test_only_the_lock_holder_recomputes(self):
+        cache.set(f'{HOMEPAGE}:stale:key', 'stale')
+        lock = acquire_lock(f'{HOMEPAGE}:{get_version(HOMEPAGE)}:key')
+        self.assertIsNone(acquire_lock(f'{HOMEPAGE}:{get_version(HOMEPAGE)}:key'))
+        self.assertEqual(get_or_compute(HOMEPAGE, 'key', lambda: 'fresh'), 'stale')
+        release_lock(lock)
+        self.assertEqual(get_or_compute(HOMEPAGE, 'key', lambda: 'fresh'), 'fresh')
+
+    def test_abandoned_lock_expires(self):
+        lock = acquire_lock('abandoned')
+        os.utime(lock, (0, 0))
+        self.assertEqual(acquire_lock('abandoned'), lock)
+        self.assertIsNone(acquire_lock('abandoned'))
+        release_lock(lock)
+
+
+@override_settings(CACHES=TEST_CACHES, METRICS_DIR=TEST_METRICS_DIR, CACHE_LOCK_DIR=TEST_LOCK_DIR)
+class CommittedCatalogTestCase(TransactionTestCase):
+    # Caches are invalidated once the rows are committed; TestCase never commits, so these run outside it.
+
+    def setUp(self):
+        cache.clear()
+        self.specialty = Specialty.objects.create(code='backend', title='Бэкенд', picture='backend.png')
+        self.company = Company.objects.create(
+            name='Рога и копыта', location='Москва', logo='logo.png', description='', employee_count=10,
+        )
+        self.vacancy = Vacancy.objects.create(
+            title='Python разработчик', specialty=self.specialty, company=self.company, skills='Python, Django',
+            description='', salary_min=100000, salary_max=150000,
+        )
+
+
+class CommitTests(CommittedCatalogTestCase):
+
+    def test_catalog_version_changes_on_commit(self):
+        before = {namespace: get_version(namespace) for namespace in (HOMEPAGE, CATALOG)}
+        with transaction.atomic():
+            self.vacancy.title = 'Django разработчик'
+            self.vacancy.save()
+            self.assertEqual({namespace: get_version(namespace) for namespace in before}, before)
+        for namespace, version in before.items():
+            self.assertNotEqual(get_version(namespace), version)
+
+    def test_page_versions_change_on_commit(self):
+        namespace = f'vacancy:{self.vacancy.pk}'
+        before = get_version(namespace)
+        with transaction.atomic():
+            self.vacancy.save()
+            self.assertEqual(get_version(namespace), before)
+        self.assertNotEqual(get_version(namespace), before)
+
+    def test_cached_company_page_follows_its_specialties(self):
+        url = f'/companies/{self.company.pk}/'
+        self.assertContains(self.client.get(url), 'Бэкенд')
+        self.specialty.title = 'Серверная'
+        self.specialty.save()
+        self.assertContains(self.client.get(url), 'Серверная')
+
+
+class ReferenceDataTests(CommittedCatalogTestCase):
+
+    def titles(self):
+        return [specialty.title for specialty in reference.all_specialties()]
+
+    def test_snapshot_is_rebuilt_once_the_stamp_changes(self):
+        self.assertEqual(self.titles(), ['Бэкенд'])
+        # Without a new stamp the worker keeps its copy.
+        Specialty.objects.filter(pk=self.specialty.pk).update(title='Серверная')
+        self.assertEqual(self.titles(), ['Бэкенд'])
+        self.specialty.title = 'Серверная'
+        self.specialty.save()
+        added = Specialty.objects.create(code='frontend', title='Фронтенд', picture='frontend.png')
+        self.assertEqual(self.titles(), ['Серверная', 'Фронтенд'])
+        field = MyResumeForm().fields['specialty']
+        self.assertEqual([label for _, label in field.choices][1:], ['Серверная', 'Фронтенд'])
+        self.assertEqual(field.clean(str(added.pk)).title, 'Фронтенд')
+        Specialty.objects.filter(pk=added.pk).delete()
+        with self.assertRaises(ValidationError):
+            MyResumeForm().fields['specialty'].clean(str(added.pk))
+
+    def test_request_compares_the_stamp_once(self):
+        token = reference.checked.set(False)
+        try:
+            self.assertEqual(self.titles(), ['Бэкенд'])
+            self.specialty.title = 'Серверная'
+            self.specialty.save()
+            self.assertEqual(self.titles(), ['Бэкенд'])
+        finally:
+            reference.checked.reset(token)
+        self.assertEqual(self.titles(), ['Серверная'])
+
+
+class ConditionalApiTests(CommittedCatalogTestCase):
+
+    def test_unchanged_catalog_is_not_modified(self):
+        response = self.client.get('/api/v1/vacancies')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/vacancies', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        url = f'/api/v1/vacancies/{self.vacancy.pk}/'
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_saved_vacancy_changes_the_etag_on_commit(self):
+        etag = self.client.get('/api/v1/vacancies')['ETag']
+        with transaction.atomic():
+            self.vacancy.title = 'Django разработчик'
+            self.vacancy.save()
+            # Until the commit other requests still read the old rows.
+            self.assertEqual(self.client.get('/api/v1/vacancies', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get('/api/v1/vacancies', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][0]['title'], 'Django разработчик')
+
+
+@override_settings(REPLICAS=['replica1'])
+class RouterTests(SimpleTestCase):
+    router = PrimaryReplicaRouter()
+
+    def request(self, method, path, **extra):
+        request = getattr(RequestFactory(), method)(path, **extra)
+        request.resolver_match = resolve(path)
+        return request
+
+    def read(self, state, model=Vacancy):
+        token = routing.set(state)
+        try:
+            return self.router.db_for_read(model)
+        finally:
+            routing.reset(token)
+
+    def test_only_unpinned_catalog_reads_pick_a_replica(self):
+        self.assertEqual(pick_replica(self.request('get', '/vacancies')), 'replica1')
+        self.assertIsNone(pick_replica(self.request('get', '/vacancies', HTTP_COOKIE=f'{PIN_COOKIE}=1')))
+        self.assertIsNone(pick_replica(self.request('post', '/vacancies/1/')))
+        self.assertIsNone(pick_replica(self.request('get', '/myresume')))
+        with self.settings(REPLICAS=[]):
+            self.assertIsNone(pick_replica(self.request('get', '/vacancies')))
+
+    def test_reads_go_to_the_replica_until_the_request_writes(self):
+        state = Routing()
+        self.assertEqual(self.read(None), PRIMARY)
+        self.assertEqual(self.read(state), PRIMARY)
+        state.replica = 'replica1'
+        self.assertEqual(self.read(state), 'replica1')
+        self.assertEqual(self.read(state, get_user_model()), PRIMARY)
+        token = routing.set(state)
+        try:
+            self.assertEqual(self.router.db_for_write(Vacancy), PRIMARY)
+        finally:
+            routing.reset(token)
+        self.assertEqual(self.read(state), PRIMARY)
+
+
+@override_settings(REPLICAS=['replica1'])
+class ReadYourWritesTests(CommittedCatalogTestCase):
+    # The test database stands in for the replica: reads are only recorded where they would have gone.
+
+    def reads(self, method, url, data=None):
+        # From a cold cache, so the page is read rather than served whole.
+        cache.clear()
+        routed, db_for_read = [], PrimaryReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append(db_for_read(router, model, **hints))
+            return PRIMARY
+
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', record):
+            response = getattr(self.client, method)(url, data)
+        return response, set(routed)
+
+    def test_reads_after_a_post_stay_on_the_primary(self):
+        url = f'/vacancies/{self.vacancy.pk}/'
+        self.assertIn('replica1', self.reads('get', url)[1])
+        response, routed = self.reads('post', url, {
+            'written_username': 'Иван', 'written_phone': '+7 900 000-00-00', 'written_cover_letter': 'Здравствуйте',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(routed, {PRIMARY})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.reads('get', url)[1], {PRIMARY})
+        del self.client.cookies[PIN_COOKIE]
+        self.assertIn('replica1', self.reads('get', url)[1])
+
+
+def reload_urls():
+    # urls.py picks the read views once, on import.
+    importlib.reload(urls)
+    clear_url_caches()
+
+
+@override_settings(ASYNC_VIEWS=True, QUERY_BUDGET_STRICT=True)
+class AsyncViewTests(CommittedCatalogTestCase):
+    # The async views run their queries in a thread pool, on connections of its own: TestCase's
+    # transaction would hide its rows from them.
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reload_urls()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        reload_urls()
+
+    async def get(self, url):
+        cache.clear()
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(issubclass(response.asgi_request.resolver_match.func.view_class, async_views.AsyncView))
+        return response
+
+    async def test_read_pages(self):
+        urls = [
+            '/search?search=python', '/vacancies', '/vacancies/cat/backend/', f'/companies/{self.company.pk}/',
+            f'/vacancies/{self.vacancy.pk}/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.get(url)
+                self.assertContains(response, 'Python разработчик')
+                assert_within_query_budget(response)
+        self.assertContains(await self.get('/'), 'Рога и копыта')
+        self.assertEqual((await self.async_client.get('/vacancies/cat/nope/')).status_code, 404)
+
+    async def test_queries_in_the_thread_pool_are_counted(self):
+        url = f'/vacancies/{self.vacancy.pk}/'
+        stats = (await self.get(url)).asgi_request.query_stats
+        with override_settings(ASYNC_VIEWS=False):
+            reload_urls()
+            cache.clear()
+            expected = (await self.async_client.get(url)).asgi_request.query_stats
+        reload_urls()
+        self.assertGreater(stats.count, 0)
+        self.assertEqual(stats.count, expected.count)
+
+
+class MatchingTests(CatalogTestCase):
+    # With Python, Django and Python, Kafka the skill weights are log(3) and log(2) over their sum.
+    RARE, COMMON = np.log(3) / np.log(6), np.log(2) / np.log(6)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.kafka = Vacancy.objects.create(
+            title='Kafka разработчик', specialty=cls.specialty, company=cls.company, skills='Python, Kafka',
+            description='', salary_min=200000, salary_max=250000,
+        )
+        cls.django = cls.resume('Python и Django', 120000)
+        cls.streams = cls.resume('Kafka', 180000)
+        cls.accountant = cls.resume('Бухгалтерия', 220000)
+        matching.rebuild_matches()
+
+    @classmethod
+    def resume(cls, experience, salary):
+        return Resume.objects.create(
+            name='Иван', surname='Петров', status='Ищу работу', salary=salary, specialty=cls.specialty,
+            grade='Middle', education='', experience=experience, portfolio='https://example.com',
+        )
+
+    def assertListed(self, matches, expected):
+        self.assertEqual([row[0] for row in matches], [row[0].pk for row in expected])
+        np.testing.assert_allclose([row[1] for row in matches], [row[1] for row in expected], rtol=1e-5)
+
+    def test_product_and_top_k(self):
+        rows = Rows.build([([0, 2], [1, 2]), ([1], [3])], 3)
+        other = Rows.build([([0], [1]), ([0, 1], [2, 1]), ([1], [4])], 2)
+        dense = np.array([[1, 0, 2], [0, 3, 0]]) @ np.array([[1, 0], [2, 1], [0, 4]])
+        np.testing.assert_allclose(rows.product(np.array([1, 0]), other), dense[[1, 0]])
+        self.assertEqual(expand(np.array([0, 2]), np.array([2, 3])).tolist(), [0, 1, 2])
+        self.assertEqual(top_k(np.array([[0.1, 0.9, 0.5], [0.3, 0.2, 0.7]]), k=2).tolist(), [[1, 2], [2, 0]])
+
+    def test_rebuild_scores_skills_and_the_salary_range(self):
+        # Within the range salary scores full marks; 30000 above a 150000 maximum loses 30000 / 75000.
+        self.assertListed(self.vacancy.resume_matches.values_list('resume_id', 'score'), [
+            (self.django, 1), (self.streams, 0.3 * 0.6), (self.accountant, 0.3 * (1 - 70000 / 75000)),
+        ])
+        # 80000 below a 200000 minimum loses 80000 / 100000.
+        self.assertListed(self.kafka.resume_matches.values_list('resume_id', 'score'), [
+            (self.streams, 0.7 * self.RARE + 0.3 * 0.8), (self.django, 0.7 * self.COMMON + 0.3 * 0.2),
+            (self.accountant, 0.3),
+        ])
+        self.assertListed(self.django.vacancy_matches.values_list('vacancy_id', 'score'), [
+            (self.vacancy, 1), (self.kafka, 0.7 * self.COMMON + 0.3 * 0.2),
+        ])
+
+    def test_refresh_relists_a_changed_vacancy(self):
+        Vacancy.objects.filter(pk=self.kafka.pk).update(salary_min=100000, matches_stale=True)
+        self.assertEqual(matching.refresh_stale(), (1, 1, 3))
+        self.assertListed(self.kafka.resume_matches.values_list('resume_id', 'score'), [
+            (self.streams, 0.7 * self.RARE + 0.3), (self.django, 0.7 * self.COMMON + 0.3), (self.accountant, 0.3),
+        ])
+        self.assertListed(self.django.vacancy_matches.values_list('vacancy_id', 'score'), [
+            (self.vacancy, 1), (self.kafka, 0.7 * self.COMMON + 0.3),
+        ])
+        self.assertFalse(Vacancy.objects.filter(matches_stale=True).exists())
+
+    def test_refresh_relists_a_changed_resume(self):
+        self.streams.experience = 'Python, Django'
+        self.streams.salary = 160000
+        self.streams.save()
+        self.assertEqual(matching.refresh_stale(), (1, 2, 1))
+        self.assertListed(self.vacancy.resume_matches.values_list('resume_id', 'score'), [
+            (self.django, 1), (self.streams, 0.7 + 0.3 * (1 - 10000 / 75000)),
+            (self.accountant, 0.3 * (1 - 70000 / 75000)),
+        ])
+        self.assertListed(self.streams.vacancy_matches.values_list('vacancy_id', 'score'), [
+            (self.vacancy, 0.7 + 0.3 * (1 - 10000 / 75000)), (self.kafka, 0.7 * self.COMMON + 0.3 * 0.6),
+        ])
+
+
+@override_settings(SIMILAR_CORPUS_PATH=os.path.join(tempfile.gettempdir(), 'vacancies-test-corpus.npz'))
+class SimilarTests(CatalogTestCase):
+
+    def create(self, description):
+        return Vacancy.objects.create(
+            title='Вакансия', specialty=self.specialty, company=self.company, skills='', description=description,
+            salary_min=1, salary_max=2,
+        )
+
+    def listed(self, vacancy):
+        return list(vacancy.similar.values_list('similar_id', flat=True))
+
+    def test_expand_and_best(self):
+        self.assertEqual(expand(np.array([2, 7, 9]), np.array([4, 8, 9])).tolist(), [2, 3, 7])
+        owners, scores = np.array([0, 0, 0, 1, 1]), np.array([0.1, 0.9, 0.5, 0.3, 0.4])
+        self.assertEqual(similar.best(owners, scores, count=2).tolist(), [1, 2, 4, 3])
+
+    def test_score(self):
+        # Three vacancies over two terms: kafka, kafka and redis, redis; the last in another specialty.
+        corpus = similar.Corpus(
+            {'kafka': (0, 1.0), 'redis': (1, 1.0)}, np.array([10, 11, 12]), np.array([1, 1, 2]),
+            np.array([0, 1, 3, 4]), np.array([0, 0, 1, 1], dtype=np.int32),
+            np.array([1, 0.6, 0.8, 1], dtype=np.float32),
+        )
+        owners, candidates, scores = corpus.score(np.array([1]))
+        self.assertEqual((owners.tolist(), candidates.tolist()), ([1, 1], [0, 2]))
+        # Cosine plus the bonus for the same specialty, scaled back to at most one.
+        np.testing.assert_allclose(scores, [(0.6 + 0.25) / 1.25, 0.8 / 1.25], rtol=1e-6)
+
+    def test_refresh_ranks_a_changed_vacancy(self):
+        first = self.create('kafka kafka kafka redis')
+        second, third = self.create('kafka'), self.create('redis')
+        for number in range(10):
+            self.create(f'filler{number // 2}')
+        similar.rebuild_similar()
+        self.assertEqual(self.listed(first), [second.pk, third.pk])
+        third.description = 'kafka kafka kafka redis'
+        third.save()
+        self.assertEqual(similar.refresh_stale(), (1, 3))
+        self.assertEqual(self.listed(first), [third.pk, second.pk])
+        self.assertFalse(Vacancy.objects.filter(similar_stale=True).exists())
+
+
+class MetricsTests(CatalogTestCase):
+
+    def test_server_timing_only_for_metrics_readers(self):
+        self.assertIn('Server-Timing', self.client.get('/'))
+        self.assertNotIn('Server-Timing', self.client.get('/', REMOTE_ADDR='192.0.2.1'))
+        self.client.force_login(get_user_model().objects.create_user('staff', is_staff=True))
+        self.assertIn('Server-Timing', self.client.get('/', REMOTE_ADDR='192.0.2.1'))
+
+    def test_files_of_exited_workers_are_merged(self):
+        shutil.rmtree(TEST_METRICS_DIR, ignore_errors=True)
+        metrics.store().flush()
+        exited = os.path.join(TEST_METRICS_DIR, '999999-exited.json')
+        with open(exited, 'w') as file:
+            file.write('{"vacancies_db_queries": {"gone": [1, 0, 0, 0, 0, 0, 0, 0, 0, 0]}}')
+        with mock.patch.object(metrics, 'alive', side_effect=lambda pid: pid == os.getpid()):
+            for _ in range(2):
+                self.assertEqual(metrics.collect()['vacancies_db_queries']['gone'][0], 1)
+        self.assertFalse(os.path.exists(exited))
+        self.assertEqual(set(os.listdir(TEST_METRICS_DIR)), {os.path.basename(metrics.store().path), 'totals.json'})
+
+
+def image_bytes(image_format):
+    output = io.BytesIO()
+    Image.new('RGB', (300, 200), 'teal').save(output, image_format)
+    return output.getvalue()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_every_pending_blob_is_marked(self):
+        files = {
+            'images/photo.jfif': image_bytes('JPEG'),
+            'images/scan.tif': image_bytes('TIFF'),
+            'images/broken.png': b'not an image',
+            'images/vector.svg': b'<svg xmlns="http://www.w3.org/2000/svg"/>',
+        }
+        for name, content in files.items():
+            blob_storage._save(name, ContentFile(content))
+            Blob.objects.create(name=name, references=1)
+        with self.assertLogs('app_vacancy.images', 'ERROR'):
+            self.assertEqual(process_pending(), len(files))
+        self.assertEqual(dict(Blob.objects.values_list('name', 'variants')), {
+            'images/photo.jfif': VARIANTS_READY,
+            'images/scan.tif': VARIANTS_READY,
+            'images/broken.png': VARIANTS_FAILED,
+            'images/vector.svg': VARIANTS_FAILED,
+        })
+        self.assertTrue(blob_storage.exists('images/photo-card.jfif'))
+        self.assertTrue(blob_storage.exists('images/scan-icon.webp'))
+
+    def test_page_looks_up_its_images_at_once(self):
+        blob_storage._save('images/photo.jpg', ContentFile(image_bytes('JPEG')))
+        Blob.objects.create(name='images/photo.jpg', references=1)
+        Blob.objects.create(name='images/other.jpg', references=1, variants=VARIANTS_READY)
+        page = Template(
+            '{% load image_variants %}{% image_variants %}'
+            '{% image_variant first "card" %} {% image_variant second "icon" %} {% image_variant first "logo" %}'
+            '{% endimage_variants %}'
+        )
+        context = {'first': 'images/photo.jpg', 'second': 'images/other.jpg'}
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                page.render(Context(context)),
+                '/media/images/photo.jpg /media/images/other-icon.jpg /media/images/photo.jpg',
+            )
+        process_pending()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                page.render(Context(context)),
+                '/media/images/photo-card.jpg /media/images/other-icon.jpg /media/images/photo-logo.jpg',
+            )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BlobTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        media_settings = override_settings(MEDIA_ROOT=media)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def company(self, filename, content):
+        return Company.objects.create(
+            name='Рога и копыта', location='Москва', logo=SimpleUploadedFile(filename, content), description='',
+            employee_count=10,
+        )
+
+    def references(self):
+        return dict(Blob.objects.values_list('name', 'references'))
+
+    def test_same_content_is_stored_once(self):
+        first, second = self.company('first.png', b'logo'), self.company('second.png', b'logo')
+        self.assertEqual(first.logo.name, second.logo.name)
+        self.assertEqual(self.references(), {first.logo.name: 2})
+        self.assertEqual(len(os.listdir(os.path.dirname(first.logo.path))), 1)
+
+    def test_references_follow_saves_and_deletes(self):
+        first, second = self.company('first.png', b'logo'), self.company('second.png', b'logo')
+        shared = first.logo.name
+        second.logo = SimpleUploadedFile('other.png', b'other logo')
+        second.save()
+        self.assertEqual(self.references(), {shared: 1, second.logo.name: 1})
+        first.delete()
+        self.assertEqual(self.references(), {shared: 0, second.logo.name: 1})
+
+    def test_concurrent_first_upload_adds_a_reference(self):
+        # Another upload of the same content creates the row between the update and the create.
+        Blob.objects.create(name='company_images/logo.png', references=1)
+        update, misses = QuerySet.update, iter([True])
+
+        def first_update_misses(queryset, **kwargs):
+            return 0 if next(misses, False) else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', first_update_misses):
+            blobs._shift('company_images/logo.png', 1)
+        self.assertEqual(self.references(), {'company_images/logo.png': 2})
+
+    def test_unreferenced_blobs_are_collected_after_the_grace_period(self):
+        for name, references in (('old.png', 0), ('recent.png', 0), ('used.png', 1)):
+            blob_storage._save(name, ContentFile(name.encode()))
+            Blob.objects.create(name=name, references=references)
+        for name in ('old.png', 'used.png'):
+            two_days_ago = time.time() - 2 * 24 * 3600
+            os.utime(blob_storage.path(name), (two_days_ago, two_days_ago))
+        self.assertEqual(blobs.collect_garbage(), ['old.png'])
+        self.assertEqual(set(self.references()), {'recent.png', 'used.png'})
+        self.assertFalse(blob_storage.exists('old.png'))
+        self.assertTrue(blob_storage.exists('recent.png'))
+
+    def test_seeded_files_get_blobs(self):
+        call_command('load_seed', stdout=io.StringIO())
+        self.assertEqual(self.references(), blobs.referenced_names())
+        self.assertIn(Company.objects.exclude(logo='').first().logo.name, self.references())
+
+
+class CachedUserTests(CatalogTestCase):
+
+    def test_password_hash_is_not_cached(self):
+        user = get_user_model().objects.create_user('cached', password='password')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/myresume/start').status_code, 200)
+        self.assertEqual(self.client.get('/myresume/start').status_code, 200)
+        cached = [value for key, value in cache._cache.items() if 'user:' in key]
+        self.assertTrue(cached)
+        self.assertNotIn(user.password, repr(cached))
+        restored = accounts.cached_user(user.pk)
+        self.assertEqual((restored.username, restored.is_active, restored.is_staff), ('cached', True, False))
+        with self.assertNumQueries(1):
+            self.assertTrue(restored.check_password('password'))
+
+
+RESUME_FORM = {
+    'name': 'Анна', 'surname': 'Смирнова', 'status': 'Ищу работу', 'salary': 90000, 'grade': 'Миддл',
+    'education': 'СПбГУ', 'experience': 'Django', 'portfolio': 'https://example.com',
+}
+VACANCY_FORM = {
+    'title': 'Django разработчик', 'skills': 'Python, Django, Git', 'description': 'Описание',
+    'salary_min': 120000, 'salary_max': 180000,
+}
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(CatalogTestCase):
+    # Every route with a budget in settings.QUERY_BUDGETS, on a catalog with more than one row of each kind,
+    # so a query per row shows up as going over. Strict mode turns going over into an error.
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.employer = get_user_model().objects.create_user('employer', password='password')
+        cls.applicant = get_user_model().objects.create_user('applicant', password='password')
+        cls.staff = get_user_model().objects.create_user('staff', password='password', is_staff=True)
+        Company.objects.filter(pk=cls.company.pk).update(owner=cls.employer)
+        other = Company.objects.create(
+            name='Другая компания', location='Казань', logo='other.png', description='', employee_count=5,
+        )
+        for title, company in (('Django разработчик', cls.company), ('Go разработчик', other)):
+            Vacancy.objects.create(
+                title=title, specialty=cls.specialty, company=company, skills='Git, Linux',
+                description='', salary_min=90000, salary_max=200000,
+            )
+        cls.resume = Resume.objects.create(user=cls.applicant, specialty=cls.specialty, **RESUME_FORM)
+        for number in range(3):
+            Application.objects.create(
+                written_username=f'Соискатель {number}', written_phone='+7 900 000-00-00',
+                written_cover_letter='Здравствуйте', vacancy=cls.vacancy, company=cls.company, user=cls.employer,
+            )
+        cls.application = Application.objects.filter(company=cls.company).first()
+
+    def assertWithinBudget(self, url, data=None, status=200, **extra):
+        # From a cold cache, the most queries a request makes.
+        cache.clear()
+        response = self.client.post(url, data, **extra) if data is not None else self.client.get(url, **extra)
+        self.assertEqual(response.status_code, status)
+        assert_within_query_budget(response)
+
+    def assertPagesWithinBudget(self, urls, status=200):
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertWithinBudget(url, status=status)
+
+    def test_catalog_pages(self):
+        urls = [
+            '/', '/?search=Python', '/search?search=python', '/search?skill=Git&salary_min=100000', '/vacancies',
+            '/vacancies/cat/backend/', f'/companies/{self.company.pk}/', f'/vacancies/{self.vacancy.pk}/',
+            f'/vacancies/{self.vacancy.pk}/sent', '/login', '/register', '/metrics',
+        ]
+        self.assertPagesWithinBudget(urls)
+        # Logged in, the same pages also read the session and the user.
+        self.client.force_login(self.applicant)
+        self.assertPagesWithinBudget(urls)
+
+    def test_api(self):
+        company = self.company.pk
+        self.assertPagesWithinBudget([
+            '/api/v1/vacancies', '/api/v1/vacancies?search=python', '/api/v1/vacancies/cat/backend/',
+            f'/api/v1/vacancies/{self.vacancy.pk}/', '/api/v1/companies', f'/api/v1/companies/{company}/',
+            f'/api/v1/companies/{company}/vacancies', '/api/v1/specialties',
+        ])
+
+    def test_apply(self):
+        data = {'written_username': 'Соискатель', 'written_phone': '+7 900', 'written_cover_letter': 'Привет'}
+        self.assertWithinBudget(f'/vacancies/{self.vacancy.pk}/', data, status=302)
+
+    def test_register(self):
+        data = {
+            'username': 'newcomer', 'password1': 'Tr1cky-passw0rd', 'password2': 'Tr1cky-passw0rd',
+            'first_name': 'Пётр', 'last_name': 'Иванов', 'email': 'newcomer@example.com',
+        }
+        self.assertWithinBudget('/register', data, status=302)
+
+    def test_login_and_logout(self):
+        self.assertWithinBudget('/login', {'username': 'employer', 'password': 'password'}, status=302)
+        self.assertWithinBudget('/logout', status=302)
+
+    def test_employer_pages(self):
+        self.client.force_login(self.employer)
+        self.assertPagesWithinBudget([
+            '/mycompany', '/mycompany/vacancies', '/mycompany/vacancies/create',
+            f'/mycompany/vacancies/{self.vacancy.pk}/', '/mycompany/applications', '/mycompany/resumes',
+            '/mycompany/resumes?search=django', '/mycompany/applications/export.csv',
+        ])
+        self.assertPagesWithinBudget(['/mycompany/start', '/mycompany/create', '/mycompany/vacancies/start'], 302)
+
+    def test_employer_writes(self):
+        self.client.force_login(self.employer)
+        data = {**VACANCY_FORM, 'specialty': self.specialty.pk}
+        self.assertWithinBudget('/mycompany/vacancies/create', data, status=302)
+        # Both adds and removes skills, the most work a save does.
+        data['skills'] = 'Python, Linux'
+        self.assertWithinBudget(f'/mycompany/vacancies/{self.vacancy.pk}/', data, status=302)
+        self.assertWithinBudget(f'/mycompany/applications/{self.application.pk}/status', {'status': 'invited'}, 302)
+        ids = [str(pk) for pk in Application.objects.values_list('pk', flat=True)]
+        self.assertWithinBudget('/mycompany/applications/read', {'id': ids}, status=302)
+
+    def test_company_start(self):
+        self.client.force_login(self.applicant)
+        self.assertPagesWithinBudget(['/mycompany/start', '/mycompany/create', '/mycompany/vacancies/start'])
+
+    def test_resume_pages(self):
+        self.client.force_login(self.applicant)
+        self.assertWithinBudget('/myresume')
+        self.assertWithinBudget('/myresume', {**RESUME_FORM, 'specialty': self.specialty.pk}, status=302)
+
+    def test_resume_create(self):
+        self.client.force_login(self.employer)
+        self.assertPagesWithinBudget(['/myresume/start', '/myresume/create'])
+        self.assertWithinBudget('/myresume/create', {**RESUME_FORM, 'specialty': self.specialty.pk}, status=302)
+
+    def test_catalog_export(self):
+        self.client.force_login(self.staff)
+        self.assertPagesWithinBudget(['/export/vacancies.csv', '/export/companies.ndjson'])
+
+    def test_metrics_for_staff(self):
+        self.client.force_login(self.staff)
+        self.assertWithinBudget('/metrics', REMOTE_ADDR='192.0.2.1')
+
+    def test_every_budget_is_exercised(self):
+        # A budget for a route no test above requests would never be checked.
+        tested = {
+            'main', 'search', 'all_vacancies', 'vacancies_by_specialty', 'company', 'vacancy', 'send_request',
+            'resume', 'resume_start', 'resume_create', 'my_company', 'company_start', 'company_create',
+            'my_vacancies', 'my_vacancies_start', 'my_vacancies_create', 'my_one_vacancy', 'my_applications',
+            'application_status', 'applications_read', 'resume_search', 'export_applications', 'export_catalog',
+            'login', 'logout', 'register', 'api_vacancies', 'api_vacancies_by_specialty', 'api_vacancy',
+            'api_companies', 'api_company', 'api_company_vacancies', 'api_specialties', 'metrics',
+        }
+        self.assertEqual(set(settings.QUERY_BUDGETS), tested)
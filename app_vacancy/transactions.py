@@ -0,0 +1,51 @@
+import random
+import time
+from functools import wraps
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import FileField
+
+WRITE_ATTEMPTS = 5
+# Upper bound of the first backoff in seconds; it doubles with every attempt and is jittered.
+RETRY_DELAY = 0.05
+
+
+def retryable(error, attempt):
+    # Inside an outer transaction there is nothing safe to rerun, so the error is left to the caller.
+    locked = 'database is locked' in str(error) or 'database table is locked' in str(error)
+    return locked and not connection.in_atomic_block and attempt + 1 < WRITE_ATTEMPTS
+
+
+def run_write(func, args, kwargs):
+    for attempt in range(WRITE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not retryable(error, attempt):
+                raise
+        time.sleep(random.uniform(0, RETRY_DELAY * 2 ** attempt))
+
+
+def atomic_write(func):
+    # Runs func in its own short transaction and reruns it when SQLite still reports the database as
+    # locked after busy_timeout, backing off a little longer each time.
+    @wraps(func)
+    def write(*args, **kwargs):
+        return run_write(func, args, kwargs)
+    return write
+
+
+def store_uploads(instance):
+    # What FileField.pre_save would do inside the transaction: writes new uploads to storage.
+    for field in instance._meta.concrete_fields:
+        if isinstance(field, FileField):
+            file = getattr(instance, field.attname)
+            if file and not file._committed:
+                file.save(file.name, file.file, save=False)
+
+
+def atomic_save(instance):
+    # Files first, then the retried transaction: a retry repeats the queries, never the file writes.
+    store_uploads(instance)
+    return run_write(instance.save, (), {})
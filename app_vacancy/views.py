@@ -1,50 +1,45 @@
-from random import sample
-
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.views import LoginView
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q, Count
-from django.http import HttpResponseNotFound, HttpResponseServerError, Http404
+from django.http import HttpResponse, HttpResponseNotFound, HttpResponseServerError, Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils.decorators import method_decorator
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views import View
 
+from app_vacancy.cache import homepage_companies, homepage_skills, homepage_specialties
+from app_vacancy.counters import total_vacancies
+from app_vacancy.export import CATALOG_EXPORTS, FORMATS, export_queryset, stream_export
+from app_vacancy.facets import base_vacancies, facet_choices, facet_counts, filter_vacancies
 from app_vacancy.forms import ApplicationForm
 from app_vacancy.forms import MyCompanyForm
 from app_vacancy.forms import MyCompanyVacanciesCreateEditForm
 from app_vacancy.forms import MyResumeForm
 from app_vacancy.forms import RegisterUserForm
+from app_vacancy.inbox import STATUS_LABELS, filter_applications, mark_read, set_status, unread_ids
+from app_vacancy.metrics import CONTENT_TYPE, can_read, exposition
 
-from app_vacancy.models import Application, Company, Specialty, Vacancy
+from app_vacancy.models import APPLICATION_STATUSES, Application, Company, Resume, Vacancy
+from app_vacancy.pages import depends_on
+from app_vacancy.pagination import paginate
+from app_vacancy.reference import all_specialties, attach_companies, attach_specialties, specialty_by_code
+from app_vacancy.resumes import GRADE_CHOICES, STATUS_CHOICES, find_resumes
+from app_vacancy.similar import similar_to
+from app_vacancy.skills import random_skills
+from app_vacancy.transactions import atomic_save, atomic_write
 
 
 class MainView(View):
 
     def get(self, request):
         query = request.GET.get('search')
-        if query:
-            specialties = Specialty.objects.filter(title__icontains=query).annotate(vacancies_number=Count('vacancies'))
-            companies = (
-                Company.objects
-                .values('id', 'name', 'logo')
-                .annotate(vacancies_number=Count('vacancies'))
-                .filter(name__icontains=query)
-            )
-        else:
-            specialties = Specialty.objects.all().annotate(vacancies_number=Count('vacancies'))
-            companies = Company.objects.values('id', 'name', 'logo').annotate(vacancies_number=Count('vacancies'))
-        skills = Vacancy.objects.values('skills')
-        set_of_skills = set()
-        for skills_list in skills:
-            skills_split = skills_list['skills'].split(', ')
-            set_of_skills.update(skills_split)
-        skills_random = sample(set_of_skills, 5)
         main = {
-            'specialties': specialties,
-            'companies': companies,
-            'skills_random': skills_random
+            'specialties': homepage_specialties(query),
+            'companies': homepage_companies(query),
+            'skills_random': random_skills(homepage_skills())
         }
         return render(request, 'index.html', context=main)
 
@@ -52,34 +47,39 @@ class MainView(View):
 class SearchView(View):
 
     def get(self, request):
-        query = request.GET.get('search')
-        if query:
-            vacancies = Vacancy.objects.filter(Q(title__icontains=query) | Q(skills__icontains=query))
-            if not vacancies:
-                vacancies = Vacancy.objects.filter(specialty__title__icontains=query)
-        else:
-            vacancies = Vacancy.objects.all()
-        return render(request, 'search.html', {'vacancies': vacancies})
+        vacancies, paginator_class = base_vacancies(request.GET)
+        vacancies = filter_vacancies(vacancies, request.GET)
+        counts = facet_counts(request.GET)
+        context = {
+            'vacancies': attach_specialties(paginate(request, vacancies, paginator_class)),
+            'vacancies_count': counts['total'],
+            'facets': facet_choices(counts, request.GET),
+        }
+        return render(request, 'search.html', context=context)
 
 
 class AllVacanciesView(View):
 
     def get(self, request):
-        vacancies = Vacancy.objects.all()
-        all_vacancies = {'vacancies': vacancies}
+        vacancies = attach_specialties(paginate(request, Vacancy.objects.all()))
+        all_vacancies = {
+            'vacancies': vacancies,
+            'vacancies_count': total_vacancies(),
+        }
         return render(request, 'vacancies.html', context=all_vacancies)
 
 
 class VacanciesSpecView(View):
 
     def get(self, request, specialty):
-        spec = get_object_or_404(Specialty, code=specialty)
-        vacs_of_spec = spec.vacancies.all()
-        vacs_of_spec_amount = vacs_of_spec.count()
+        spec = specialty_by_code(specialty)
+        if spec is None:
+            raise Http404
+        vacs_of_spec = attach_specialties(paginate(request, spec.vacancies.all()))
         vacancies_of_spec = {
             'spec': spec,
             'vacs_of_spec': vacs_of_spec,
-            'vacs_of_spec_amount': vacs_of_spec_amount
+            'vacs_of_spec_amount': spec.vacancies_count
         }
         return render(request, 'vacsspec.html', context=vacancies_of_spec)
 
@@ -89,10 +89,11 @@ class CompaniesView(View):
     def get(self, request, id):
         try:
             company = Company.objects.get(id=id)
-            vacs_of_company = company.vacancies.all()
+            vacs_of_company = attach_specialties(paginate(request, company.vacancies.all()))
+            depends_on(request, *{f'specialty:{vacancy.specialty_id}' for vacancy in vacs_of_company})
             companies = {
                 'company': company,
-                'vacs_of_company': vacs_of_company
+                'vacs_of_company': vacs_of_company,
             }
             return render(request, 'company.html', context=companies)
         except ObjectDoesNotExist:
@@ -113,33 +114,38 @@ class OneVacancyView(View):
 
     def get(self, request, id):
         try:
-            vacancy = Vacancy.objects.get(id=id)
+            vacancy = Vacancy.objects.select_related('company').get(id=id)
+            attach_specialties([vacancy])
+            depends_on(request, f'company:{vacancy.company_id}', f'specialty:{vacancy.specialty_id}')
             company = vacancy.company
             form = ApplicationForm()
             vac_and_form = {
                 'vacancy': vacancy,
                 'company': company,
                 'form': form,
+                'similar': similar_to(id),
             }
             return render(request, 'vacancy.html', context=vac_and_form)
         except ObjectDoesNotExist:
             raise Http404
 
     def post(self, request, id):
-        vacancy = Vacancy.objects.get(id=id)
+        vacancy = Vacancy.objects.select_related('company').get(id=id)
         form = ApplicationForm(request.POST)
         if form.is_valid():
             application = form.save(commit=False)
             application.vacancy_id = id
+            application.company_id = vacancy.company_id
             application.user_id = vacancy.company.owner_id
-            application.save()
+            atomic_save(application)
             return redirect(f"/vacancies/{id}/sent")
 
         company = vacancy.company
         vac_and_form = {
             'vacancy': vacancy,
             'company': company,
-            'form': form
+            'form': form,
+            'similar': similar_to(id),
         }
         return render(request, 'vacancy.html', context=vac_and_form)
 
@@ -148,23 +154,19 @@ class ResumeStartView(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        try:
-            if request.user.resumes:
-                return redirect('/myresume')
-        except ObjectDoesNotExist:
-            return render(request, 'resume-start.html')
+        if request.user.resume_id:
+            return redirect('/myresume')
+        return render(request, 'resume-start.html')
 
 
 class ResumeCreateView(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        try:
-            if request.user.resumes:
-                return redirect('/myresume')
-        except ObjectDoesNotExist:
-            form = MyResumeForm()
-            return render(request, 'resume-create.html', {'form': form})
+        if request.user.resume_id:
+            return redirect('/myresume')
+        form = MyResumeForm()
+        return render(request, 'resume-create.html', {'form': form})
 
     def post(self, request):
         owner = request.user
@@ -172,7 +174,7 @@ class ResumeCreateView(View):
         if form.is_valid():
             new_resume = form.save(commit=False)
             new_resume.user = owner
-            new_resume.save()
+            atomic_save(new_resume)
             messages.success(request, 'Резюме создано')
             return redirect('/myresume')
 
@@ -180,16 +182,22 @@ class ResumeCreateView(View):
         return render(request, 'resume-create.html', {'form': form})
 
 
+def vacancy_matches(resume):
+    matches = list(resume.vacancy_matches.select_related('vacancy'))
+    attach_companies(match.vacancy for match in matches)
+    return matches
+
+
 class ResumeEditView(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        try:
-            my_resume = request.user.resumes
-            form = MyResumeForm(instance=my_resume)
-            return render(request, 'resume-edit.html', {'form': form})
-        except ObjectDoesNotExist:
+        if request.user.resume_id is None:
             return redirect('/myresume/start')
+        my_resume = get_object_or_404(Resume, pk=request.user.resume_id)
+        form = MyResumeForm(instance=my_resume)
+        matches = vacancy_matches(my_resume)
+        return render(request, 'resume-edit.html', {'form': form, 'matches': matches})
 
     def post(self, request):
         owner = request.user
@@ -197,12 +205,13 @@ class ResumeEditView(View):
         if form.is_valid():
             my_resume = form.save(commit=False)
             my_resume.user = owner
-            my_resume.save()
+            atomic_save(my_resume)
             messages.success(request, 'Ваше резюме обновлено!')
             return redirect(request.path)
 
+        matches = vacancy_matches(owner.resumes)
         messages.error(request, 'ОШИБКА! Ваше резюме не обновлено!')
-        return render(request, 'resume-edit.html', {'form': form})
+        return render(request, 'resume-edit.html', {'form': form, 'matches': matches})
 
 
 class MyLoginView(LoginView):
@@ -219,7 +228,7 @@ class RegisterUserView(View):
     def post(self, request):
         form = RegisterUserForm(request.POST)
         if form.is_valid():
-            form.save()
+            atomic_write(form.save)()
             return redirect('/login')
 
         return render(request, 'register.html', {'form': form})
@@ -229,12 +238,10 @@ class MyCompany(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        try:
-            my_company = request.user.company
-            form = MyCompanyForm(instance=my_company)
-            return render(request, 'company-edit.html', {'form': form})
-        except ObjectDoesNotExist:
+        if request.user.company_id is None:
             return redirect('/mycompany/start')
+        form = MyCompanyForm(instance=get_object_or_404(Company, pk=request.user.company_id))
+        return render(request, 'company-edit.html', {'form': form})
 
     def post(self, request):
         owner = request.user
@@ -242,7 +249,7 @@ class MyCompany(View):
         if form.is_valid():
             my_company = form.save(commit=False)
             my_company.owner = owner
-            my_company.save()
+            atomic_save(my_company)
             messages.success(request, 'Информация о компании обновлена!')
             return redirect(request.path)
 
@@ -254,23 +261,19 @@ class MyCompanyStart(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        try:
-            if request.user.company:
-                return redirect('/mycompany')
-        except ObjectDoesNotExist:
-            return render(request, 'company-start.html')
+        if request.user.company_id:
+            return redirect('/mycompany')
+        return render(request, 'company-start.html')
 
 
 class MyCompanyStartCreate(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        try:
-            if request.user.company:
-                return redirect('/mycompany')
-        except ObjectDoesNotExist:
-            form = MyCompanyForm()
-            return render(request, 'company-create.html', {'form': form})
+        if request.user.company_id:
+            return redirect('/mycompany')
+        form = MyCompanyForm()
+        return render(request, 'company-create.html', {'form': form})
 
     def post(self, request):
         owner = request.user
@@ -278,7 +281,7 @@ class MyCompanyStartCreate(View):
         if form.is_valid():
             new_company = form.save(commit=False)
             new_company.owner = owner
-            new_company.save()
+            atomic_save(new_company)
             messages.success(request, 'Поздравляем! Вы создали компанию')
             return redirect('/mycompany')
 
@@ -290,12 +293,10 @@ class MyCompanyVacancies(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        owner = request.user
         vacancies = (
             Vacancy.objects
-            .values('id', 'title', 'salary_min', 'salary_max')
-            .filter(company__owner=owner)
-            .annotate(applications_number=Count('applications'))
+            .values('id', 'title', 'salary_min', 'salary_max', 'applications_count', 'unread_applications_count')
+            .filter(company_id=request.user.company_id)
         )
         if not vacancies:
             return redirect('/mycompany/vacancies/start')
@@ -307,7 +308,7 @@ class MyCompanyVacanciesStart(View):
 
     @method_decorator(login_required)
     def get(self, request):
-        if request.user.company.vacancies.all():
+        if Vacancy.objects.filter(company_id=request.user.company_id).exists():
             return redirect('/mycompany/vacancies')
         return render(request, 'vacancy-start.html')
 
@@ -324,8 +325,8 @@ class MyCompanyVacancyCreate(View):
         form = MyCompanyVacanciesCreateEditForm(request.POST)
         if form.is_valid():
             vacancy_create = form.save(commit=False)
-            vacancy_create.company_id = owner.company.id
-            vacancy_create.save()
+            vacancy_create.company_id = owner.company_id
+            atomic_save(vacancy_create)
             messages.success(request, 'Поздравляем! Вы создали вакансию')
             return redirect('/mycompany/vacancies')
 
@@ -338,50 +339,150 @@ class MyCompanyOneVacancy(View):
     @method_decorator(login_required)
     def get(self, request, id):
         try:
-            alien_company = request.user.company.id
+            alien_company = request.user.company_id
             vacancy = Vacancy.objects.get(id=id)
             if alien_company != vacancy.company_id:
                 return redirect('/mycompany/vacancies')
             form = MyCompanyVacanciesCreateEditForm(instance=vacancy)
-            applications = (
-                vacancy.applications
-                .values('written_username', 'written_phone', 'written_cover_letter')
-                .filter(vacancy_id=id)
-            )
             context = {
                 'form': form,
                 'vacancy_title': vacancy.title,
-                'applications': applications
+                'matches': vacancy.resume_matches.select_related('resume'),
+                **vacancy_inbox(request, vacancy),
             }
             return render(request, 'vacancy-edit.html', context=context)
         except ObjectDoesNotExist:
             raise Http404
 
     def post(self, request, id):
-        company_id = request.user.company.id
+        company_id = request.user.company_id
         vacancy = Vacancy.objects.get(id=id)
         form = MyCompanyVacanciesCreateEditForm(request.POST, instance=vacancy)
         if form.is_valid():
             my_comp_vac = form.save(commit=False)
             my_comp_vac.company_id = company_id
-            my_comp_vac.save()
+            atomic_save(my_comp_vac)
             messages.success(request, 'Поздравляем! Вы обновили информацию о вакансии')
             return redirect(request.path)
 
-        applications = (
-            vacancy.applications
-            .values('written_username', 'written_phone', 'written_cover_letter')
-            .filter(vacancy_id=id)
-        )
         one_vacancy = {
             'form': form,
             'vacancy_title': vacancy.title,
-            'applications': applications
+            'matches': vacancy.resume_matches.select_related('resume'),
+            **vacancy_inbox(request, vacancy),
         }
         messages.error(request, 'ОШИБКА! Информация о вакансии не обновлена!')
         return render(request, 'vacancy-edit.html', context=one_vacancy)
 
 
+def inbox_page(request, applications):
+    page = paginate(request, filter_applications(applications, request.GET))
+    return {
+        'applications': page,
+        'unread_ids': unread_ids(page),
+        'statuses': APPLICATION_STATUSES,
+        'status_labels': STATUS_LABELS,
+    }
+
+
+def vacancy_inbox(request, vacancy):
+    return {
+        'applications_count': vacancy.applications_count,
+        'unread_count': vacancy.unread_applications_count,
+        **inbox_page(request, vacancy.applications.all()),
+    }
+
+
+class MyCompanyApplications(View):
+
+    @method_decorator(login_required)
+    def get(self, request):
+        company_id = request.user.company_id
+        if company_id is None:
+            return redirect('/mycompany/start')
+        vacancies = list(
+            Vacancy.objects.filter(company_id=company_id)
+            .values('id', 'title', 'applications_count', 'unread_applications_count')
+        )
+        context = {
+            'vacancies': vacancies,
+            'applications_count': sum(vacancy['applications_count'] for vacancy in vacancies),
+            'unread_count': sum(vacancy['unread_applications_count'] for vacancy in vacancies),
+            **inbox_page(request, Application.objects.filter(company_id=company_id).select_related('vacancy')),
+        }
+        return render(request, 'applications.html', context=context)
+
+
+def back_to_inbox(request):
+    next_url = request.POST.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = '/mycompany/applications'
+    return redirect(next_url)
+
+
+class ApplicationStatusView(View):
+
+    @method_decorator(login_required)
+    def post(self, request, id):
+        set_status(request.user, id, request.POST.get('status'))
+        return back_to_inbox(request)
+
+
+class ApplicationsReadView(View):
+    # A POST of its own: viewing the inbox, or a prefetch of it, changes nothing.
+
+    @method_decorator(login_required)
+    def post(self, request):
+        mark_read(request.user, request.POST.getlist('id'))
+        return back_to_inbox(request)
+
+
+class ResumeSearchView(View):
+
+    @method_decorator(login_required)
+    def get(self, request):
+        if request.user.company_id is None:
+            return redirect('/mycompany/start')
+        resumes, paginator_class = find_resumes(request.GET)
+        context = {
+            'resumes': attach_specialties(paginate(request, resumes, paginator_class)),
+            'specialties': all_specialties(),
+            'grades': GRADE_CHOICES,
+            'statuses': STATUS_CHOICES,
+        }
+        return render(request, 'resume-search.html', context=context)
+
+
+class ApplicationsExportView(View):
+
+    @method_decorator(login_required)
+    def get(self, request, fmt):
+        if fmt not in FORMATS:
+            raise Http404
+        company_id = request.user.company_id
+        if company_id is None:
+            return redirect('/mycompany/start')
+        applications = filter_applications(export_queryset('applications').filter(company_id=company_id), request.GET)
+        return stream_export(applications, 'applications', fmt)
+
+
+class CatalogExportView(View):
+
+    @method_decorator(staff_member_required)
+    def get(self, request, name, fmt):
+        if name not in CATALOG_EXPORTS or fmt not in FORMATS:
+            raise Http404
+        return stream_export(export_queryset(name), name, fmt)
+
+
+class MetricsView(View):
+
+    def get(self, request):
+        if not can_read(request):
+            raise Http404
+        return HttpResponse(exposition(), content_type=CONTENT_TYPE)
+
+
 def custom_handler404(request, exception):
     return HttpResponseNotFound('404 ошибка - ошибка на стороне '
                                 'сервера (страница не найдена)')
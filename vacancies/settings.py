@@ -28,6 +28,9 @@ DEBUG = True
 ALLOWED_HOSTS = ['*']
 STATIC_ROOT = 'static'
 
+# Views rely on the company_id and resume_id it sets on request.user.
+AUTHENTICATION_BACKENDS = ['app_vacancy.accounts.UserContextBackend']
+
 LOGIN_URL = '/login'
 
 LOGIN_REDIRECT_URL = '/'
@@ -43,26 +46,32 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'app_vacancy',
+    'app_vacancy.apps.AppVacancyConfig',
     'crispy_forms',
 ]
 
 MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'app_vacancy.middleware.ServerTimingMiddleware',
+    'app_vacancy.middleware.QueryBudgetMiddleware',
+    'app_vacancy.middleware.ReplicaMiddleware',
+    'app_vacancy.middleware.ReferenceDataMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'app_vacancy.middleware.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'vacancies.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The stock Django backend, timing each render for the Server-Timing header and /metrics.
+        'BACKEND': 'app_vacancy.metrics.TimedTemplates',
         'DIRS': ['templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,12 +91,60 @@ WSGI_APPLICATION = 'vacancies.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# app_vacancy/sqlite is the stock SQLite backend plus the pragmas and transaction_mode options.
+# The database runs in WAL mode, switched on by migration 0018, so readers run alongside the single writer.
+# busy_timeout makes a writer wait its turn instead of failing with "database is locked". The pragmas here
+# only last as long as the connection; connections are kept across requests by each worker.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'app_vacancy.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 600)),
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'busy_timeout': 5000,
+                'synchronous': 'NORMAL',
+                'cache_size': -20000,
+                'mmap_size': 268435456,
+                'temp_store': 'MEMORY',
+            },
+        },
+    }
+}
+
+# Read replicas. SQLITE_REPLICAS lists SQLite files, separated by commas (e.g. db-replica.sqlite3), that
+# refresh_replicas keeps copying the primary into; locally they stand in for real replicas. GET requests to the views in
+# REPLICA_READ_VIEWS read the catalog from one of them, everything else stays on the primary.
+DATABASES.update({
+    f'replica{number}': {**DATABASES['default'], 'NAME': os.path.join(BASE_DIR, path), 'TEST': {'MIRROR': 'default'}}
+    for number, path in enumerate(filter(None, os.environ.get('SQLITE_REPLICAS', '').split(',')), 1)
+})
+REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['app_vacancy.routers.PrimaryReplicaRouter']
+
+REPLICA_READ_VIEWS = (
+    'main', 'search', 'all_vacancies', 'vacancies_by_specialty', 'company', 'vacancy', 'send_request',
+    'api_vacancies', 'api_vacancies_by_specialty', 'api_vacancy', 'api_companies', 'api_company',
+    'api_company_vacancies', 'api_specialties',
+)
+
+# After writing, a client reads from the primary for this long; replicas must be refreshed more often.
+REPLICA_PIN_SECONDS = 30
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        # Room for the cached pages of app_vacancy/pages.py next to the catalog fragments.
+        'OPTIONS': {'MAX_ENTRIES': 20000},
     }
 }
+# Lock files of app_vacancy/cache.py: one worker recomputes an expired fragment, the others serve the stale copy.
+# Like the file cache, shared by every worker of the host.
+CACHE_LOCK_DIR = os.path.join(BASE_DIR, 'cache-locks')
 
 
 # Password validation
@@ -139,3 +196,59 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
+
+# Maximum number of SQL queries per request, by URL name from vacancies/urls.py.
+# Exceeding a budget is logged, or raised when QUERY_BUDGET_STRICT is on (tests).
+# The numbers are the worst case measured by QueryBudgetTests in app_vacancy/tests.py: a cold cache, a logged-in user.
+QUERY_BUDGETS = {
+    'main': 6,
+    'search': 7,
+    'all_vacancies': 6,
+    'vacancies_by_specialty': 5,
+    'company': 6,
+    'vacancy': 6,
+    'send_request': 2,
+    'resume': 11,
+    'resume_start': 2,
+    'resume_create': 9,
+    'my_company': 3,
+    'company_start': 2,
+    'company_create': 2,
+    'my_vacancies': 3,
+    'my_vacancies_start': 3,
+    'my_vacancies_create': 16,
+    'my_one_vacancy': 19,
+    'my_applications': 4,
+    'application_status': 5,
+    'applications_read': 7,
+    'resume_search': 4,
+    'export_applications': 2,
+    'export_catalog': 2,
+    'login': 9,
+    'logout': 4,
+    'register': 4,
+    'api_vacancies': 1,
+    'api_vacancies_by_specialty': 1,
+    'api_vacancy': 1,
+    'api_companies': 1,
+    'api_company': 1,
+    'api_company_vacancies': 1,
+    'api_specialties': 1,
+    'metrics': 2,
+}
+
+QUERY_BUDGET_STRICT = False
+
+# Serve the public read-only pages with the async views from app_vacancy/async_views.py.
+# vacancies/asgi.py switches this on, WSGI workers keep the sync views.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+
+# Every worker process keeps its request histograms in its own file here; /metrics adds them up and merges
+# the files of workers that have exited into one. Clear the directory between deployments to start from zero.
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(BASE_DIR, 'metrics'))
+
+# The TF-IDF corpus of app_vacancy/similar.py, kept between runs of refresh_similar so a refresh only
+# reads the vacancies that changed. refresh_similar --full rebuilds it with a new vocabulary.
+SIMILAR_CORPUS_PATH = os.environ.get('SIMILAR_CORPUS_PATH', os.path.join(BASE_DIR, 'similar-corpus.npz'))
+# Who may read /metrics besides staff users: the Prometheus server scraping it.
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1').split(',')
@@ -19,11 +19,15 @@ from django.contrib import admin
 from django.contrib.auth.views import LogoutView
 from django.urls import path
 
-from app_vacancy.views import AllVacanciesView, CompaniesView, MainView, OneVacancyView, SearchView, VacanciesSpecView
+from app_vacancy import async_views, views
+from app_vacancy.api import CompanyApi, CompanyListApi, CompanyVacanciesApi, SpecialtyListApi
+from app_vacancy.api import VacancyApi, VacancyListApi, VacancySpecialtyApi
 from app_vacancy.views import SendRequestView
 
 from app_vacancy.views import MyCompany, MyCompanyStart, MyCompanyStartCreate
 from app_vacancy.views import MyCompanyVacancies, MyCompanyVacanciesStart, MyCompanyVacancyCreate, MyCompanyOneVacancy
+from app_vacancy.views import ApplicationStatusView, ApplicationsExportView, ApplicationsReadView, MyCompanyApplications
+from app_vacancy.views import CatalogExportView, MetricsView, ResumeSearchView
 from app_vacancy.views import MyLoginView, RegisterUserView
 from app_vacancy.views import ResumeEditView, ResumeStartView, ResumeCreateView
 
@@ -33,16 +37,18 @@ from app_vacancy.views import custom_handler500
 handler404 = custom_handler404
 handler500 = custom_handler500
 
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', MainView.as_view(), name='main'),
-    path('search', SearchView.as_view(), name='search'),
+    path('', read_views.MainView.as_view(), name='main'),
+    path('search', read_views.SearchView.as_view(), name='search'),
     path('myresume', ResumeEditView.as_view(), name='resume'),
     path('myresume/start', ResumeStartView.as_view(), name='resume_start'),
     path('myresume/create', ResumeCreateView.as_view(), name='resume_create'),
-    path('vacancies', AllVacanciesView.as_view(), name='all_vacancies'),
-    path('vacancies/cat/<str:specialty>/', VacanciesSpecView.as_view(), name='vacancies_by_specialty'),
-    path('companies/<int:id>/', CompaniesView.as_view(), name='company'),
-    path('vacancies/<int:id>/', OneVacancyView.as_view(), name='vacancy'),
+    path('vacancies', read_views.AllVacanciesView.as_view(), name='all_vacancies'),
+    path('vacancies/cat/<str:specialty>/', read_views.VacanciesSpecView.as_view(), name='vacancies_by_specialty'),
+    path('companies/<int:id>/', read_views.CompaniesView.as_view(), name='company'),
+    path('vacancies/<int:id>/', read_views.OneVacancyView.as_view(), name='vacancy'),
     path('vacancies/<int:id>/sent', SendRequestView.as_view(), name='send_request'),
     path('mycompany', MyCompany.as_view(), name='my_company'),
     path('mycompany/start', MyCompanyStart.as_view(), name='company_start'),
@@ -51,9 +57,23 @@ urlpatterns = [
     path('mycompany/vacancies/start', MyCompanyVacanciesStart.as_view(), name='my_vacancies_start'),
     path('mycompany/vacancies/create', MyCompanyVacancyCreate.as_view(), name='my_vacancies_create'),
     path('mycompany/vacancies/<int:id>/', MyCompanyOneVacancy.as_view(), name='my_one_vacancy'),
-    path('login', MyLoginView.as_view()),
-    path('logout', LogoutView.as_view()),
-    path('register', RegisterUserView.as_view()),
+    path('mycompany/applications', MyCompanyApplications.as_view(), name='my_applications'),
+    path('mycompany/applications/<int:id>/status', ApplicationStatusView.as_view(), name='application_status'),
+    path('mycompany/applications/read', ApplicationsReadView.as_view(), name='applications_read'),
+    path('mycompany/resumes', ResumeSearchView.as_view(), name='resume_search'),
+    path('mycompany/applications/export.<slug:fmt>', ApplicationsExportView.as_view(), name='export_applications'),
+    path('export/<slug:name>.<slug:fmt>', CatalogExportView.as_view(), name='export_catalog'),
+    path('login', MyLoginView.as_view(), name='login'),
+    path('logout', LogoutView.as_view(), name='logout'),
+    path('register', RegisterUserView.as_view(), name='register'),
+    path('api/v1/vacancies', VacancyListApi.as_view(), name='api_vacancies'),
+    path('api/v1/vacancies/cat/<str:specialty>/', VacancySpecialtyApi.as_view(), name='api_vacancies_by_specialty'),
+    path('api/v1/vacancies/<int:id>/', VacancyApi.as_view(), name='api_vacancy'),
+    path('api/v1/companies', CompanyListApi.as_view(), name='api_companies'),
+    path('api/v1/companies/<int:id>/', CompanyApi.as_view(), name='api_company'),
+    path('api/v1/companies/<int:id>/vacancies', CompanyVacanciesApi.as_view(), name='api_company_vacancies'),
+    path('api/v1/specialties', SpecialtyListApi.as_view(), name='api_specialties'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('admin/', admin.site.urls),
 ]
 